@@ -122,6 +122,12 @@ try:
                 self.handle_command(command)
 
             def register_hooks(self):
+                # track the target's state from lldb's events if we can. a
+                # synchronous debugger hijacks its processes' events while
+                # they run, so fall back to a stop-hook for that
+                if self.debugger.GetAsync() and self.adaptor.start_event_pump():
+                    print("Registered for LLDB events")
+                    return
                 try:
                     output = self.adaptor.command("target stop-hook list")
                     if not 'voltron' in output:
@@ -136,6 +142,9 @@ try:
                     print("No targets")
 
             def unregister_hooks(self):
+                if self.adaptor.event_pump:
+                    self.adaptor.stop_event_pump()
+                    return
                 cmd = 'target stop-hook delete {}'.format(self.hook_idx if self.hook_idx else '')
                 self.debugger.HandleCommand(cmd)
 
@@ -182,27 +191,20 @@ try:
                 self.handle_command(arg)
 
             def register_hooks(self):
-                gdb.events.stop.connect(self.stop_handler)
-                gdb.events.exited.connect(self.stop_and_exit_handler)
+                # the adaptor tracks the inferior's state from gdb's events,
+                # we just start and stop the server with the inferior
+                self.adaptor.connect_events()
+                gdb.events.exited.connect(self.exit_handler)
                 gdb.events.cont.connect(self.cont_handler)
 
             def unregister_hooks(self):
-                gdb.events.stop.disconnect(self.stop_handler)
-                gdb.events.exited.disconnect(self.stop_and_exit_handler)
+                self.adaptor.disconnect_events()
+                gdb.events.exited.disconnect(self.exit_handler)
                 gdb.events.cont.disconnect(self.cont_handler)
 
-            def stop_handler(self, event):
-                self.adaptor.update_state()
-                log.debug('Inferior stopped')
-
             def exit_handler(self, event):
                 log.debug('Inferior exited')
                 self.server.stop()
-                
-            def stop_and_exit_handler(self, event):
-                log.debug('Inferior stopped and exited')
-                self.stop_handler(event)
-                self.exit_handler(event)
 
             def cont_handler(self, event):
                 log.debug('Inferior continued')
@@ -275,6 +277,7 @@ try:
 
             def cont_handler(self, event):
                 log.debug('Inferior continued')
+                self.adaptor.invalidate()
 
 
         # wb: i have no idea if this __name__ test is actually correct
@@ -0,0 +1,10 @@
+from voltron.plugin import *
+
+
+class GraphViewPlugin(WebPlugin):
+    """
+    A web view of the control flow graph of the current function, from the
+    `function_cfg` API. It's all javascript, so its static directory is
+    mounted at the root of the plugin.
+    """
+    name = 'graphview'
@@ -0,0 +1,123 @@
+// Draws the control flow graph of the current function on each stop. Blocks
+// are laid out in rows by their distance from the start of the function, and
+// edges are drawn between them in an SVG underneath.
+
+function request(type, data) {
+    return fetch('/api/request', {
+        method: 'POST',
+        body: JSON.stringify({type: "request", request: type, data: data})
+    }).then(function (response) { return response.json(); });
+}
+
+function hex(n) {
+    return n.toString(16);
+}
+
+function layers(cfg) {
+    // breadth first from the first block, so the rows go down the function
+    var successors = {};
+    cfg.edges.forEach(function (e) {
+        (successors[e.from] = successors[e.from] || []).push(e.to);
+    });
+    var depth = {};
+    var queue = cfg.blocks.length ? [cfg.blocks[0].start] : [];
+    if (queue.length) {
+        depth[queue[0]] = 0;
+    }
+    while (queue.length) {
+        var b = queue.shift();
+        (successors[b] || []).forEach(function (s) {
+            if (!(s in depth)) {
+                depth[s] = depth[b] + 1;
+                queue.push(s);
+            }
+        });
+    }
+
+    // blocks that can't be reached (e.g. after a jump table) go at the end
+    var rows = [];
+    var last = Math.max.apply(null, Object.values(depth).concat([0])) + 1;
+    cfg.blocks.forEach(function (block) {
+        var d = block.start in depth ? depth[block.start] : last;
+        (rows[d] = rows[d] || []).push(block);
+    });
+    return rows.filter(function (row) { return row; });
+}
+
+function render(cfg) {
+    var title = document.getElementById('title');
+    title.textContent = cfg.function ? cfg.function.name + ' @ 0x' + hex(cfg.function.start) : '0x' + hex(cfg.address);
+
+    var container = document.getElementById('blocks');
+    container.innerHTML = '';
+    var elements = {};
+    layers(cfg).forEach(function (row) {
+        var div = document.createElement('div');
+        div.className = 'row';
+        row.forEach(function (block) {
+            var el = document.createElement('div');
+            var current = block.start <= cfg.address && cfg.address < block.end;
+            el.className = 'block' + (current ? ' current' : '');
+            var label = document.createElement('div');
+            label.className = 'label';
+            label.textContent = 'loc_' + hex(block.start) + ':';
+            el.appendChild(label);
+            block.instructions.forEach(function (i) {
+                var line = document.createElement('div');
+                line.className = i.address == cfg.address ? 'pc' : '';
+                line.textContent = '0x' + hex(i.address) + '  ' + i.mnemonic + ' ' + i.operands +
+                    (i.symbol ? '  ; ' + i.symbol : '');
+                el.appendChild(line);
+            });
+            div.appendChild(el);
+            elements[block.start] = el;
+            if (current) {
+                el.scrollIntoView({block: 'center'});
+            }
+        });
+        container.appendChild(div);
+    });
+
+    // draw the edges from the bottom of one block to the top of the next
+    var svg = document.getElementById('edges');
+    var graph = document.getElementById('graph').getBoundingClientRect();
+    svg.setAttribute('width', graph.width);
+    svg.setAttribute('height', graph.height);
+    svg.innerHTML = '';
+    cfg.edges.forEach(function (e) {
+        var from = elements[e.from].getBoundingClientRect();
+        var to = elements[e.to].getBoundingClientRect();
+        var x1 = from.left + from.width / 2 - graph.left, y1 = from.bottom - graph.top;
+        var x2 = to.left + to.width / 2 - graph.left, y2 = to.top - graph.top;
+        var path = document.createElementNS('http://www.w3.org/2000/svg', 'path');
+        path.setAttribute('class', 'edge ' + e.type);
+        path.setAttribute('d', 'M' + x1 + ',' + y1 + ' C' + x1 + ',' + (y1 + 40) + ' ' + x2 + ',' + (y2 - 40) +
+            ' ' + x2 + ',' + y2);
+        svg.appendChild(path);
+    });
+}
+
+function update() {
+    request('function_cfg', {}).then(function (response) {
+        if (response.status == 'success') {
+            render(response.data);
+        }
+    });
+}
+
+function poll() {
+    // wait for the next state change
+    fetch('/api/wait?timeout=30').then(function (response) {
+        return response.json();
+    }).then(function (response) {
+        if (response.status == 'success') {
+            update();
+        }
+        poll();
+    }, function () {
+        setTimeout(poll, 1000);
+    });
+}
+
+update();
+poll();
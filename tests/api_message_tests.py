@@ -231,3 +231,68 @@ def test_test_response_string():
     msg = APITestResponse(disassembly='xxx')
     assert json.loads(str(msg)) == {"status": "success", "type": "response", "data": {"disassembly": "xxx"}}
 
+
+def test_test_request_slots():
+    msg = APITestRequest(count=16)
+    # fields are kept in slots, not the instance dict
+    assert msg.__dict__ == {}
+    assert 'count' in APITestRequest.__slots__
+    assert msg._defaults['request'] == 'test'
+
+def test_test_request_parsed_data():
+    msg = APITestRequest({"data": {"count": 16}})
+    assert msg.count == 16
+    assert msg.target_id == 0
+
+def test_mutable_defaults():
+    class APIListRequest(APIRequest):
+        _fields = {'things': False}
+        things = []
+    a = APIListRequest()
+    a.things.append(1)
+    assert APIListRequest().things == []
+
+def test_unknown_field():
+    msg = APITestResponse('{"data": {"disassembly": "xxx", "thing": 1}}')
+    assert msg.thing == 1
+    assert 'thing' not in json.loads(str(msg))['data']
+
+def test_lazy_decode():
+    class APIEncodedResponse(APISuccessResponse):
+        _fields = {'memory': True, 'bytes': True}
+        _encode_fields = ['memory']
+    msg = APIEncodedResponse('{"status": "success", "data": {"memory": "QUJD", "bytes": 3}}')
+    assert msg._raw['memory'] == 'QUJD'
+    assert msg.memory == b'ABC'
+    assert msg.bytes == 3
+    assert json.loads(str(msg))['data'] == {"memory": "QUJD", "bytes": 3}
+
+def test_json_backends():
+    backend = voltron.api.json_backend
+    try:
+        set_json_backend('json')
+        assert voltron.api.json_backend == 'json'
+        assert json_loads(json_dumps({"a": 1 << 128})) == {"a": 1 << 128}
+        set_json_backend('nonexistent')
+        assert voltron.api.json_backend != None
+    finally:
+        set_json_backend(backend)
+    assert json_loads(json_dumps({"a": 1 << 128})) == {"a": 1 << 128}
+
+def test_encode_parts():
+    class APIEncodedResponse(APISuccessResponse):
+        _fields = {'memory': True, 'bytes': True}
+        _encode_fields = ['memory']
+    msg = APIEncodedResponse(memory=memoryview(b'ABC'), bytes=3)
+    parts = msg.encode_parts()
+    assert len(parts) == 3
+    assert json.loads(b''.join(parts).decode('UTF-8')) == json.loads(str(msg))
+    assert json.loads(str(msg))['data']['memory'] == 'QUJD'
+    assert APIEncodedResponse(str(msg)).memory[1:] == b'BC'
+
+def test_extra_attributes():
+    # attributes that aren't fields can be set, and aren't sent
+    msg = APISuccessResponse('{"status": "success", "data": {}}')
+    msg.formatted = 'x'
+    assert msg.formatted == 'x'
+    assert 'formatted' not in json.loads(str(msg))['data']
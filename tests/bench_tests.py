@@ -0,0 +1,47 @@
+"""
+Tests for the `voltron bench` load generator helpers.
+"""
+
+import os
+
+from nose.tools import *
+
+import voltron
+from voltron.bench import *
+from voltron.plugins.view.disasm import DisasmView
+
+
+def setup():
+    voltron.setup_env()
+
+def test_percentile():
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values, 50) == 3
+    assert percentile(values, 99) == 5
+    assert percentile(values, 0) == 1
+    assert percentile([], 50) == None
+
+def test_host_cpu_time():
+    if os.path.exists('/proc/self/stat'):
+        assert host_cpu_time(os.getpid()) >= 0
+
+def test_headless_view():
+    cls = headless(DisasmView, 10, 80)
+    assert issubclass(cls, DisasmView)
+    assert cls.__name__ == 'HeadlessDisasmView'
+    view = cls.__new__(cls)
+    assert view.window_size() == (10, 80)
+
+def test_collect_drops_late_results():
+    bench = Bench.__new__(Bench)
+    bench.args = argparse.Namespace(timeout=0.1)
+    bench.results = queue.Queue()
+    sim = SimulatedView.__new__(SimulatedView)
+    sim.error = None
+    bench.sims = [sim]
+
+    # a render for stop 0 that finished after stop 1 was triggered
+    bench.results.put((sim, 0, 1.0, 2.0))
+    bench.results.put((sim, 1, 3.0, 4.0))
+    assert bench.collect(1) == ([3.0], [4.0])
+    assert bench.collect(2) == ([], [])
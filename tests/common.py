@@ -66,9 +66,32 @@ registers_response = ({"gs": 0, "fooff": 0, "edi": 1, "edx": 1349115624, "r13w":
 memory_response = "\xff"*0x40
 stack_response = "\xff"*0x40
 wait_response = "stopped"
+context_response = {"thread_id": 123456, "pc": 4552273184, "sp": 140734542503608, "fp": 140734542503624}
+memory_map_response = [
+    {"start": 4552269824, "end": 4552273920, "perms": "r-x", "file": "/tmp/inferior", "type": "module"},
+    {"start": 140734542495744, "end": 140734542503936, "perms": "rw-", "file": None, "type": "stack"}]
 command_response = "inferior`main:\n-> 0x100000d20:  pushq  %rbp\n   0x100000d21:  movq   %rsp, %rbp\n   0x100000d24:  subq   $0x40, %rsp\n   0x100000d28:  movl   $0x0, -0x4(%rbp)\n   0x100000d2f:  movl   %edi, -0x8(%rbp)\n   0x100000d32:  movq   %rsi, -0x10(%rbp)\n   0x100000d36:  movl   $0x0, -0x14(%rbp)\n   0x100000d3d:  movq   $0x0, -0x20(%rbp)\n   0x100000d45:  cmpl   $0x1, -0x8(%rbp)\n   0x100000d4c:  jle    0x100000d94               ; main + 116\n   0x100000d52:  movq   -0x10(%rbp), %rax\n   0x100000d56:  movq   0x8(%rax), %rdi\n   0x100000d5a:  leaq   0x18a(%rip), %rsi         ; \"sleep\"\n   0x100000d61:  callq  0x100000ea0               ; symbol stub for: strcmp\n   0x100000d66:  cmpl   $0x0, %eax\n   0x100000d6b:  jne    0x100000d94               ; main + 116\n   0x100000d71:  leaq   0x179(%rip), %rdi         ; \"*** Sleeping for 5 seconds\\n\"\n   0x100000d78:  movb   $0x0, %al\n   0x100000d7a:  callq  0x100000e94               ; symbol stub for: printf\n   0x100000d7f:  movl   $0x5, %edi\n   0x100000d84:  movl   %eax, -0x24(%rbp)\n   0x100000d87:  callq  0x100000e9a               ; symbol stub for: sleep\n   0x100000d8c:  movl   %eax, -0x28(%rbp)\n   0x100000d8f:  jmpq   0x100000e88               ; main + 360\n   0x100000d94:  cmpl   $0x1, -0x8(%rbp)\n   0x100000d9b:  jle    0x100000dd6               ; main + 182\n   0x100000da1:  movq   -0x10(%rbp), %rax\n   0x100000da5:  movq   0x8(%rax), %rdi\n   0x100000da9:  leaq   0x15d(%rip), %rsi         ; \"loop\"\n   0x100000db0:  callq  0x100000ea0               ; symbol stub for: strcmp\n   0x100000db5:  cmpl   $0x0, %eax\n   0x100000dba:  jne    0x100000dd6               ; main + 182"
 disassemble_response = command_response
+instructions_response = [
+    {"address": 4294970656, "bytes": "55", "size": 1, "mnemonic": "pushq", "operands": "%rbp", "comment": None,
+     "target": None, "symbol": None},
+    {"address": 4294970657, "bytes": "e87a010000", "size": 5, "mnemonic": "callq", "operands": "0x100000ea0",
+     "comment": None, "target": 4294971040, "symbol": "strcmp + 0x0"}]
+disassembly_window_response = {"address": 4294970657, "function": {"name": "main", "start": 4294970656,
+                               "end": 4294971040}, "instructions": instructions_response}
+function_cfg_response = {"address": 4294970657, "function": {"name": "main", "start": 4294970656, "end": 4294971040},
+                         "blocks": [{"start": 4294970656, "end": 4294970662, "instructions": instructions_response}],
+                         "edges": []}
+backtrace_response = {"frames": [{"index": 0, "pc": 4294970657, "sp": 140734799804304, "fp": 140734799804320,
+                                  "function": "main", "offset": 1, "module": "/tmp/inferior",
+                                  "file": "/tmp/inferior.c", "line": 12}],
+                      "truncated": False, "unwinder": "debugger"}
+xrefs_response = {"xrefs": [{"from": 4294970662, "type": "call", "symbol": "main + 0x6"}], "pending": [],
+                  "unavailable": []}
 dereference_response = [[u'pointer', 140734748778168], [u'pointer', 140735677462013], [u'symbol', u'start + 0x1']]
+dereference_many_response = [dereference_response, [[u'pointer', 140734542503608]]]
+symbolicate_response = [{"symbol": "main", "offset": 0, "module": "/tmp/inferior"}, None]
+classify_pointers_response = [{"class": "stack"}, {"class": "code", "module": "/tmp/inferior", "symbol": "main + 0x0"}]
 breakpoints_response = {"status": "success", "data": {"breakpoints": [{"one_shot": False, "enabled": True, "id": 1, "hit_count": 1, "locations": [{"name": "inferior`main", "address": 4294970608}]}]}, "type": "response"}
 
 def inject_mock(adaptor):
@@ -83,7 +106,18 @@ def inject_mock(adaptor):
     adaptor.wait = Mock(return_value=wait_response)
     adaptor.command = Mock(return_value=command_response)
     adaptor.disassemble = Mock(return_value=disassemble_response)
+    adaptor.instructions = Mock(return_value=instructions_response)
+    adaptor.disassembly_window = Mock(return_value=disassembly_window_response)
+    adaptor.function_cfg = Mock(return_value=function_cfg_response)
+    adaptor.xrefs = Mock(return_value=xrefs_response)
+    adaptor.backtrace = Mock(return_value=backtrace_response)
     adaptor.dereference = Mock(return_value=dereference_response)
+    adaptor.dereference_many = Mock(return_value=dereference_many_response)
+    adaptor.classify_pointers = Mock(return_value=classify_pointers_response)
+    adaptor.symbolicate = Mock(return_value=symbolicate_response)
     adaptor.breakpoints = Mock(return_value=breakpoints_response)
     adaptor.stack_pointer = Mock(return_value=('sp', 0))
     adaptor.program_counter = Mock(return_value=('pc', 0))
+    adaptor.frame_pointer = Mock(return_value=('fp', 0))
+    adaptor.context = Mock(return_value=context_response)
+    adaptor.memory_map = Mock(return_value=memory_map_response)
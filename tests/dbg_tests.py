@@ -0,0 +1,874 @@
+"""
+Tests for the debugger adaptor base class.
+"""
+
+import os
+import sys
+import ctypes
+import struct
+import shutil
+import tempfile
+import time
+import threading
+
+from nose.tools import *
+from nose import SkipTest
+
+import voltron
+from voltron.dbg import *
+from voltron.xrefs import XrefIndex
+
+
+class CountingAdaptor(DebuggerAdaptor):
+    def __init__(self):
+        super(CountingAdaptor, self).__init__()
+        self.calls = 0
+
+    @stop_cached
+    def _target(self, target_id=0):
+        self.calls += 1
+        return {"id": target_id, "state": "stopped"}
+
+
+def setup():
+    voltron.setup_env()
+
+def test_stop_cached():
+    adaptor = CountingAdaptor()
+    assert adaptor.target_is_valid(0)
+    assert not adaptor.target_is_busy(0)
+    assert adaptor.calls == 1
+    adaptor._target(target_id=1)
+    assert adaptor.calls == 2
+
+def test_invalidate():
+    adaptor = CountingAdaptor()
+    adaptor._target()
+    epoch = adaptor.epoch
+    adaptor.invalidate()
+    adaptor._target()
+    assert adaptor.calls == 2
+    assert adaptor.epoch == epoch + 1
+
+def test_update_state_invalidates():
+    adaptor = CountingAdaptor()
+    called = []
+    adaptor.add_listener(lambda: called.append(adaptor.epoch))
+    adaptor._target()
+    adaptor.update_state()
+    adaptor._target()
+    assert adaptor.calls == 2
+    assert called == [1]
+
+def test_register_category():
+    adaptor = CountingAdaptor()
+    assert adaptor.register_category('rax') == 'general'
+    assert adaptor.register_category('rflags') == 'flags'
+    assert adaptor.register_category('cpsr') == 'flags'
+    assert adaptor.register_category('fs') == 'segment'
+    assert adaptor.register_category('xmm15') == 'sse'
+    assert adaptor.register_category('ymm0') == 'avx'
+    assert adaptor.register_category('zmm31') == 'avx512'
+    assert adaptor.register_category('st0') == 'fpu'
+    assert adaptor.register_category('cr0') == 'system'
+
+def test_vector_register_class():
+    adaptor = CountingAdaptor()
+    assert adaptor.vector_register_class('x86_64', 'ymm0') == 'ymm'
+    assert adaptor.vector_register_class('x86_64', 'k7') == 'k'
+    assert adaptor.vector_register_class('x86_64', 'xmm0') == None
+    assert adaptor.vector_register_class('x86_64', 'v0') == None
+    assert adaptor.vector_register_class('arm64', 'v0') == 'v'
+    assert adaptor.vector_register_class('arm64', 'ffr') == 'p'
+
+def test_memory_cache():
+    mem = bytearray(range(256)) * 64
+    reads = []
+    def read(address, length):
+        reads.append((address, length))
+        if address + length > len(mem):
+            raise Exception("unmapped")
+        return bytes(mem[address:address + length])
+
+    cache = MemoryCache(read, page_size=256, budget=4096)
+    assert cache.read(0x10, 0x20) == bytes(mem[0x10:0x30])
+    assert cache.read(0x80, 0x10) == bytes(mem[0x80:0x90])
+    assert reads == [(0, 256)]
+
+    # missing pages are read in one go, and the range crosses page boundaries
+    assert cache.read(0xf0, 0x220) == bytes(mem[0xf0:0x310])
+    assert reads[1:] == [(0x100, 0x300)]
+
+    # least recently used pages are evicted over budget
+    for address in range(0x400, 0x1100, 0x100):
+        cache.read(address, 1)
+    assert len(cache.pages) == 16
+    assert 0 not in cache.pages
+
+    # invalidating a range drops only the pages it touches
+    cache.invalidate(0x2ff, 2)
+    assert sorted(cache.pages) == [1] + list(range(4, 17))
+    cache.invalidate()
+    assert not cache.pages
+
+    # reading pages past the end of memory falls back to the exact range
+    assert cache.read(len(mem) - 4, 4) == bytes(mem[-4:])
+    assert_raises(Exception, cache.read, len(mem) - 4, 8)
+
+def test_invalidate_memory_cache():
+    adaptor = CountingAdaptor()
+    adaptor._read_memory = lambda address, length, target_id=0: b'\x00' * length
+    adaptor.read_memory(0, 8)
+    assert len(adaptor.memory_cache().pages) == 1
+    adaptor.invalidate()
+    assert not adaptor.memory_cache().pages
+
+def test_process_memory():
+    if not sys.platform.startswith('linux'):
+        raise SkipTest("/proc/<pid>/mem is Linux only")
+    buf = ctypes.create_string_buffer(b'voltron' * 0x1000)
+    address = ctypes.addressof(buf)
+    mem = ProcessMemory(os.getpid())
+    assert mem.read(address, 0x7000) == buf.raw[:0x7000]
+    assert mem._pread(mem.segments(address, 7)) == b'voltron'
+    assert_raises(ProcessMemoryError, mem.read, 0, 8)
+
+    # this process isn't being traced
+    assert ProcessMemory.attach(os.getpid()) is None
+
+def test_memory_map():
+    regions = parse_proc_maps(
+        "55d0c4a00000-55d0c4a02000 r-xp 00000000 08:01 1234   /bin/true\n"
+        "55d0c4c02000-55d0c4c03000 rw-p 00002000 08:01 1234   /bin/true\n"
+        "55d0c5a4d000-55d0c5a6e000 rw-p 00000000 00:00 0      [heap]\n"
+        "7f3a1c000000-7f3a1c021000 rw-p 00000000 00:00 0 \n"
+        "7f3a1c021000-7f3a20000000 ---p 00000000 00:00 0 \n"
+        "7ffd7e3c1000-7ffd7e3e2000 rw-p 00000000 00:00 0      [stack]\n")
+    assert regions[0] == {"start": 0x55d0c4a00000, "end": 0x55d0c4a02000, "perms": "r-x", "file": "/bin/true"}
+    assert regions[3]['file'] is None
+
+    mem_map = MemoryMap(regions, sp=0x7f3a1c000100)
+    assert [r['type'] for r in mem_map.regions] == ['module', 'module', 'heap', 'stack', 'anon', 'stack']
+    assert mem_map.classify(0x55d0c4a01fff) == 'module'
+    assert mem_map.classify(0x55d0c4a02000) == None
+    assert mem_map.classify(0x55d0c5a4d010) == 'heap'
+    assert mem_map.is_valid(0x7ffd7e3c1000, 0x21000)
+    assert not mem_map.is_valid(0x55d0c4a01ff8, 0x10)
+    assert not mem_map.is_valid(0x7f3a1c020ff8, 0x10)
+    assert not mem_map.is_valid(0)
+
+    # nothing is known about an empty map
+    assert MemoryMap([]).is_valid(0)
+
+class DerefAdaptor(CountingAdaptor):
+    # a chain of pointers 0x10 -> 0x20 -> 0x30 and a pointer to itself at
+    # 0x48, in memory at 0x10-0x1000 that is otherwise zeroed
+    memory = {0x10: 0x20, 0x20: 0x30, 0x48: 0x48}
+
+    def __init__(self):
+        super(DerefAdaptor, self).__init__()
+        self.host_lock = threading.RLock()
+        self.described = []
+
+    def target_is_valid(self, target_id=0):
+        return True
+
+    def target_is_busy(self, target_id=0):
+        return False
+
+    @stop_cached
+    def _target(self, target_id=0):
+        return {"id": target_id, "state": "stopped", "addr_size": 8, "byte_order": "little"}
+
+    def _memory_regions(self, target_id=0):
+        return [{"start": 0x10, "end": 0x1000, "perms": "rw-", "file": None}]
+
+    def _read_memory(self, address, length, target_id=0):
+        return b''.join(struct.pack('<Q', self.memory.get(address + i, 0)) for i in range(0, length, 8))
+
+    def _dereference(self, pointer, target_id=0, memo=None):
+        return self._pointer_chain(pointer, target_id=target_id, memo=memo)
+
+    def _describe_pointer(self, addr, target_id=0):
+        self.described.append(addr)
+        return [('symbol', 'sym_{:x}'.format(addr))]
+
+def test_dereference_many():
+    adaptor = DerefAdaptor()
+    chains = adaptor.dereference_many(pointers=[0x10, 0x20, 0x10, 0x40])
+    assert chains[0] == [('pointer', 0x10), ('pointer', 0x20), ('pointer', 0x30), ('symbol', 'sym_30')]
+    assert chains[1] == chains[0][1:]
+    assert chains[2] == chains[0]
+    assert chains[3] == [('pointer', 0x40), ('symbol', 'sym_40')]
+    # chains ending at the same address share the lookup
+    assert adaptor.described == [0x30, 0x40]
+
+    chains = adaptor.dereference_many(address=0x10, count=3)
+    assert [c[:1] for c in chains] == [[('pointer', 0x20)], [], [('pointer', 0x30)]]
+
+    # chains that come back on themselves end there
+    assert adaptor.dereference_many(pointers=[0x48])[0] == [('pointer', 0x48), ('symbol', 'sym_48'), ('circular', 'circular')]
+    adaptor.memory = dict((a, a + 8) for a in range(0x100, 0x200, 8))
+    adaptor.invalidate()
+    chain = adaptor.dereference_many(pointers=[0x100])[0]
+    assert [p for p in chain if p[0] == 'pointer'] == [('pointer', a) for a in range(0x100, 0x100 + 8 * MAX_DEREF, 8)]
+
+def test_symbol_index():
+    index = SymbolIndex([(0x1010, 0, 'b'), (0x1000, 0x8, 'a'), (0x1020, 0x10, 'c'), (0x1030, 0x10, None)])
+    assert len(index) == 3
+    assert index.lookup(0x1000) == ('a', 0)
+    assert index.lookup(0x1008) == None
+    assert index.lookup(0x101f) == ('b', 0xf)
+    assert index.symbolicate(0x1024) == 'c + 0x4'
+    assert index.symbolicate(0x1030) == None
+    assert index.bounds(0x1004) == ('a', 0x1000, 0x1008)
+
+    # symbols with no size extend to the next one, but have no bounds
+    assert index.bounds(0x1011) == None
+    assert index.symbolicate(0xfff) == None
+
+    # sizes that weren't known can be looked up when they're first needed
+    sizes = []
+    def size_of(address):
+        sizes.append(address)
+        return 0x4 if address == 0x1010 else 0
+    index = SymbolIndex([(0x1000, 0x8, 'a'), (0x1010, 0, 'b'), (0x1020, 0, 'c'), (0x1030, 0x10, 'd')],
+                        size_of=size_of)
+    assert sizes == []
+    assert index.bounds(0x1011) == ('b', 0x1010, 0x1014)
+    assert index.symbolicate(0x1014) == None
+    assert index.symbolicate(0x1024) == 'c + 0x4'
+    assert index.bounds(0x1024) == None
+    assert index.bounds(0x1034) == ('d', 0x1030, 0x1040)
+    assert sizes == [0x1010, 0x1020]
+
+class ClassifyAdaptor(DerefAdaptor):
+    def _memory_regions(self, target_id=0):
+        return [
+            {"start": 0x1000, "end": 0x2000, "perms": "r-x", "file": "/remote/true"},
+            {"start": 0x2000, "end": 0x3000, "perms": "r--", "file": "/remote/true"},
+            {"start": 0x3000, "end": 0x4000, "perms": "rw-", "file": "/remote/true"},
+            {"start": 0x5000, "end": 0x6000, "perms": "rw-", "file": "[heap]"},
+            {"start": 0x7000, "end": 0x8000, "perms": "rw-", "file": None},
+        ]
+
+    def context(self, target_id=0):
+        return {"sp": 0x7ff0}
+
+    def _symbols(self, target_id=0):
+        return [(0x1100, 0x20, 'main')]
+
+    def _read_memory(self, address, length, target_id=0):
+        # "hello" at 0x2100 and junk everywhere else
+        data = bytearray(b'\x01' * length)
+        if address <= 0x2100 < address + length:
+            offset = 0x2100 - address
+            data[offset:offset + 6] = b'hello\0'
+        return bytes(data[:length])
+
+def test_classify_pointers():
+    adaptor = ClassifyAdaptor()
+    classes = adaptor.classify_pointers(pointers=[0x1104, 0x2100, 0x2200, 0x3000, 0x5008, 0x7008, 0x9000])
+    assert classes[0] == {"class": "code", "module": "/remote/true", "symbol": "main + 0x4"}
+    assert classes[1] == {"class": "string", "module": "/remote/true", "string": "hello"}
+    assert [c['class'] for c in classes[2:]] == ['rodata', 'data', 'heap', 'stack', 'invalid']
+
+    # nothing is known without a memory map
+    adaptor._memory_regions = lambda target_id=0: []
+    adaptor.invalidate()
+    assert adaptor.classify_pointers(pointers=[0x1104, 0x9000]) == [{"class": "code", "symbol": "main + 0x4"},
+                                                                   {"class": "unknown"}]
+
+class SelfAdaptor(DerefAdaptor):
+    # this process, with its memory map from /proc
+    def __init__(self, disk_cache=None):
+        super(SelfAdaptor, self).__init__()
+        self.disk_cache = disk_cache
+
+    def _memory_regions(self, target_id=0):
+        with open('/proc/self/maps') as f:
+            return parse_proc_maps(f.read())
+
+def test_module_symbol_index():
+    index = ModuleSymbolIndex([
+        {"path": "/lib/a.so", "start": 0x7000, "end": 0x9000, "link_base": 0,
+         "symbols": SymbolIndex([(0x100, 0x10, 'a')])},
+        {"path": "/bin/b", "start": 0x400000, "end": 0x401000, "link_base": 0x400000,
+         "symbols": SymbolIndex([(0x400100, 0x10, 'b')])},
+    ])
+    assert len(index) == 2
+    assert index.symbolicate(0x7104) == 'a + 0x4'
+    assert index.symbolicate(0x400100) == 'b + 0x0'
+    assert index.module(0x8fff)['path'] == '/lib/a.so'
+    assert index.lookup(0x9100) == None
+
+def test_symbolicate():
+    if not sys.platform.startswith('linux'):
+        raise SkipTest("/proc/<pid>/maps is Linux only")
+    libc = ctypes.CDLL(None)
+    malloc = ctypes.cast(libc.malloc, ctypes.c_void_p).value
+    adaptor = SelfAdaptor()
+    symbols = adaptor.symbolicate([malloc, malloc + 4, 0])
+    if symbols[0] is None:
+        raise SkipTest("libc has no symbols")
+    assert symbols[0]['symbol'] in ('malloc', '__libc_malloc')
+    assert symbols[1]['offset'] == 4
+    assert 'libc' in symbols[0]['module']
+    assert symbols[2] is None
+
+    # modules are only indexed once
+    indexes = dict(adaptor.module_symbols)
+    adaptor.invalidate()
+    adaptor.symbolicate([malloc])
+    assert all(adaptor.module_symbols[key] is indexes[key] for key in indexes)
+
+def test_symbol_index_save():
+    tmp = tempfile.mkdtemp()
+    try:
+        cache = DiskCache(tmp)
+        index = SymbolIndex([(0x1000, 0x8, u'a'), (0x1010, 0, u'bé'), (0x1020, 0x10, u'c')])
+        path = cache.write('abcdef', 'symbols', index.save(0x400000))
+        assert path == os.path.join(tmp, 'ab', 'abcdef', 'symbols')
+        loaded, link_base = SymbolIndex.load(path)
+        assert link_base == 0x400000
+        assert len(loaded) == 3
+        for address in (0xfff, 0x1000, 0x1008, 0x1011, 0x102f, 0x1030):
+            assert loaded.lookup(address) == index.lookup(address)
+            assert loaded.bounds(address) == index.bounds(address)
+        with open(path, 'r+b') as f:
+            f.truncate(40)
+        assert_raises(ValueError, SymbolIndex.load, path)
+    finally:
+        shutil.rmtree(tmp)
+
+def test_symbolicate_disk_cache():
+    if not sys.platform.startswith('linux'):
+        raise SkipTest("/proc/<pid>/maps is Linux only")
+    libc = ctypes.CDLL(None)
+    malloc = ctypes.cast(libc.malloc, ctypes.c_void_p).value
+    tmp = tempfile.mkdtemp()
+    try:
+        symbols = SelfAdaptor(disk_cache=DiskCache(tmp)).symbolicate([malloc])
+
+        # the next session gets the symbols from the cache
+        adaptor = SelfAdaptor(disk_cache=DiskCache(tmp))
+        def module_symbols(module, target_id=0):
+            raise Exception("Symbols weren't cached for {}".format(module['path']))
+        adaptor._module_symbols = module_symbols
+        assert adaptor.symbolicate([malloc]) == symbols
+    finally:
+        shutil.rmtree(tmp)
+
+def test_parse_instruction():
+    assert parse_instruction('call   0x401030 <puts@plt>') == ('call', '0x401030', 'puts@plt', None)
+    assert parse_instruction('lea    0xe9c(%rip),%rdi        # 0x402004') == \
+        ('lea', '0xe9c(%rip),%rdi', None, '0x402004')
+    assert parse_instruction('rep stos %rax,%es:(%rdi)') == ('rep stos', '%rax,%es:(%rdi)', None, None)
+    assert parse_instruction('ret') == ('ret', '', None, None)
+    assert parse_instruction('ldr r3, [pc, #12]\t@ (0x10468 <main+32>)') == \
+        ('ldr', 'r3, [pc, #12]', None, '(0x10468 <main+32>)')
+
+def test_branch_target():
+    assert branch_target('call', '0x401030') == 0x401030
+    assert branch_target('jne', '0x40113c <main+22>') == 0x40113c
+    assert branch_target('bl', '#0x1234') == 0x1234
+    assert branch_target('b.ne', '0x1234') == 0x1234
+    assert branch_target('cbz', 'x0, 0x1234') == 0x1234
+    assert branch_target('jmp', '*%rax') == None
+    assert branch_target('call', 'qword ptr [rip + 0x2fe2]') == None
+    assert branch_target('bt', 'eax, 5') == None
+    assert branch_target('bic', 'r0, r1, #4') == None
+
+class DisasmAdaptor(ClassifyAdaptor):
+    # main at 0x1100, as GDB would disassemble it
+    code = [
+        (0x1100, 1, 'push   %rbp'),
+        (0x1101, 5, 'call   0x1110 <main+16>'),
+        (0x1106, 2, 'jmp    *%rax'),
+        (0x1108, 1, 'ret'),
+    ]
+
+    def __init__(self):
+        super(DisasmAdaptor, self).__init__()
+        self.text = bytearray(b'\x90' * 0x10)
+        self.decoded = []
+
+    def program_counter(self, target_id=0, thread_id=None):
+        return ('rip', 0x1101)
+
+    def _read_memory(self, address, length, target_id=0):
+        data = super(DisasmAdaptor, self)._read_memory(address, length, target_id=target_id)
+        if address <= 0x1100 < address + length:
+            data = bytearray(data)
+            offset = 0x1100 - address
+            data[offset:offset + len(self.text)] = self.text
+            data = bytes(data[:length])
+        return data
+
+    def _instructions(self, address, count, target_id=0):
+        self.decoded.append(address)
+        records = []
+        for addr, size, text in [c for c in self.code if c[0] >= address][:count]:
+            mnemonic, operands, symbol, comment = parse_instruction(text)
+            code = self.read_memory(addr, size, target_id=target_id)
+            records.append({"address": addr, "bytes": ''.join('{:02x}'.format(b) for b in bytearray(code)),
+                            "size": size, "mnemonic": mnemonic, "operands": operands, "comment": comment,
+                            "symbol": symbol})
+        return records
+
+def test_instructions():
+    adaptor = DisasmAdaptor()
+    records = adaptor.instructions(count=2)
+    assert [r['address'] for r in records] == [0x1101, 0x1106]
+    assert records[0]['mnemonic'] == 'call'
+    assert records[0]['target'] == 0x1110
+    assert records[0]['symbol'] == 'main + 0x10'
+    assert records[1]['target'] == None
+    assert records[1]['symbol'] == None
+
+    text = format_instructions(adaptor.instructions(address=0x1100, count=4), pc=0x1101)
+    assert text.split('\n') == [
+        '   0x1100:  push    %rbp',
+        '-> 0x1101:  call    0x1110  ; main + 0x10',
+        '   0x1106:  jmp     *%rax',
+        '   0x1108:  ret',
+    ]
+
+def test_instruction_cache():
+    adaptor = DisasmAdaptor()
+    records = adaptor.instructions(address=0x1100, count=2)
+    assert adaptor.decoded == [0x1100]
+    assert len(adaptor.instruction_cache()) == 2
+
+    # cached instructions are reused after the target stops again, and only
+    # the ones that aren't cached are decoded
+    adaptor.invalidate()
+    assert adaptor.instructions(address=0x1100, count=4)[:2] == records
+    assert adaptor.decoded == [0x1100, 0x1106]
+    adaptor.invalidate()
+    adaptor.instructions(address=0x1101, count=3)
+    assert adaptor.decoded == [0x1100, 0x1106]
+
+    # modified code is decoded again
+    adaptor.text[6] = 0xcc
+    adaptor.invalidate()
+    adaptor.instructions(address=0x1100, count=4)
+    assert adaptor.decoded == [0x1100, 0x1106, 0x1106]
+    assert adaptor.instructions(address=0x1106, count=1)[0]['bytes'] == 'cc90'
+
+    cache = InstructionCache(size=2)
+    cache.store(records + [dict(records[0], address=0x2000)])
+    assert len(cache) == 2
+    assert cache.run(0x1100, 2) == []
+    assert [r['address'] for code, r in cache.run(0x1101, 2)] == [0x1101]
+
+class ModuleDisasmAdaptor(DisasmAdaptor):
+    # DisasmAdaptor's code in a module that is cached on disk
+    def __init__(self, disk_cache):
+        super(ModuleDisasmAdaptor, self).__init__()
+        self.disk_cache = disk_cache
+
+    def _modules(self, target_id=0):
+        return [{"path": "/remote/true", "start": 0x1000, "end": 0x4000, "key": "/remote/true",
+                 "build_id": "abcdef"}]
+
+    def _module_symbols(self, module, target_id=0):
+        return [(0x1100, 0x20, 'main')], 0x1000
+
+def test_instruction_disk_cache():
+    tmp = tempfile.mkdtemp()
+    try:
+        adaptor = ModuleDisasmAdaptor(DiskCache(tmp))
+        records = adaptor.instructions(address=0x1100, count=4)
+
+        # instructions are written in the background, and only once
+        adaptor.invalidate()
+        adaptor.instruction_writer.flush()
+        assert DiskCache(tmp).exists('abcdef', 'instructions')
+        index = adaptor._module_instructions(0x1100)
+        assert not index.added and not index.dirty
+        assert [r['bytes'] for r in index.run(0x1100, 4)] == [r['bytes'] for r in records]
+        adaptor.invalidate()
+        assert not index.dirty
+        adaptor.instruction_writer.stop()
+
+        # the next session gets the instructions from the cache
+        adaptor = ModuleDisasmAdaptor(DiskCache(tmp))
+        assert adaptor.instructions(address=0x1100, count=4) == records
+        assert adaptor.decoded == []
+
+        # modified code is decoded again
+        adaptor.text[6] = 0xcc
+        adaptor.invalidate()
+        assert adaptor.instructions(address=0x1100, count=4)[2]['bytes'] == 'cc90'
+        assert adaptor.decoded == [0x1106]
+        adaptor.invalidate()
+        adaptor.instruction_writer.flush()
+        assert adaptor._module_instructions(0x1100).get(0x1106)['bytes'] == 'cc90'
+        adaptor.instruction_writer.stop()
+    finally:
+        shutil.rmtree(tmp)
+
+def test_instruction_index_save():
+    tmp = tempfile.mkdtemp()
+    try:
+        index = InstructionIndex(0x400000, 0x3000)
+        index.add([
+            {"address": 0x401101, "bytes": "e80a000000", "size": 5, "mnemonic": "call", "operands": "0x401110 <main+16>",
+             "comment": None, "target": 0x401110, "symbol": "main+16"},
+            {"address": 0x401106, "bytes": "8b0500100000", "size": 6, "mnemonic": "mov",
+             "operands": "0xe9c(%rip),%eax", "comment": "# 0x40210c", "target": None, "symbol": None},
+            {"address": 0x405000, "bytes": "c3", "size": 1, "mnemonic": "ret", "operands": "", "comment": None,
+             "target": None, "symbol": None},
+        ])
+        assert len(index) == 2
+        path = DiskCache(tmp).write('abcdef', 'instructions', index.save())
+
+        # addresses in the module are moved to where it's loaded
+        loaded = InstructionIndex.load(path, 0x7f0000000000)
+        run = loaded.run(0x7f0000001101, 3)
+        assert [r['address'] for r in run] == [0x7f0000001101, 0x7f0000001106]
+        assert run[0]['target'] == 0x7f0000001110
+        assert run[0]['operands'] == '0x7f0000001110 <main+16>'
+        assert run[1]['operands'] == '0xe9c(%rip),%eax'
+        assert run[1]['comment'] == '# 0x7f000000210c'
+        assert loaded.get(0x401101) == None
+
+        # records that are added are saved with the ones that were loaded
+        loaded.add([dict(run[1], address=0x7f000000110c, size=1, bytes="c3", mnemonic="ret", operands="",
+                         comment=None)])
+        loaded.write(DiskCache(tmp), 'abcdef')
+        assert not loaded.added
+        assert [r['address'] for r in loaded.run(0x7f0000001101, 3)] == [0x7f0000001101, 0x7f0000001106,
+                                                                        0x7f000000110c]
+        assert loaded.get(0x7f0000001101) == run[0]
+
+        with open(path, 'r+b') as f:
+            f.truncate(40)
+        assert_raises(ValueError, InstructionIndex.load, path, 0x400000)
+    finally:
+        shutil.rmtree(tmp)
+
+class LengthAdaptor(ClassifyAdaptor):
+    # code at 0x1100 in which the first byte of each instruction is its size
+    # (0 meaning 1), with "main" covering the first two copies
+    def __init__(self):
+        super(LengthAdaptor, self).__init__()
+        self.text = bytearray(b'\x01\x03\x00\x00\x02\x00\x01\x04\x00\x00\x00\x01' * 4)
+        self.decoded = 0
+
+    def _symbols(self, target_id=0):
+        return [(0x1100, 0x18, 'main')]
+
+    def _read_memory(self, address, length, target_id=0):
+        data = bytearray(super(LengthAdaptor, self)._read_memory(address, length, target_id=target_id))
+        for i in range(length):
+            if 0 <= address + i - 0x1100 < len(self.text):
+                data[i] = self.text[address + i - 0x1100]
+        return bytes(data)
+
+    def _instructions(self, address, count, target_id=0):
+        records = []
+        for i in range(count):
+            code = bytearray(self.read_memory(address, 1))
+            size = max(code[0], 1)
+            code = bytearray(self.read_memory(address, size))
+            self.decoded += 1
+            records.append({"address": address, "bytes": ''.join('{:02x}'.format(b) for b in code), "size": size,
+                            "mnemonic": "i{}".format(size), "operands": ""})
+            address += size
+        return records
+
+def window_addresses(adaptor, address, offset, count):
+    return [r['address'] for r in adaptor.disassembly_window(address=address, offset=offset,
+                                                             count=count)['instructions']]
+
+def test_disassembly_window():
+    adaptor = LengthAdaptor()
+    window = adaptor.disassembly_window(address=0x110c, offset=-3, count=5)
+    assert window['function'] == {"name": "main", "start": 0x1100, "end": 0x1118}
+    assert [r['address'] for r in window['instructions']] == [0x1106, 0x1107, 0x110b, 0x110c, 0x110d]
+    assert window_addresses(adaptor, 0x1100, 2, 2) == [0x1104, 0x1106]
+    assert window_addresses(adaptor, 0x1100, -2, 2) == [0x10fe, 0x10ff]
+    assert window_addresses(adaptor, 0x1118, -8, 3) == [0x1107, 0x110b, 0x110c]
+
+    # functions are only decoded once
+    assert (0, 0x1100) in adaptor.function_layouts
+    decoded = adaptor.decoded
+    adaptor.invalidate()
+    assert window_addresses(adaptor, 0x1118, -12, 12)[0] == 0x1100
+    assert adaptor.decoded == decoded
+
+    # without a symbol, decoding from a little before the address syncs up
+    assert window_addresses(adaptor, 0x1130, -3, 3) == [0x112a, 0x112b, 0x112f]
+
+    # modified code is decoded again
+    adaptor.text[1] = 1
+    adaptor.invalidate()
+    assert window_addresses(adaptor, 0x1106, -3, 3) == [0x1102, 0x1103, 0x1104]
+
+def test_branch_kind():
+    assert branch_kind('call', '0x401030') == 'call'
+    assert branch_kind('jne', '0x401030') == 'conditional'
+    assert branch_kind('jmp', '*%rax') == 'jump'
+    assert branch_kind('notrack jmp', '*%rax') == 'jump'
+    assert branch_kind('rep ret', '') == 'return'
+    assert branch_kind('b.ne', '0x1234') == 'conditional'
+    assert branch_kind('cbz', 'x0, 0x1234') == 'conditional'
+    assert branch_kind('b', '0x1234') == 'jump'
+    assert branch_kind('bl', '0x1234') == 'call'
+    assert branch_kind('blr', 'x8') == 'call'
+    assert branch_kind('blr', '') == 'return'
+    assert branch_kind('bx', 'lr') == 'return'
+    assert branch_kind('mov', 'eax, 1') == None
+
+class FlowAdaptor(LengthAdaptor):
+    # if (eax != 1) eax = 3; else eax = 2; return, followed by data
+    code = {
+        0x1100: (2, 'cmp eax, 1'),
+        0x1102: (2, 'jne 0x1108'),
+        0x1104: (2, 'mov eax, 2'),
+        0x1106: (2, 'jmp 0x110a'),
+        0x1108: (2, 'mov eax, 3'),
+        0x110a: (1, 'ret'),
+    }
+
+    def _symbols(self, target_id=0):
+        return [(0x1100, 0x10, 'main')]
+
+    def _instructions(self, address, count, target_id=0):
+        records = []
+        while len(records) < count and address in self.code:
+            size, text = self.code[address]
+            mnemonic, operands, symbol, comment = parse_instruction(text)
+            code = bytearray(self.read_memory(address, size))
+            self.decoded += 1
+            records.append({"address": address, "bytes": ''.join('{:02x}'.format(b) for b in code), "size": size,
+                            "mnemonic": mnemonic, "operands": operands})
+            address += size
+        return records
+
+def test_function_cfg():
+    import voltron.dbg
+    adaptor = FlowAdaptor()
+    cfg = adaptor.function_cfg(address=0x1104)
+    assert cfg['address'] == 0x1104
+    assert cfg['function'] == {"name": "main", "start": 0x1100, "end": 0x1110}
+    assert [(b['start'], b['end']) for b in cfg['blocks']] == [(0x1100, 0x1104), (0x1104, 0x1108), (0x1108, 0x110a),
+                                                               (0x110a, 0x110b)]
+    assert [r['mnemonic'] for r in cfg['blocks'][0]['instructions']] == ['cmp', 'jne']
+    assert cfg['blocks'][0]['instructions'][1]['symbol'] == 'main + 0x8'
+    assert sorted((e['from'], e['to'], e['type']) for e in cfg['edges']) == [
+        (0x1100, 0x1104, 'fallthrough'), (0x1100, 0x1108, 'taken'), (0x1104, 0x110a, 'jump'),
+        (0x1108, 0x110a, 'fallthrough')]
+
+    # graphs are cached while the code is unchanged
+    recover_cfg = voltron.dbg.recover_cfg
+    recovered = []
+    def counting_recover_cfg(*args, **kwargs):
+        recovered.append(args[1])
+        return recover_cfg(*args, **kwargs)
+    voltron.dbg.recover_cfg = counting_recover_cfg
+    try:
+        adaptor.invalidate()
+        assert adaptor.function_cfg(address=0x110a) == dict(cfg, address=0x110a)
+        assert recovered == []
+        adaptor.text[2] = 0xcc
+        adaptor.invalidate()
+        adaptor.function_cfg(address=0x110a)
+        assert recovered == [0x1100]
+    finally:
+        voltron.dbg.recover_cfg = recover_cfg
+
+def test_xref_index_save():
+    tmp = tempfile.mkdtemp()
+    try:
+        index = XrefIndex([(0x1100, 0x1004, 0), (0x2000, 0x1008, 2), (0x1100, 0x1200, 1)])
+        assert index.lookup(0x1100) == [(0x1004, 'call'), (0x1200, 'jump')]
+        assert index.lookup(0x2000) == [(0x1008, 'data')]
+        assert index.lookup(0x1104) == []
+        path = DiskCache(tmp).write('abcdef', 'xrefs', index.save(0x400000))
+        loaded, link_base = XrefIndex.load(path)
+        assert link_base == 0x400000
+        assert len(loaded) == 3
+        for address in (0xfff, 0x1100, 0x2000, 0x2001):
+            assert loaded.lookup(address) == index.lookup(address)
+        with open(path, 'r+b') as f:
+            f.truncate(40)
+        assert_raises(ValueError, XrefIndex.load, path)
+    finally:
+        shutil.rmtree(tmp)
+
+class XrefAdaptor(SelfAdaptor):
+    # references from the start of each executable section to 8 bytes into it
+    # and to `header`, an address in a module's ELF header
+    def __init__(self, disk_cache=None, header=0x10):
+        super(XrefAdaptor, self).__init__(disk_cache=disk_cache)
+        self.xref_index_enabled = True
+        self.header = header
+
+    def _xref_decoder(self, arch):
+        def decode(data, address):
+            yield address, 4, 'call', [address + 8, self.header]
+        return decode
+
+def test_xrefs():
+    if not sys.platform.startswith('linux'):
+        raise SkipTest("/proc/<pid>/maps is Linux only")
+    tmp = tempfile.mkdtemp()
+    try:
+        adaptor = XrefAdaptor(disk_cache=DiskCache(tmp))
+        module = adaptor._modules()[0]
+        elf = ELFFile(module['path'])
+        try:
+            section = elf.executable_sections()[0][0]
+            address = section - elf.load_base + module['start']
+            adaptor.header = elf.load_base + 0x10
+        finally:
+            elf.close()
+
+        # modules are indexed in the background
+        for i in range(100):
+            xrefs = adaptor.xrefs(address + 8)
+            if not xrefs['pending']:
+                break
+            time.sleep(0.1)
+        assert xrefs['xrefs'][0]['from'] == address
+        assert xrefs['xrefs'][0]['type'] == 'call'
+        assert adaptor.xrefs(address + 8, types=['data'])['xrefs'] == []
+
+        # references outside the module's sections aren't kept
+        assert adaptor.xrefs(module['start'] + 0x10)['xrefs'] == []
+        adaptor.xref_indexer.stop()
+
+        # the next session gets the index from the cache
+        adaptor = XrefAdaptor(disk_cache=DiskCache(tmp))
+        adaptor._xref_decoder = lambda arch: None
+        for i in range(100):
+            if not adaptor.xrefs(address + 8)['pending']:
+                break
+            time.sleep(0.1)
+        assert adaptor.xrefs(address + 8)['xrefs'] == xrefs['xrefs']
+        adaptor.xref_indexer.stop()
+
+        # modules that can't be indexed aren't pending forever
+        adaptor = XrefAdaptor()
+        adaptor._xref_decoder = lambda arch: None
+        for i in range(100):
+            xrefs = adaptor.xrefs(address + 8)
+            if not xrefs['pending']:
+                break
+            time.sleep(0.1)
+        assert xrefs['xrefs'] == []
+        assert module['path'] in xrefs['unavailable']
+        adaptor.xref_indexer.stop()
+    finally:
+        shutil.rmtree(tmp)
+
+class StackAdaptor(ClassifyAdaptor):
+    # "helper" called from "main", with a chain of saved frame pointers
+    # 0x7e10 -> 0x7e40 -> 0 on the stack
+    stack = {0x7e10: 0x7e40, 0x7e18: 0x1110, 0x7e40: 0, 0x7e48: 0x1050}
+
+    def __init__(self):
+        super(StackAdaptor, self).__init__()
+        self.sources = []
+
+    def _symbols(self, target_id=0):
+        return [(0x1100, 0x20, 'main'), (0x1200, 0x40, 'helper')]
+
+    def program_counter(self, target_id=0, thread_id=None):
+        return 'rip', 0x1204
+
+    def stack_pointer(self, target_id=0, thread_id=None):
+        return 'rsp', 0x7e00
+
+    def frame_pointer(self, target_id=0, thread_id=None):
+        return 'rbp', 0x7e10
+
+    def _read_memory(self, address, length, target_id=0):
+        return b''.join(struct.pack('<Q', self.stack.get(address + i, 0)) for i in range(0, length, 8))
+
+    def _frame_source(self, address, target_id=0):
+        self.sources.append(address)
+        return ('/src/main.c', 10) if 0x1100 <= address < 0x1120 else None
+
+def test_backtrace():
+    adaptor = StackAdaptor()
+    bt = adaptor.backtrace()
+    assert bt['unwinder'] == 'frame_pointer'
+    assert not bt['truncated']
+    frames = bt['frames']
+    assert [(f['index'], f['pc'], f['sp'], f['fp']) for f in frames] == [
+        (0, 0x1204, 0x7e00, 0x7e10), (1, 0x1110, 0x7e20, 0x7e40), (2, 0x1050, 0x7e50, 0)]
+    assert frames[0]['function'] == 'helper' and frames[0]['offset'] == 4 and frames[0]['file'] is None
+    assert frames[1]['function'] == 'main' and frames[1]['offset'] == 0x10
+    assert (frames[1]['file'], frames[1]['line']) == ('/src/main.c', 10)
+    assert frames[2]['function'] is None
+
+    # return addresses are looked up at the call before them
+    assert adaptor.sources == [0x1204, 0x110f, 0x104f]
+
+    # the depth limits the frames returned
+    bt = adaptor.backtrace(depth=2)
+    assert bt['truncated']
+    assert [f['pc'] for f in bt['frames']] == [0x1204, 0x1110]
+
+    # frames are only symbolicated once
+    adaptor.invalidate()
+    assert adaptor.backtrace()['frames'] == frames
+    assert len(adaptor.sources) == 3
+
+def test_backtrace_debugger_frames():
+    adaptor = StackAdaptor()
+    adaptor._frames = lambda count, target_id=0, thread_id=None: [
+        {"pc": 0x1204, "sp": 0x7e00, "fp": 0x7e10}, {"pc": 0x1108, "sp": 0x7e30, "fp": 0x7f00}][:count]
+    bt = adaptor.backtrace()
+    assert bt['unwinder'] == 'debugger'
+    assert [(f['pc'], f['function']) for f in bt['frames']] == [(0x1204, 'helper'), (0x1108, 'main')]
+
+    # the frame pointer chain is followed if the debugger stops at the first frame
+    adaptor._frames = lambda count, target_id=0, thread_id=None: [{"pc": 0x1204, "sp": 0x7e00, "fp": 0x7e10}]
+    assert adaptor.backtrace()['unwinder'] == 'frame_pointer'
+
+class DirectAdaptor(CountingAdaptor):
+    # a local process whose memory has a breakpoint's int3 at 0x1004, which
+    # the debugger hides
+    def __init__(self):
+        super(DirectAdaptor, self).__init__()
+        self.memory_cache_config = None
+        self.sites = [0x1004]
+        self.direct_reads = []
+        adaptor = self
+        class Direct(object):
+            usable = True
+            def read(self, address, length):
+                adaptor.direct_reads.append(address)
+                return bytes(bytearray(0xcc if a == 0x1004 else 0x90 for a in range(address, address + length)))
+        self.direct = Direct()
+
+    def _process_memory(self, target_id=0):
+        return self.direct
+
+    def _breakpoint_sites(self, target_id=0):
+        return self.sites
+
+    def _read_memory(self, address, length, target_id=0):
+        return b'\x90' * length
+
+def test_direct_memory_breakpoints():
+    adaptor = DirectAdaptor()
+    assert adaptor.read_memory(0x1000, 4) == b'\x90' * 4
+    assert adaptor.direct_reads == [0x1000]
+
+    # reads that overlap the breakpoint go through the debugger
+    assert adaptor.read_memory(0x1000, 8) == b'\x90' * 8
+    assert adaptor.read_memory(0x1006, 2) == b'\x90' * 2
+    assert adaptor.read_memory(0x1008, 2) == b'\x90' * 2
+    assert adaptor.direct_reads == [0x1000, 0x1008]
+
+    # nothing is read directly if the breakpoints aren't known
+    adaptor.sites = None
+    adaptor.invalidate()
+    adaptor.read_memory(0x2000, 4)
+    assert adaptor.direct_reads == [0x1000, 0x1008]
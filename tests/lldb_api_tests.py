@@ -80,6 +80,26 @@ try:
         assert t["state"] == "stopped"
         process.Destroy()
 
+    def test_event_pump():
+        adaptor.host.SetAsync(True)
+        adaptor.start_event_pump()
+        try:
+            listener = Mock()
+            adaptor.add_listener(listener)
+            process = target.LaunchSimple(None, None, os.getcwd())
+            for i in range(50):
+                if listener.called:
+                    break
+                time.sleep(0.1)
+            assert listener.called
+            assert adaptor.state() == "stopped"
+            assert 'breakpoint' in adaptor.target()['stop_reason']
+            adaptor.remove_listener(listener)
+            process.Destroy()
+        finally:
+            adaptor.stop_event_pump()
+            adaptor.host.SetAsync(False)
+
     def test_registers():
         process = target.LaunchSimple(None, None, os.getcwd())
         regs = adaptor.registers()
@@ -88,6 +108,17 @@ try:
         assert regs['rip'] != 0
         process.Destroy()
 
+    def test_registers_categories():
+        process = target.LaunchSimple(None, None, os.getcwd())
+        regs = adaptor.registers(categories=['general'])
+        assert regs['rip'] != 0
+        assert 'xmm0' not in regs
+        regs = adaptor.registers(registers=['rip'], categories=['sse'])
+        assert 'rip' in regs
+        assert 'xmm0' in regs
+        assert 'rax' not in regs
+        process.Destroy()
+
     def test_stack_pointer():
         process = target.LaunchSimple(None, None, os.getcwd())
         sp = adaptor.stack_pointer()
@@ -100,6 +131,16 @@ try:
         assert pc != 0
         process.Destroy()
 
+    def test_context():
+        process = target.LaunchSimple(None, None, os.getcwd())
+        regs = adaptor.registers(registers=['pc', 'sp', 'fp'])
+        context = adaptor.context()
+        assert context['pc'] == regs['rip']
+        assert context['sp'] == regs['rsp']
+        assert context['fp'] == regs['rbp']
+        assert context['thread_id'] != 0
+        process.Destroy()
+
     def test_memory():
         process = target.LaunchSimple(None, None, os.getcwd())
         regs = adaptor.registers()
@@ -107,6 +148,16 @@ try:
         assert len(mem) == 0x40
         process.Destroy()
 
+    def test_memory_map():
+        process = target.LaunchSimple(None, None, os.getcwd())
+        regions = adaptor.memory_map()
+        context = adaptor.context()
+        types = [r['type'] for r in regions if r['start'] <= context['pc'] < r['end']]
+        assert types == ['module']
+        types = [r['type'] for r in regions if r['start'] <= context['sp'] < r['end']]
+        assert types == ['stack']
+        process.Destroy()
+
     def test_stack():
         process = target.LaunchSimple(None, None, os.getcwd())
         stack = adaptor.stack(length=0x40)
@@ -119,6 +170,39 @@ try:
         assert len(output) > 0
         process.Destroy()
 
+    def test_instructions():
+        process = target.LaunchSimple(None, None, os.getcwd())
+        regs = adaptor.registers()
+        records = adaptor.instructions(count=0x20)
+        assert len(records) == 0x20
+        assert records[0]['address'] == regs['rip']
+        assert records[1]['address'] == records[0]['address'] + records[0]['size']
+        assert len(records[0]['bytes']) == records[0]['size'] * 2
+        calls = [r for r in records if r['mnemonic'].startswith('call')]
+        assert len(calls) > 0 and calls[0]['target'] is not None
+        process.Destroy()
+
+    def test_function_cfg():
+        process = target.LaunchSimple(None, None, os.getcwd())
+        regs = adaptor.registers()
+        cfg = adaptor.function_cfg()
+        assert cfg['function']['name'] == 'main'
+        assert cfg['blocks'][0]['start'] == regs['rip']
+        assert len(cfg['edges']) > 0
+        starts = set(b['start'] for b in cfg['blocks'])
+        assert all(e['from'] in starts and e['to'] in starts for e in cfg['edges'])
+        process.Destroy()
+
+    def test_backtrace():
+        process = target.LaunchSimple(None, None, os.getcwd())
+        regs = adaptor.registers()
+        bt = adaptor.backtrace()
+        assert bt['unwinder'] == 'debugger'
+        assert bt['frames'][0]['pc'] == regs['rip']
+        assert bt['frames'][0]['function'] == 'main'
+        assert len(adaptor.backtrace(depth=1)['frames']) == 1
+        process.Destroy()
+
     def test_command():
         process = target.LaunchSimple(None, None, os.getcwd())
         output = adaptor.command("reg read")
@@ -147,6 +231,38 @@ try:
         assert 'inferior' in list(output[-1])[-1]
         process.Destroy()
 
+    def test_dereference_many():
+        process = target.LaunchSimple(None, None, os.getcwd())
+        regs = adaptor.registers()
+        chains = adaptor.dereference_many(pointers=[regs['rip'], regs['rsp'], regs['rip']])
+        assert chains[0] == adaptor.dereference(regs['rip'])
+        assert chains[1] == adaptor.dereference(regs['rsp'])
+        assert chains[2] == chains[0]
+        chains = adaptor.dereference_many(address=regs['rsp'], count=4)
+        assert len(chains) == 4
+        process.Destroy()
+
+    def test_symbolicate():
+        process = target.LaunchSimple(None, None, os.getcwd())
+        regs = adaptor.registers()
+        symbols = adaptor.symbolicate([regs['rip'], regs['rip'] + 1, 0])
+        assert symbols[0]['symbol'] == 'main'
+        assert symbols[0]['offset'] == 0
+        assert symbols[0]['module'].endswith('inferior')
+        assert symbols[1]['offset'] == 1
+        assert symbols[2] is None
+        process.Destroy()
+
+    def test_classify_pointers():
+        process = target.LaunchSimple(None, None, os.getcwd())
+        regs = adaptor.registers()
+        classes = adaptor.classify_pointers(pointers=[regs['rip'], regs['rsp'], 0])
+        assert classes[0]['class'] == 'code'
+        assert classes[0]['symbol'] == 'main + 0x0'
+        assert classes[1]['class'] == 'stack'
+        assert classes[2]['class'] == 'invalid'
+        process.Destroy()
+
     def test_breakpoints():
         process = target.LaunchSimple(None, None, os.getcwd())
         bps = adaptor.breakpoints()
@@ -0,0 +1,61 @@
+"""
+Tests for capturing API traffic and replaying it.
+"""
+
+import os
+import json
+import tempfile
+
+from nose.tools import *
+
+import voltron
+from voltron.core import Capture
+from voltron.plugin import *
+from voltron.api import *
+
+path = None
+
+def setup():
+    global path
+    voltron.setup_env()
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    os.unlink(path)
+
+    capture = Capture(path)
+    req = str(api_request('version'))
+    capture.response(capture.request(req), '{"type": "response", "status": "success", "data": {"api_version": 1.0, "host_version": "gdb"}}')
+    req = str(api_request('registers'))
+    capture.response(capture.request(req), '{"type": "response", "status": "success", "data": {"registers": {"rip": 1}}}')
+    capture.stop()
+    capture.response(capture.request(req), '{"type": "response", "status": "success", "data": {"registers": {"rip": 2}}}')
+    capture.response(capture.request(req), '{"type": "response", "status": "success", "data": {"registers": {"rip": 3}}}')
+    capture.stop()
+    capture.close()
+
+def teardown():
+    os.unlink(path)
+
+def test_capture():
+    lines = [json.loads(l) for l in open(path)]
+    assert lines[0][:2] == ['voltron-capture', Capture.version]
+    assert [l[1] for l in lines[1:]] == ['q', 'r', 'q', 'r', 's', 'q', 'r', 'q', 'r', 's']
+    assert lines[1][2] == lines[2][2]
+
+def test_replay():
+    adaptor = debugger_adaptor('replay', path)
+    assert adaptor.num_stops == 2
+    assert adaptor.version() == 'gdb'
+
+    # requests are matched regardless of how default fields were specified
+    req = api_request('registers', registers=[])
+    assert json.loads(adaptor.response(req)[1])['data']['registers']['rip'] == 1
+    adaptor.next_stop()
+    assert json.loads(adaptor.response(req)[1])['data']['registers']['rip'] == 2
+    assert json.loads(adaptor.response(req)[1])['data']['registers']['rip'] == 3
+    assert json.loads(adaptor.response(req)[1])['data']['registers']['rip'] == 3
+
+    # the last epoch has no requests, so fall back to the previous one
+    adaptor.next_stop()
+    assert json.loads(adaptor.response(req)[1])['data']['registers']['rip'] == 2
+    assert adaptor.response(api_request('stack', length=1)) == None
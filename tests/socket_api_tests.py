@@ -194,6 +194,152 @@ def test_frontend_registers():
     assert res.is_success
     assert res.registers == registers_response
 
+def test_frontend_registers_vectors():
+    adaptor.registers = Mock(return_value=dict(registers_response, zmm0=bytearray(range(64))))
+    try:
+        req = api_request('registers', categories=['avx512'])
+        res = client.send_request(req)
+    finally:
+        adaptor.registers = Mock(return_value=registers_response)
+    assert res.is_success
+    assert res.registers == registers_response
+    assert res.vector('zmm0') == bytes(bytearray(range(64)))
+
+def test_backend_context():
+    res = api_request('context').dispatch()
+    assert res.is_success
+    assert res.pc == context_response['pc']
+    assert res.thread_id == context_response['thread_id']
+
+def test_direct_context():
+    data = make_direct_request(json.dumps(
+        {
+            "type":         "request",
+            "request":      "context"
+        }
+    ))
+    res = api_response('context', data=data)
+    assert res.is_success
+    assert res.sp == context_response['sp']
+    assert res.fp == context_response['fp']
+
+def test_frontend_context():
+    req = api_request('context')
+    res = client.send_request(req)
+    assert res.is_success
+    assert res.pc == context_response['pc']
+
+def test_backend_dereference_many():
+    res = api_request('dereference_many', pointers=[0x1000, 0x2000]).dispatch()
+    assert res.is_success
+    assert res.chains == dereference_many_response
+    assert res.classes == classify_pointers_response
+    res = api_request('dereference_many', address=0x1000).dispatch()
+    assert res.is_error
+
+def test_direct_dereference_many():
+    data = make_direct_request(json.dumps(
+        {
+            "type":         "request",
+            "request":      "dereference_many",
+            "data": {
+                "address":  0x1000,
+                "count":    2
+            }
+        }
+    ))
+    res = api_response('dereference_many', data=data)
+    assert res.is_success
+    assert res.chains == dereference_many_response
+
+def test_frontend_dereference_many():
+    req = api_request('dereference_many', pointers=[0x1000, 0x2000])
+    res = client.send_request(req)
+    assert res.is_success
+    assert res.chains[0][-1] == ['symbol', 'start + 0x1']
+    assert res.classes[1]['class'] == 'code'
+
+def test_backend_symbolicate():
+    res = api_request('symbolicate', addresses=[0x100000d20, 0]).dispatch()
+    assert res.is_success
+    assert res.symbols == symbolicate_response
+
+def test_direct_symbolicate():
+    data = make_direct_request(json.dumps(
+        {
+            "type":         "request",
+            "request":      "symbolicate",
+            "data": {
+                "addresses": [4294970656, 0]
+            }
+        }
+    ))
+    res = api_response('symbolicate', data=data)
+    assert res.is_success
+    assert res.symbols == symbolicate_response
+
+def test_frontend_symbolicate():
+    req = api_request('symbolicate', addresses=[0x100000d20, 0])
+    res = client.send_request(req)
+    assert res.is_success
+    assert res.symbols[0]['symbol'] == 'main'
+    assert res.symbols[1] is None
+
+def test_frontend_large_request():
+    # requests bigger than a single read arrive whole
+    addresses = list(range(0x7fff00000000, 0x7fff00000000 + 8 * 20000, 8))
+    req = api_request('symbolicate', addresses=addresses)
+    res = client.send_request(req)
+    assert res.is_success
+    assert voltron.debugger.symbolicate.call_args[1]['addresses'] == addresses
+
+def test_direct_request_framing():
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(voltron.env.voltron_dir.sock.path)
+    sock.settimeout(5)
+    def response():
+        data = b''
+        while not data.endswith(b'\n'):
+            data += sock.recv(0xFFFF)
+        return api_response('version', data=data.decode('UTF-8'))
+    request = json.dumps({"type": "request", "request": "version"}).encode('UTF-8')
+    try:
+        # requests without a newline are answered as soon as they're whole
+        start = time.time()
+        sock.sendall(request)
+        assert response().host_version == 'lldb-something'
+        assert time.time() - start < 0.5
+
+        # and requests can arrive in pieces
+        sock.sendall(request[:10])
+        time.sleep(0.1)
+        sock.sendall(request[10:] + b'\n')
+        assert response().host_version == 'lldb-something'
+    finally:
+        sock.close()
+
+def test_backend_memory_map():
+    res = api_request('memory_map').dispatch()
+    assert res.is_success
+    assert res.regions == memory_map_response
+
+def test_direct_memory_map():
+    data = make_direct_request(json.dumps(
+        {
+            "type":         "request",
+            "request":      "memory_map"
+        }
+    ))
+    res = api_response('memory_map', data=data)
+    assert res.is_success
+    assert res.regions == memory_map_response
+
+def test_frontend_memory_map():
+    req = api_request('memory_map')
+    res = client.send_request(req)
+    assert res.is_success
+    assert res.regions[1]['type'] == 'stack'
+
 def test_backend_memory():
     res = api_request('memory', address=0x1000, length=0x40).dispatch()
     assert res.is_success
@@ -295,6 +441,134 @@ def test_frontend_disassemble():
     assert res.is_success
     assert res.disassembly == disassemble_response
 
+def test_backend_disassemble_structured():
+    res = api_request('disassemble', count=2, structured=True).dispatch()
+    assert res.is_success
+    assert res.instructions == instructions_response
+    assert res.disassembly == None
+    res = api_request('disassemble', count=2, structured=True, text=True).dispatch()
+    assert res.disassembly.split('\n')[1] == '   0x100000d21:  callq   0x100000ea0  ; strcmp + 0x0'
+
+def test_direct_disassemble_structured():
+    data = make_direct_request(json.dumps(
+        {
+            "type":         "request",
+            "request":      "disassemble",
+            "data": {"count": 2, "structured": True}
+        }
+    ))
+    res = api_response('disassemble', data=data)
+    assert res.is_success
+    assert res.instructions == instructions_response
+
+def test_frontend_disassemble_structured():
+    req = api_request('disassemble', count=2, structured=True)
+    res = client.send_request(req)
+    assert res.is_success
+    assert res.instructions == instructions_response
+
+def test_backend_disassemble_window():
+    res = api_request('disassemble_window', offset=-1, count=2).dispatch()
+    assert res.is_success
+    assert res.instructions == instructions_response
+    assert res.function == disassembly_window_response['function']
+
+def test_direct_disassemble_window():
+    data = make_direct_request(json.dumps(
+        {
+            "type":         "request",
+            "request":      "disassemble_window",
+            "data": {"offset": -1, "count": 2}
+        }
+    ))
+    res = api_response('disassemble_window', data=data)
+    assert res.is_success
+    assert res.instructions == instructions_response
+
+def test_frontend_disassemble_window():
+    req = api_request('disassemble_window', offset=-1, count=2)
+    res = client.send_request(req)
+    assert res.is_success
+    assert res.address == disassembly_window_response['address']
+    assert res.instructions == instructions_response
+
+def test_backend_function_cfg():
+    res = api_request('function_cfg').dispatch()
+    assert res.is_success
+    assert res.blocks == function_cfg_response['blocks']
+    assert res.function == function_cfg_response['function']
+
+def test_direct_function_cfg():
+    data = make_direct_request(json.dumps(
+        {
+            "type":         "request",
+            "request":      "function_cfg",
+            "data": {}
+        }
+    ))
+    res = api_response('function_cfg', data=data)
+    assert res.is_success
+    assert res.blocks == function_cfg_response['blocks']
+
+def test_frontend_function_cfg():
+    req = api_request('function_cfg')
+    res = client.send_request(req)
+    assert res.is_success
+    assert res.address == function_cfg_response['address']
+    assert res.blocks == function_cfg_response['blocks']
+
+def test_backend_xrefs():
+    res = api_request('xrefs', address=4294970656).dispatch()
+    assert res.is_success
+    assert res.xrefs == xrefs_response['xrefs']
+    assert res.pending == []
+    assert res.unavailable == []
+
+def test_direct_xrefs():
+    data = make_direct_request(json.dumps(
+        {
+            "type":         "request",
+            "request":      "xrefs",
+            "data": {
+                "address":  4294970656
+            }
+        }
+    ))
+    res = api_response('xrefs', data=data)
+    assert res.is_success
+    assert res.xrefs == xrefs_response['xrefs']
+
+def test_frontend_xrefs():
+    req = api_request('xrefs', address=4294970656, types=['call'])
+    res = client.send_request(req)
+    assert res.is_success
+    assert res.xrefs == xrefs_response['xrefs']
+
+def test_backend_backtrace():
+    res = api_request('backtrace', depth=8).dispatch()
+    assert res.is_success
+    assert res.frames == backtrace_response['frames']
+    assert res.truncated == False
+
+def test_direct_backtrace():
+    data = make_direct_request(json.dumps(
+        {
+            "type":         "request",
+            "request":      "backtrace",
+            "data": {}
+        }
+    ))
+    res = api_response('backtrace', data=data)
+    assert res.is_success
+    assert res.frames == backtrace_response['frames']
+
+def test_frontend_backtrace():
+    req = api_request('backtrace')
+    res = client.send_request(req)
+    assert res.is_success
+    assert res.frames == backtrace_response['frames']
+    assert res.unwinder == 'debugger'
+
 def test_backend_breakpoints():
     res = api_request('breakpoints').dispatch()
     assert res.is_success
@@ -26,12 +26,15 @@ def setup_env():
             config=ConfigFile('config', defaults=File('config/default.cfg', parent=PackageDirectory())),
             sock=File('sock'),
             history=File('history'),
+            cache=Directory('cache'),
             user_plugins=PluginDirectory('plugins')
         ),
         pkg_plugins=PluginDirectory('plugins', parent=PackageDirectory())
     )
     config = env.config
 
+    voltron.api.set_json_backend(config['general']['json_backend'])
+
     # create shared instance of plugin manager
     voltron.plugin.pm = voltron.plugin.PluginManager()
 
@@ -8,6 +8,8 @@ import logging.config
 import json
 import inspect
 import base64
+import binascii
+import copy
 
 from collections import defaultdict
 
@@ -20,6 +22,69 @@ log = logging.getLogger('api')
 
 version = 1.0
 
+# placeholder for base64 encoded fields in the JSON built by encode_parts()
+_buffer_marker = 'voltron-buffer-' + binascii.hexlify(os.urandom(8)).decode('ascii') + '-'
+
+#
+# JSON backends, in order of preference. Each is a function that imports the
+# library and returns (loads, dumps) functions, where `dumps` returns a string.
+#
+
+def _orjson_backend():
+    import orjson
+    def dumps(obj):
+        try:
+            return orjson.dumps(obj).decode('UTF-8')
+        except TypeError:
+            # orjson can't serialise integers wider than 64 bits (e.g. vector
+            # registers), so fall back to the stdlib for those
+            return json.dumps(obj)
+    return orjson.loads, dumps
+
+def _ujson_backend():
+    import ujson
+    def dumps(obj):
+        try:
+            return ujson.dumps(obj)
+        except OverflowError:
+            return json.dumps(obj)
+    return ujson.loads, dumps
+
+def _stdlib_backend():
+    return json.loads, json.dumps
+
+json_backends = [
+    ('orjson', _orjson_backend),
+    ('ujson', _ujson_backend),
+    ('json', _stdlib_backend)
+]
+
+json_backend = None
+json_loads = None
+json_dumps = None
+
+def set_json_backend(name=None):
+    """
+    Select the JSON library used to encode and decode API messages.
+
+    `name` is the name of one of the backends in `json_backends`. If it isn't
+    specified, or it can't be imported, the first one that can be imported is
+    used. The stdlib `json` module is always available.
+    """
+    global json_backend, json_loads, json_dumps
+    backends = sorted(json_backends, key=lambda b: b[0] != name)
+    for backend_name, backend in backends:
+        try:
+            json_loads, json_dumps = backend()
+            json_backend = backend_name
+            break
+        except ImportError:
+            if backend_name == name:
+                log.debug("JSON backend {} is not available".format(name))
+    log.debug("Using JSON backend: {}".format(json_backend))
+
+set_json_backend()
+
 
 class InvalidRequestTypeException(Exception):
     """
@@ -124,10 +189,174 @@ def client_side(func):
     return inner
 
 
-class APIMessage(object):
+class APIMessageMeta(type):
+    """
+    Metaclass for API messages.
+
+    The fields named in a message class's `_top_fields` and `_fields` (and
+    any extra attributes named in its `__slots__`) are stored in slots rather
+    than the instance dict, which is only used for other attributes set on a
+    message, and any values assigned to them in the class body
+    become that class's defaults. The functions used to initialise, decode,
+    encode and validate messages are built once per class by `_compile()`,
+    so none of that has to be worked out again for each message.
+
+    Data fields of messages that are decoded from JSON are materialised
+    lazily, the first time they are accessed. See `APIMessage.__getattr__()`.
+    """
+    def __new__(mcs, name, bases, ns):
+        def lookup(attr, default):
+            if attr in ns:
+                return ns[attr]
+            for base in bases:
+                if hasattr(base, attr):
+                    return getattr(base, attr)
+            return default
+
+        inherited = set()
+        defaults = {}
+        for base in reversed(bases):
+            inherited.update(getattr(base, '_slot_names', ()))
+            defaults.update(getattr(base, '_defaults', {}))
+
+        names = list(lookup('_top_fields', [])) + list(lookup('_fields', {})) + list(ns.get('__slots__', ()))
+
+        # class attributes can't share a name with a slot, so field values in
+        # the class body are moved into the defaults
+        for n in inherited.union(names):
+            if n in ns:
+                defaults[n] = ns.pop(n)
+
+        slots = []
+        for n in names:
+            if n not in inherited and n not in slots:
+                slots.append(n)
+        ns['__slots__'] = tuple(slots)
+        if not any(isinstance(base, APIMessageMeta) for base in bases):
+            # the root message class also gets an instance dict, so other
+            # attributes (like a view's formatted output) can still be set
+            ns['__slots__'] += ('__dict__',)
+        ns['_defaults'] = defaults
+
+        cls = super(APIMessageMeta, mcs).__new__(mcs, name, bases, ns)
+        cls._slot_names = frozenset(inherited.union(slots))
+        cls._compile()
+        return cls
+
+    def _compile(cls, **defaults):
+        """
+        Build the functions used by this class's instances to initialise,
+        decode, encode and validate themselves.
+
+        Any keyword arguments are new defaults for fields. This is called when
+        the class is created, and again by `APIPlugin.initialise()` to set the
+        `request` field of the plugin's request class.
+        """
+        cls._defaults = dict(cls._defaults, **defaults)
+        slot_names = cls._slot_names
+        values = dict.fromkeys(slot_names)
+        values.update((k, v) for k, v in cls._defaults.items() if k in slot_names)
+        static = tuple((k, v) for k, v in values.items() if not isinstance(v, (list, dict, set)))
+        mutable = tuple((k, v) for k, v in values.items() if isinstance(v, (list, dict, set)))
+        top_fields = tuple(cls._top_fields)
+        encode_fields = frozenset(cls._encode_fields)
+        data_fields = tuple(f for f in cls._fields if f not in encode_fields)
+        data_encode_fields = tuple(f for f in cls._fields if f in encode_fields)
+        required = top_fields + tuple(f for f in cls._fields if cls._fields[f])
+
+        def init_fields(self, raw=None):
+            # fields present in the raw data are left unset until accessed
+            for name, value in static:
+                if not raw or name not in raw:
+                    setattr(self, name, value)
+            for name, value in mutable:
+                if not raw or name not in raw:
+                    # don't share mutable defaults between instances
+                    setattr(self, name, copy.copy(value))
+
+        def set_field(self, name, value):
+            if name in slot_names:
+                setattr(self, name, value)
+            else:
+                # keep unknown fields around in case someone asks for them
+                if self._extra is None:
+                    self._extra = {}
+                self._extra[name] = value
+
+        def decode(self, d):
+            for key, value in d.items():
+                if key == 'data':
+                    self._raw = value
+                else:
+                    set_field(self, key, value)
+
+        def encode(self):
+            d = {field: getattr(self, field) for field in top_fields}
+            data = {field: getattr(self, field) for field in data_fields}
+            for field in data_encode_fields:
+                # base64 encode the field for transmission
+                value = getattr(self, field)
+                data[field] = base64.b64encode(value).decode('UTF-8') if value is not None else None
+            d['data'] = data
+            return json_dumps(d)
+
+        def encode_parts(self):
+            if not data_encode_fields:
+                return [encode(self).encode('UTF-8')]
+
+            # encode everything else with a placeholder for each encoded field,
+            # then splice the base64 encoded buffers in at the placeholders
+            # rather than copying them into the JSON string
+            d = {field: getattr(self, field) for field in top_fields}
+            data = {field: getattr(self, field) for field in data_fields}
+            buffers = []
+            for field in data_encode_fields:
+                value = getattr(self, field)
+                if value is not None:
+                    data[field] = _buffer_marker + field
+                    buffers.append((field, value))
+                else:
+                    data[field] = None
+            d['data'] = data
+            msg = json_dumps(d).encode('UTF-8')
+
+            markers = sorted((msg.index((_buffer_marker + field).encode('UTF-8')), field, value)
+                             for field, value in buffers)
+            parts = []
+            pos = 0
+            view = memoryview(msg)
+            for i, field, value in markers:
+                parts.append(view[pos:i])
+                parts.append(base64.b64encode(value))
+                pos = i + len(_buffer_marker) + len(field)
+            parts.append(view[pos:])
+            return parts
+
+        def validate(self):
+            for field in required:
+                if getattr(self, field) is None:
+                    raise MissingFieldError(field)
+
+        cls._encoded = encode_fields
+        cls._init_fields = init_fields
+        cls._set_field = set_field
+        cls._decode = decode
+        cls._encode = encode
+        cls._encode_parts = encode_parts
+        cls._validate = validate
+
+
+APIMessageBase = APIMessageMeta(str('APIMessageBase'), (object,), {'_top_fields': [], '_fields': {}, '_encode_fields': []})
+
+
+class APIMessage(APIMessageBase):
     """
     Top-level API message class.
+
+    See APIMessageMeta for how the fields are stored.
     """
+    __slots__ = ('_extra', '_raw')
+
     _top_fields = ['type']
     _fields = {}
     _encode_fields = []
@@ -135,59 +364,68 @@ class APIMessage(object):
     type = None
 
     def __init__(self, data=None, *args, **kwargs):
-        # process any data that was passed in
+        # process any data that was passed in, either a JSON string or a dict
+        # that has already been parsed
         if data:
-            try:
-                d = json.loads(data)
-            except ValueError:
-                raise InvalidMessageException()
-            for key in d:
-                if key == 'data':
-                    for dkey in d['data']:
-                        # base64 decode the field if necessary
-                        if dkey in self._encode_fields:
-                            setattr(self, str(dkey), base64.b64decode(d['data'][dkey]))
-                        else:
-                            setattr(self, str(dkey), d['data'][dkey])
-
-                else:
-                    setattr(self, str(key), d[key])
+            if isinstance(data, dict):
+                d = data
+            else:
+                try:
+                    d = json_loads(data)
+                except ValueError:
+                    raise InvalidMessageException()
+                if not isinstance(d, dict):
+                    raise InvalidMessageException()
+            raw = d.get('data')
+            self._init_fields(raw if isinstance(raw, dict) else None)
+            self._decode(d)
+        else:
+            self._init_fields()
 
         # any other kwargs are treated as field values
         for field in kwargs:
-            setattr(self, field, kwargs[field])
+            self._set_field(field, kwargs[field])
 
     def __str__(self):
         """
         Return a string containing the API message properties in JSON format.
         """
-        d = {}
-        # set values of top-level fields
-        for field in self._top_fields:
-            if hasattr(self, field):
-                d[field] = getattr(self, field)
-
-        # set values of data fields
-        d['data'] = {}
-        for field in self._fields:
-            if hasattr(self, field):
-                # base64 encode the field for transmission if necessary
-                if field in self._encode_fields:
-                    d['data'][field] = base64.b64encode(bytes(getattr(self, field))).decode('UTF-8')
-                else:
-                    d['data'][field] = getattr(self, field)
+        return self._encode()
 
-        return json.dumps(d)
+    def encode_parts(self):
+        """
+        Return the message in JSON format (as for `__str__`) as a list of
+        UTF-8 encoded bytes-like objects that can be written out in order,
+        e.g. with `socket.sendmsg()`.
+
+        Base64 encoded fields are returned as their own parts, so large
+        buffers aren't copied into the JSON string.
+        """
+        return self._encode_parts()
 
     def __getattr__(self, name):
         """
         Attribute accessor.
 
-        If a defined field is requested that doesn't have a value set,
-        return None.
+        This is only called for attributes that don't have a value yet. If the
+        field was in the data the message was decoded from, it's decoded now
+        and stored. If an unknown field was received, return its value,
+        otherwise return None.
         """
-        if name in self._fields:
+        if name in ('_raw', '_extra'):
             return None
+        raw = self._raw
+        if raw and name in raw:
+            value = raw[name]
+            # base64 decode the field if necessary
+            if name in self._encoded and value is not None:
+                # slices of a memoryview don't copy the data
+                value = memoryview(base64.b64decode(value))
+            if name in self._slot_names:
+                setattr(self, name, value)
+            return value
+        if self._extra and name in self._extra:
+            return self._extra[name]
 
     def validate(self):
         """
@@ -195,10 +433,7 @@ class APIMessage(object):
 
         Ensure all the required fields are present and not None.
         """
-        required_fields = list(filter(lambda x: self._fields[x], self._fields.keys()))
-        for field in (self._top_fields + required_fields):
-            if not hasattr(self, field) or hasattr(self, field) and getattr(self, field) == None:
-                raise MissingFieldError(field)
+        self._validate()
 
 class APIRequest(APIMessage):
     """
@@ -255,7 +490,7 @@ class APIResponse(APIMessage):
                 str(self.__class__),
                 self.is_success,
                 self.is_error,
-                {f: getattr(self, f) for f in self._top_fields + self._fields.keys()}
+                {f: getattr(self, f) for f in self._top_fields + list(self._fields)}
         )
 
 class APISuccessResponse(APIResponse):
@@ -0,0 +1,262 @@
+from __future__ import print_function
+
+import os
+import time
+import shlex
+import logging
+import argparse
+import threading
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+from scruffy import Config
+
+import voltron
+from .core import *
+from .view import *
+
+log = logging.getLogger('main')
+
+
+def percentile(values, pct):
+    """
+    Return the `pct`th percentile of `values` using the nearest-rank method.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    rank = int(round(pct / 100.0 * len(values) + 0.5)) - 1
+    return values[max(0, min(rank, len(values) - 1))]
+
+
+def host_cpu_time(pid):
+    """
+    Return the CPU time (user + system, in seconds) consumed so far by the
+    process `pid`, or None if it can't be determined.
+    """
+    try:
+        with open('/proc/{}/stat'.format(pid)) as f:
+            # the command name can contain spaces, so split after it
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / float(os.sysconf('SC_CLK_TCK'))
+    except Exception:
+        pass
+    try:
+        import psutil
+        times = psutil.Process(pid).cpu_times()
+        return times.user + times.system
+    except Exception:
+        return None
+
+
+def headless(view_class, height, width):
+    """
+    Return a subclass of `view_class` that does all of its normal requests and
+    formatting each time it renders, but never touches the terminal.
+    """
+    class HeadlessView(view_class):
+        def init_window(self):
+            pass
+
+        def cleanup(self):
+            pass
+
+        def clear(self):
+            pass
+
+        def window_size(self):
+            return (height, width)
+
+        def do_render(self, error=None):
+            if error:
+                self.body = self.colour(error, 'red')
+            self.fmt_body = self.body
+            self.pad_body()
+            self.truncate_body()
+            if self.config.header.show:
+                self.format_header_footer(self.config.header)
+            if self.config.footer.show:
+                self.format_header_footer(self.config.footer)
+
+    HeadlessView.__name__ = 'Headless' + view_class.__name__
+    return HeadlessView
+
+
+class SimulatedView(threading.Thread):
+    """
+    Drives one headless view. Like VoltronView.run(), it waits for the
+    debugger to stop and then renders, but it reports its timings to the
+    benchmark instead of drawing anything.
+    """
+    def __init__(self, view, results, timeout=None):
+        super(SimulatedView, self).__init__()
+        self.daemon = True
+        self.view = view
+        self.results = results
+        self.timeout = timeout
+        self.ready = threading.Event()
+        self.running = True
+        self.error = None
+
+        # the stop the benchmark is measuring, set before it triggers the
+        # stop, so results that come in late for an earlier stop can be told
+        # apart
+        self.stop = 0
+
+    def run(self):
+        try:
+            self.view.client.connect()
+
+            # views render once when they start up, don't count that one
+            self.view.render()
+
+            while self.running:
+                self.ready.set()
+                res = self.view.client.perform_request('wait', timeout=self.timeout)
+                woke = time.time()
+                stop = self.stop
+                self.ready.clear()
+                if res.is_error:
+                    self.results.put((self, stop, woke, None))
+                    continue
+                if res.state == 'stopped':
+                    self.view.render()
+                self.results.put((self, stop, woke, time.time()))
+        except Exception as e:
+            log.exception("Exception in simulated view {}".format(self.view.__class__.__name__))
+            self.error = e
+            self.ready.set()
+            self.results.put((self, self.stop, time.time(), None))
+
+
+class Bench(object):
+    """
+    Load generator that simulates a number of views attached to a running
+    debugger host, to measure how long it takes from the debugger stopping
+    until every view has rendered.
+    """
+    @classmethod
+    def configure_subparser(cls, subparsers):
+        sp = subparsers.add_parser('bench', help='simulate views against a running debugger host')
+        sp.set_defaults(func=Bench)
+        sp.add_argument('views', nargs='+', metavar='view', help=('view to simulate, with any view arguments '
+            'quoted along with it. e.g. register stack "memory -r rsp -d"'))
+        sp.add_argument('--count', '-n', type=int, default=1, help='number of each view to simulate (default 1)')
+        sp.add_argument('--stops', '-s', type=int, default=20, help='number of stops to measure (default 20)')
+        sp.add_argument('--command', '-c', action='store', default=None, help=('debugger command to execute through '
+            'the API to trigger each stop (e.g. "stepi"). if not given, stop the debugger yourself'))
+        sp.add_argument('--timeout', '-t', type=int, default=10, help='seconds to wait for each stop (default 10)')
+        sp.add_argument('--settle', type=float, default=0.05, help=('seconds to wait after all views are waiting '
+            'before triggering a stop (default 0.05)'))
+        sp.add_argument('--height', type=int, default=60, help='simulated view height (default 60)')
+        sp.add_argument('--width', type=int, default=200, help='simulated view width (default 200)')
+
+    def __init__(self, args={}, loaded_config={}):
+        self.args = args
+        self.loaded_config = loaded_config
+        self.pm = voltron.plugin.pm
+        self.results = queue.Queue()
+        self.client = Client()
+        self.sims = []
+
+        # parse the view specs with the same subparsers `voltron view` uses
+        parser = argparse.ArgumentParser(prog='voltron bench', add_help=False)
+        parser.register('action', 'parsers', AliasedSubParsersAction)
+        view_sp = parser.add_subparsers(dest='view')
+        for plugin in self.pm.view_plugins:
+            self.pm.view_plugins[plugin].view_class.configure_subparser(view_sp)
+
+        for spec in self.args.views:
+            view_args = parser.parse_args(shlex.split(spec))
+            view_class = headless(view_args.func, self.args.height, self.args.width)
+            for i in range(self.args.count):
+                # views modify their config in place, so each one gets a copy
+                config = Config(defaults=dict(self.loaded_config.items()))
+                view = view_class(args=argparse.Namespace(**vars(view_args)), loaded_config=config)
+                self.sims.append(SimulatedView(view, self.results, self.args.timeout))
+
+    def run(self):
+        self.client.connect()
+        res = self.client.perform_request('version')
+        pid = res.host_pid if res.is_success else None
+
+        print("Simulating {} views: {}".format(len(self.sims), ', '.join(self.args.views)))
+        for sim in self.sims:
+            sim.start()
+
+        latencies = []
+        missed = 0
+        cpu_start = host_cpu_time(pid) if pid else None
+        start = time.time()
+
+        for i in range(self.args.stops):
+            # make sure every view is sitting in a wait request before stopping
+            for sim in self.sims:
+                sim.ready.wait(self.args.timeout)
+            time.sleep(self.args.settle)
+
+            for sim in self.sims:
+                sim.stop = i
+            t = time.time()
+            if self.args.command:
+                res = self.client.perform_request('command', command=self.args.command)
+                if res.is_error:
+                    print("Failed to execute command: {}".format(res.message))
+                    break
+
+            woke, done = self.collect(i)
+            if len(done) < len(self.sims):
+                missed += 1
+                continue
+
+            if not self.args.command:
+                t = min(woke)
+            latencies.append(max(done) - t)
+            log.debug("Stop {}: {:.1f}ms".format(i, latencies[-1] * 1000))
+
+        elapsed = time.time() - start
+        cpu_end = host_cpu_time(pid) if pid else None
+
+        print("Stops:    {} measured, {} timed out".format(len(latencies), missed))
+        if latencies:
+            print("Latency:  p50 {:.1f}ms  p99 {:.1f}ms  max {:.1f}ms".format(percentile(latencies, 50) * 1000,
+                percentile(latencies, 99) * 1000, max(latencies) * 1000))
+        if cpu_start is not None and cpu_end is not None:
+            cpu = cpu_end - cpu_start
+            print("Host CPU: {:.2f}s ({:.1f}% of {:.2f}s)".format(cpu, 100 * cpu / elapsed, elapsed))
+        else:
+            print("Host CPU: n/a")
+
+    def collect(self, stop):
+        """
+        Collect a result from each view for stop number `stop`, waiting up to
+        the timeout for all of them. Results for earlier stops that come in
+        late are thrown away rather than being counted for this one.
+
+        Returns a list of the times the views woke and a list of the times
+        they finished rendering.
+        """
+        woke = []
+        done = []
+        deadline = time.time() + self.args.timeout
+        while len(woke) < len(self.sims):
+            try:
+                sim, s, w, d = self.results.get(timeout=max(deadline - time.time(), 0))
+            except queue.Empty:
+                break
+            if sim.error:
+                raise sim.error
+            if s != stop:
+                log.debug("Dropping late result for stop {}".format(s))
+                continue
+            woke.append(w)
+            if d is not None:
+                done.append(d)
+        return woke, done
+
+    def cleanup(self):
+        for sim in self.sims:
+            sim.running = False
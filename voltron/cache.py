@@ -0,0 +1,62 @@
+"""
+A persistent cache of things that are expensive to work out about a
+target's modules, like their symbol indexes, so they aren't worked out again
+in every debugging session.
+
+Entries are files stored under the cache directory (~/.voltron/cache) by the
+build ID of the module they're about (or some other hash that identifies the
+module's file) and a name for the kind of entry. Nothing in them depends on
+where a module is loaded, so they're rebased by whoever reads them.
+"""
+import os
+import logging
+import tempfile
+
+log = logging.getLogger('debugger')
+
+
+class DiskCache(object):
+    """
+    A directory of cache entries.
+
+    `path` is the path to the directory, which is created when the first
+    entry is written.
+    """
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+
+    def path_for(self, key, name):
+        """
+        Get the path to the file for an entry.
+
+        `key` is the build ID or hash of the module the entry is about
+        `name` is the kind of entry (e.g. "symbols")
+        """
+        return os.path.join(self.path, key[:2], key, name)
+
+    def exists(self, key, name):
+        return os.path.exists(self.path_for(key, name))
+
+    def write(self, key, name, data):
+        """
+        Store an entry. `data` is bytes, or a list of bytes-like objects that
+        are written one after the other.
+
+        The entry is written to a temporary file that is then renamed, so
+        other sessions never see a partially written entry.
+        """
+        path = self.path_for(key, name)
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.' + name)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in ([data] if isinstance(data, bytes) else data):
+                    f.write(chunk)
+            os.rename(tmp, path)
+        except Exception:
+            os.unlink(tmp)
+            raise
+        log.debug("Cached {} for {} in {}".format(name, key, path))
+        return path
@@ -6,7 +6,6 @@ import sys
 import lldb
 import rl
 import logging
-import threading
 from rl import completer, generator, completion
 
 import voltron
@@ -19,19 +18,6 @@ BANNER = "{version} (based on {lldb_version})"
 log = logging.getLogger('console')
 
 
-class EventListener(threading.Thread):
-    def __init__(self, debugger):
-        super(EventListener, self).__init__()
-        self.debugger = debugger
-
-    def run(self):
-        print("thing")
-        self.listener = self.debugger.GetListener()
-        event = lldb.SBEvent()
-        self.listener.WaitForEvent(10, event)
-        print(event)
-
-
 class Console(object):
     @classmethod
     def configure_subparser(cls, subparsers):
@@ -65,9 +51,8 @@ class Console(object):
         # set up lldb command interpreter
         self.ci = self.adaptor.host.GetCommandInterpreter()
 
-        # set up listener
-        self.listener = EventListener(self.debugger)
-        self.listener.start()
+        # track the target's state from lldb's events
+        self.adaptor.start_event_pump()
 
         # set up voltron server
         self.server = Server()
@@ -176,5 +161,6 @@ class Console(object):
         return self.res[state]
 
     def cleanup(self):
+        self.adaptor.stop_event_pump()
         self.server.stop()
 
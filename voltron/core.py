@@ -8,6 +8,7 @@ import threading
 import logging
 import logging.config
 import json
+import time
 import cherrypy
 
 import voltron
@@ -28,15 +29,88 @@ else:
     raise RuntimeError("Not sure what strings look like on python %d" %
                        sys.version_info.major)
 
+class Capture(object):
+    """
+    Append-only log of API traffic, used to record a debugging session so it
+    can be replayed later with `voltron replay`.
+
+    Each line of the file is a compact JSON array. The first is a header:
+
+        ["voltron-capture", 1, 1418870310.34]
+
+    (format name, format version, start time), and the rest are one of:
+
+        [0.512, "q", 12, "{...}"]   # request 12 was received
+        [0.513, "r", 12, "{...}"]   # the response to request 12 was sent
+        [3.201, "s"]                # the debugger stopped
+
+    Timestamps are in seconds since the start of the capture.
+    """
+    version = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.start = time.time()
+        self.file = open(path, 'a')
+        self.write(['voltron-capture', self.version, self.start])
+
+    def write(self, record):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self.lock:
+            if self.file:
+                self.file.write(line)
+
+    def elapsed(self):
+        return round(time.time() - self.start, 6)
+
+    def request(self, data):
+        """
+        Record an incoming request. Returns a sequence number to pass to
+        `response()` along with the response to this request.
+        """
+        with self.lock:
+            self.seq += 1
+            seq = self.seq
+        if isinstance(data, bytes):
+            data = data.decode('UTF-8')
+        self.write([self.elapsed(), 'q', seq, data])
+        return seq
+
+    def response(self, seq, data):
+        if isinstance(data, bytes):
+            data = data.decode('UTF-8')
+        self.write([self.elapsed(), 'r', seq, data])
+
+    def stop(self):
+        self.write([self.elapsed(), 's'])
+        with self.lock:
+            if self.file:
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+            self.file = None
+
+
 class Server(object):
     """
     Main server class instantiated by the debugger host. Responsible for
     controlling the background thread that communicates with clients, and
     handling requests forwarded from that thread.
+
+    If `capture` is specified (or the `server.capture` config option is set),
+    it's the path of a file to which all API traffic will be logged. See
+    `Capture`.
     """
-    def __init__(self):
+    def __init__(self, capture=None):
         self.clients = []
 
+        self.capture_path = capture or voltron.config['server']['capture']
+        self.capture = None
+
         self.d_thread = None
         self.t_thread = None
         self.h_thread = None
@@ -48,6 +122,10 @@ class Server(object):
         self.is_running = False
 
     def start(self):
+        if self.capture_path:
+            log.debug("Capturing API traffic to {}".format(self.capture_path))
+            self.capture = Capture(self.capture_path)
+            voltron.debugger.add_listener(self.capture.stop)
         listen = voltron.config['server']['listen']
         if listen['domain']:
             log.debug("Starting server thread for domain socket")
@@ -79,6 +157,10 @@ class Server(object):
         if self.h_thread:
             log.debug("Stopping HTTP server")
             self.h_thread.stop()
+        if self.capture:
+            voltron.debugger.remove_listener(self.capture.stop)
+            self.capture.close()
+            self.capture = None
         self.is_running = False
         log.debug("Finished stopping server threads")
 
@@ -91,6 +173,7 @@ class Server(object):
     def handle_request(self, data, client=None):
         req = None
         res = None
+        seq = self.capture.request(data) if self.capture else None
 
         #
         # preprocess the request to make sure the data and environment are OK
@@ -98,17 +181,19 @@ class Server(object):
 
         # make sure we have a debugger, or we're gonna have a bad time
         if voltron.debugger:
-            # parse incoming request with the top level APIRequest class so we can determine the request type
+            # parse the incoming request once so we can determine the request type
             try:
-                req = APIRequest(data=data)
+                d = json_loads(data)
+                if not isinstance(d, dict):
+                    raise InvalidMessageException()
             except Exception as e:
-                req = None
+                d = None
                 log.exception("Exception raised while parsing API request: {} {}".format(type(e), e))
 
-            if req:
-                # instantiate the request class
+            if d is not None:
+                # instantiate the request class from the data we already parsed
                 try:
-                    req = api_request(req.request, data=data)
+                    req = api_request(d.get('request'), data=d)
                 except Exception as e:
                     log.exception("Exception raised while creating API request: {} {}".format(type(e), e))
                     req = None
@@ -127,26 +212,33 @@ class Server(object):
             # dispatch the request and send the response
             if req and req.request == 'wait':
                 # wait requests get handled in a background thread
-                t = threading.Thread(target=self.dispatch_request, args=[req, client])
+                t = threading.Thread(target=self.dispatch_request, args=[req, client, seq])
                 t.start()
             else:
                 # everything else is handled on the main thread
-                return self.dispatch_request(req, client)
+                return self.dispatch_request(req, client, seq)
         else:
+            if self.capture:
+                self.capture.response(seq, str(res))
             if client:
                 # already got an error response and we have a client, send it
                 try:
-                    client.send_response(str(res))
+                    client.send_response(res)
                 except socket.error:
                     log.error("Client closed before we could respond")
             else:
                 return res
 
-    def dispatch_request(self, req, client=None):
+    def dispatch_request(self, req, client=None, seq=None):
         """
         Dispatch a request object.
+
+        `seq` is the capture sequence number assigned to the request by
+        `handle_request()`, if API traffic is being captured.
         """
         log.debug("Dispatching request: {}".format(str(req)))
+        if self.capture and seq is None:
+            seq = self.capture.request(str(req))
 
         # make sure it's valid
         res = None
@@ -164,13 +256,17 @@ class Server(object):
                 log.exception(msg)
                 res = APIGenericErrorResponse(msg)
 
-        log.debug("Response: {}".format(str(res)))
+        # logged lazily so big responses are only encoded if debug logging is on
+        log.debug("Response: %s", res)
+
+        if self.capture:
+            self.capture.response(seq, str(res))
 
         # send the response
         if client:
             log.debug("Client was passed to dispatch_request() - sending response")
             try:
-                client.send_response(str(res).encode('UTF-8'))
+                client.send_response(res)
             except socket.error:
                 log.error("Client closed before we could respond")
         else:
@@ -233,11 +329,10 @@ class ServerThread(threading.Thread):
                     running = False
                     break
                 else:
-                    # read the request from the client and dispatch it
-                    data = None
+                    # read the requests from the client and dispatch them
                     try:
-                        data = fd.recv_request()
-                        self.server.handle_request(data, fd)
+                        for data in fd.recv_requests():
+                            self.server.handle_request(data, fd)
                     except Exception as e:
                         log.exception("Exception raised while handling request: {} {}".format(type(e), str(e)))
                         self.purge_client(fd)
@@ -381,12 +476,13 @@ class Client(object):
         if not self.sock:
             raise NotConnectedError()
 
-        # send the request data to the server
+        # send the request data to the server, terminated with a newline so
+        # the server knows when it has all of it
         data = str(request)
         log.debug("Sending request: {}".format(data))
         while True:
             try:
-                res = self.sock.sendall(data.encode('UTF-8'))
+                res = self.sock.sendall(data.encode('UTF-8') + b'\n')
                 break
             except socket.error as e:
                 if e.errno == errno.EINTR:
@@ -399,38 +495,44 @@ class Client(object):
             self.sock = None
             raise SocketDisconnected("socket closed")
 
-        # receive response data
+        # receive response data, up to the newline that terminates it
+        chunks = []
         while True:
             try:
-                data = self.sock.recv(READ_MAX).decode('UTF-8')
-                break
+                chunk = self.sock.recv(READ_MAX)
             except socket.error as e:
                 if e.errno == errno.EINTR:
                     continue
                 else:
                     raise
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if chunk.endswith(b'\n'):
+                break
+        data = b''.join(chunks)
         if len(data) > 0:
-            log.debug('Client received message: ' + data)
+            log.debug("Client received message: %s", data)
 
             try:
                 # parse the response data
-                generic_response = APIResponse(data=data)
+                d = json_loads(data)
 
                 # if there's an error, return an error response
-                if generic_response.is_error:
-                    res = APIErrorResponse(data=data)
+                if d.get('status') == 'error':
+                    res = APIErrorResponse(data=d)
                 else:
                     # success; generate a proper response
                     plugin = voltron.plugin.pm.api_plugin_for_request(request.request)
                     if plugin and plugin.response_class:
                         # found a plugin for the request we sent, use its response type
-                        res = plugin.response_class(data=data)
+                        res = plugin.response_class(data=d)
                     else:
-                        # didn't find a plugin, just return the generic APIResponse we already generated
-                        res = generic_response
+                        # didn't find a plugin, just return a generic APIResponse
+                        res = APIResponse(data=d)
             except Exception as e:
                 log.exception('Exception parsing message: ' + str(e))
-                log.error('Invalid message: ' + data)
+                log.error('Invalid message: {}'.format(data))
         else:
             raise SocketDisconnected("socket closed")
 
@@ -483,6 +585,32 @@ class BaseSocket(object):
     def send(self, buf):
         self.sock.sendall(buf)
 
+    def send_parts(self, parts):
+        """
+        Send a list of bytes-like objects, using scatter/gather I/O where it's
+        available so they don't need to be joined first.
+        """
+        if not hasattr(self.sock, 'sendmsg'):
+            for part in parts:
+                self.sock.sendall(part)
+            return
+
+        parts = [memoryview(part) for part in parts]
+        while parts:
+            try:
+                n = self.sock.sendmsg(parts)
+            except socket.error as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+
+            # drop whatever was sent and go around again for the rest
+            while parts and n >= len(parts[0]):
+                n -= len(parts[0])
+                parts.pop(0)
+            if n:
+                parts[0] = parts[0][n:]
+
 
 class ServerSocket(BaseSocket):
     """
@@ -513,18 +641,72 @@ class ClientSocket(BaseSocket):
     """
     def __init__(self, sock):
         self.sock = sock
+        self.buffer = b''
 
-    def recv_request(self):
-        # read request from socket
-        data = self.sock.recv(READ_MAX).decode('UTF-8').strip()
+    def recv_requests(self):
+        """
+        Read what the client has sent, which is called when its socket is
+        readable, and return a list of the requests that are now complete.
 
-        log.debug("Received request client -> server: {}".format(data))
+        Requests are terminated with a newline, like responses, so they can be
+        bigger than a single read. Requests from clients that don't send the
+        newline are complete once what has been received is valid JSON (or
+        can't be the start of a request, so it gets an error response). This
+        never waits for more data, so a partial request doesn't hold up the
+        server thread; the rest is read the next time the socket is readable.
 
-        if len(data) == 0:
+        Raises SocketDisconnected if the client has closed the connection.
+        """
+        while True:
+            try:
+                chunk = self.sock.recv(READ_MAX)
+                break
+            except socket.error as e:
+                if e.args[0] == errno.EINTR:
+                    continue
+                raise
+        if not chunk:
             raise SocketDisconnected()
 
-        return data
+        lines = (self.buffer + chunk).split(b'\n')
+        self.buffer = lines.pop()
+        if self.buffer.strip() and self._complete(self.buffer):
+            lines.append(self.buffer)
+            self.buffer = b''
+
+        requests = []
+        for line in lines:
+            data = line.decode('UTF-8').strip()
+            if data:
+                log.debug("Received request client -> server: {}".format(data))
+                requests.append(data)
+        return requests
+
+    @staticmethod
+    def _complete(data):
+        data = data.strip()
+        if not data.startswith(b'{'):
+            return True
+        if not data.endswith(b'}'):
+            return False
+        try:
+            json.loads(data.decode('UTF-8'))
+        except ValueError:
+            return False
+        return True
 
     def send_response(self, response):
-        log.debug("Sending response server -> client: {}".format(response))
-        self.send(response)
+        """
+        Send a response to the client.
+
+        `response` is an APIMessage, or its JSON as a str or bytes. Responses
+        are terminated with a newline, which can't appear in the JSON itself.
+        """
+        log.debug("Sending response server -> client: %s", response)
+        if isinstance(response, APIMessage):
+            parts = response.encode_parts()
+        elif isinstance(response, bytes):
+            parts = [response]
+        else:
+            parts = [response.encode('UTF-8')]
+        self.send_parts(parts + [b'\n'])
@@ -1,5 +1,33 @@
+import os
+import re
+import sys
+import array
+import bisect
+import ctypes
+import logging
+import hashlib
+import json
+import mmap
+import struct
+import threading
+from collections import OrderedDict
+
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+import voltron
 from voltron.api import *
 from voltron.plugin import *
+from voltron.elf import ELFFile
+from voltron.cache import DiskCache
+from voltron.xrefs import XrefIndexer, capstone_decoder
+
+log = logging.getLogger('debugger')
+
+# the most pointers followed in a dereference chain
+MAX_DEREF = 16
 
 def validate_target(func, *args, **kwargs):
     """
@@ -68,20 +96,2337 @@ def lock_host(func, *args, **kwargs):
         return res
     return inner
 
+def stop_cached(func):
+    """
+    A decorator that caches the value returned by an adaptor method until the
+    cache is invalidated by `DebuggerAdaptor.invalidate()` (ie. the target
+    stops, continues or exits, or new modules are loaded).
+
+    Values are cached per set of arguments, which must be hashable.
+    """
+    def inner(self, *args, **kwargs):
+        # take a reference to the cache for this stop, so a value computed
+        # while the cache is being invalidated isn't stored in the new one
+        cache = self._stop_cache
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return func(self, *args, **kwargs)
+        res = func(self, *args, **kwargs)
+        cache[key] = res
+        return res
+    return inner
+
+
+class MemoryCache(object):
+    """
+    A page-granular LRU cache of a target's memory.
+
+    Reads are rounded out to whole pages, and each run of pages that isn't in
+    the cache is fetched from the debugger with a single read. The least
+    recently used pages are evicted once the cache holds more than `budget`
+    bytes. Reads of more than a quarter of the budget bypass the cache.
+
+    If reading whole pages fails (e.g. the range runs into an unmapped page),
+    the requested range is read directly, so callers see the same result (or
+    exception) they would without the cache.
+
+    `read` is a function taking an address and a length that reads memory
+    from the debugger.
+    """
+    def __init__(self, read, page_size=4096, budget=16*1024*1024):
+        self._read = read
+        self.page_size = page_size
+        self.budget = budget
+        self.pages = OrderedDict()
+        self.lock = threading.RLock()
+
+    def read(self, address, length):
+        """
+        Read `length` bytes of memory at `address`.
+        """
+        if length <= 0 or length > self.budget // 4:
+            return self._read(address, length)
+
+        ps = self.page_size
+        first = address // ps
+        last = (address + length - 1) // ps
+        with self.lock:
+            pages = []
+            n = first
+            while n <= last:
+                page = self.pages.pop(n, None)
+                if page is not None:
+                    # move it to the most recently used end
+                    self.pages[n] = page
+                    pages.append(page)
+                    n += 1
+                    continue
+
+                # fetch the whole run of missing pages at once
+                m = n + 1
+                while m <= last and m not in self.pages:
+                    m += 1
+                try:
+                    data = bytes(self._read(n * ps, (m - n) * ps))
+                except Exception:
+                    return self._read(address, length)
+                for i in range(m - n):
+                    page = data[i * ps:(i + 1) * ps]
+                    self.pages[n + i] = page
+                    pages.append(page)
+                n = m
+
+            while len(self.pages) * ps > self.budget:
+                self.pages.popitem(last=False)
+
+        offset = address - first * ps
+        if len(pages) == 1:
+            return pages[0][offset:offset + length]
+        return b''.join(pages)[offset:offset + length]
+
+    def invalidate(self, address=None, length=None):
+        """
+        Throw away the cached pages that overlap a range of memory, or all of
+        them if no range is given.
+        """
+        with self.lock:
+            if address is None:
+                self.pages.clear()
+            else:
+                ps = self.page_size
+                for n in range(address // ps, (address + max(length, 1) - 1) // ps + 1):
+                    self.pages.pop(n, None)
+
+
+class InstructionCache(object):
+    """
+    An LRU cache of decoded instructions that is kept while the target runs,
+    so code that is disassembled again (e.g. a loop that is being stepped
+    through) doesn't have to be decoded again.
+
+    Each entry is keyed by the instruction's address and holds its code
+    bytes, which the user of the cache compares with the target's memory
+    before trusting the entry, so entries for code that has been modified or
+    unloaded are never used. At most `size` instructions are kept.
+    """
+    def __init__(self, size=65536):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def run(self, address, count):
+        """
+        Get the cached records for up to `count` consecutive instructions
+        starting at `address`, as a list of (code bytes, record) tuples. The
+        run stops at the first instruction that isn't cached.
+        """
+        run = []
+        with self.lock:
+            while len(run) < count:
+                entry = self.entries.pop(address, None)
+                if entry is None:
+                    break
+                self.entries[address] = entry
+                run.append(entry)
+                address += entry[1]['size']
+        return run
+
+    def store(self, records):
+        """
+        Add decoded instruction records (as returned by
+        `DebuggerAdaptor._instructions()`) to the cache.
+        """
+        with self.lock:
+            for record in records:
+                self.entries.pop(record['address'], None)
+                self.entries[record['address']] = (bytes(bytearray.fromhex(record['bytes'])), record)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def discard(self, address):
+        with self.lock:
+            self.entries.pop(address, None)
+
+    def invalidate(self):
+        """
+        Throw away every entry.
+        """
+        with self.lock:
+            self.entries.clear()
+
+
+def parse_proc_maps(text):
+    """
+    Parse the contents of a Linux `/proc/<pid>/maps` file into a list of
+    regions, as returned by `DebuggerAdaptor.memory_map()`.
+    """
+    regions = []
+    for line in text.splitlines():
+        fields = line.split(None, 5)
+        if len(fields) < 5:
+            continue
+        start, end = [int(a, 16) for a in fields[0].split('-')]
+        regions.append({
+            "start":    start,
+            "end":      end,
+            "perms":    fields[1][:3],
+            "file":     fields[5].strip() if len(fields) > 5 else None,
+        })
+    return regions
+
+
+class MemoryMap(object):
+    """
+    An index of a target's memory regions, for checking whether addresses are
+    mapped and classifying them in O(log n).
+
+    `regions` is a list of region dicts, each with "start", "end", "perms"
+    (e.g. "r-x", or None if not known) and "file" keys. A "type" key is added
+    to each of them, classifying the region as "stack", "heap", "module" (a
+    file-backed region, or [vdso]) or "anon". Any region containing `sp` is a
+    stack.
+    """
+    def __init__(self, regions, sp=None):
+        self.regions = sorted(regions, key=lambda r: r['start'])
+        self.starts = [r['start'] for r in self.regions]
+        for region in self.regions:
+            region['type'] = self._classify(region, sp)
+
+    @staticmethod
+    def _classify(region, sp):
+        name = region['file'] or ''
+        if name.startswith('[stack') or (sp is not None and region['start'] <= sp < region['end']):
+            return 'stack'
+        elif name == '[heap]':
+            return 'heap'
+        elif name in ('[vdso]', '[vsyscall]') or (name and not name.startswith('[')):
+            return 'module'
+        else:
+            return 'anon'
+
+    def __len__(self):
+        return len(self.regions)
+
+    def find(self, address):
+        """
+        Get the region containing `address`, or None.
+        """
+        i = bisect.bisect_right(self.starts, address) - 1
+        if i >= 0 and address < self.regions[i]['end']:
+            return self.regions[i]
+        return None
+
+    def is_valid(self, address, length=1):
+        """
+        Check whether the `length` bytes at `address` are mapped and readable.
+
+        If the map is empty (ie. the debugger couldn't tell us about the
+        target's regions) every address is assumed to be valid.
+        """
+        if not self.regions:
+            return True
+        end = address + length
+        while address < end:
+            region = self.find(address)
+            if region is None or (region['perms'] and region['perms'][0] != 'r'):
+                return False
+            address = region['end']
+        return True
+
+    def classify(self, address):
+        """
+        Get the type of the region containing `address`, or None if it's not
+        mapped.
+        """
+        region = self.find(address)
+        return region['type'] if region else None
+
+
+class SymbolIndex(object):
+    """
+    An index of a target's symbols, for finding the symbol containing an
+    address in O(log n).
+
+    `symbols` is an iterable of (address, size, name) tuples. Symbols with no
+    size extend to the start of the next symbol for lookups, but as their real
+    extent isn't known they have no bounds.
+
+    `size_of` is a function that gets the size of the symbol at an address (or
+    0 if it doesn't know it), for symbols whose sizes are expensive to find.
+    It's only called for a symbol with no size the first time a lookup finds
+    it, and the size is kept in the index.
+    """
+    def __init__(self, symbols, size_of=None):
+        symbols = sorted(s for s in symbols if s[2])
+        self.starts = [s[0] for s in symbols]
+        self.names = [s[2] for s in symbols]
+        self.ends = []
+        self.size_of = size_of
+
+        # 1 for symbols whose size is known, 2 for ones that size_of found
+        # no size for, and 0 for the rest
+        self.sized = array.array('B', [1 if s[1] else 0 for s in symbols])
+        for i, (address, size, name) in enumerate(symbols):
+            if not size:
+                size = max(symbols[i + 1][0] - address, 1) if i + 1 < len(symbols) else 1
+            self.ends.append(address + size)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def lookup(self, address):
+        """
+        Get the name of the symbol containing `address` and the address's
+        offset into it as a tuple, or None.
+        """
+        i = self._find(address)
+        if i is not None:
+            return self.names[i], address - self.starts[i]
+        return None
+
+    def symbolicate(self, address):
+        """
+        Get a description of `address` like "main + 0x1F", or None.
+        """
+        sym = self.lookup(address)
+        return '{} + 0x{:X}'.format(*sym) if sym else None
+
+    def bounds(self, address):
+        """
+        Get the name, start and end of the symbol containing `address` as a
+        tuple, or None. Symbols with no size have no bounds, so callers don't
+        mistake whatever follows them for a function's code.
+        """
+        i = self._find(address)
+        if i is not None and self.sized[i] == 1:
+            return self.names[i], self.starts[i], self.ends[i]
+        return None
+
+    def _find(self, address):
+        """
+        Get the position of the symbol containing `address` in the index, or
+        None, getting the symbol's size with `size_of` if it needs it.
+        """
+        i = bisect.bisect_right(self.starts, address) - 1
+        if i < 0 or address >= self.ends[i]:
+            return None
+        if not self.sized[i] and self.size_of is not None:
+            size = self.size_of(self.starts[i])
+            if size:
+                self.ends[i] = self.starts[i] + size
+                self.sized[i] = 1
+            else:
+                self.sized[i] = 2
+            if address >= self.ends[i]:
+                return None
+        return i
+
+    # the file format is a header followed by arrays of the starts, ends and
+    # name offsets in native byte order, then the names, and then a flag for
+    # each symbol saying whether it had a size
+    file_magic = b'VSYM'
+    file_version = 2
+    file_header = struct.Struct('=4sIIIQQ')
+
+    def save(self, link_base=0):
+        """
+        Serialise the index and the link base of its module in a format that
+        can be memory-mapped by `load()`. Returns a list of bytes-like objects.
+        """
+        names = [n.encode('utf-8') for n in self.names]
+        offsets = array.array('Q', [0])
+        for name in names:
+            offsets.append(offsets[-1] + len(name))
+        header = self.file_header.pack(self.file_magic, self.file_version, len(self),
+                                       1 if sys.byteorder == 'little' else 2, link_base, offsets[-1])
+        return [header, array.array('Q', self.starts), array.array('Q', self.ends), offsets, b''.join(names),
+                array.array('B', [1 if s == 1 else 0 for s in self.sized])]
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index saved by `save()`. The file is memory-mapped so only the
+        parts of it that are used by lookups are read.
+
+        Returns the index and the link base of its module. Raises ValueError
+        if the file isn't an index in the current format.
+        """
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, order, link_base, names_len = cls.file_header.unpack_from(data, 0)
+        if (magic, version, order) != (cls.file_magic, cls.file_version, 1 if sys.byteorder == 'little' else 2):
+            raise ValueError("Not a symbol index in the current format")
+        if len(data) != cls.file_header.size + 8 * (3 * count + 1) + names_len + count:
+            raise ValueError("Truncated symbol index")
+
+        def words(offset, count):
+            if hasattr(memoryview, 'cast'):
+                return memoryview(data)[offset:offset + 8 * count].cast('Q')
+            return array.array('Q', data[offset:offset + 8 * count])
+
+        index = cls([])
+        offset = cls.file_header.size
+        index.starts = words(offset, count)
+        index.ends = words(offset + 8 * count, count)
+        index.names = _NameTable(data, words(offset + 16 * count, count + 1), offset + 8 * (3 * count + 1))
+        sized = offset + 8 * (3 * count + 1) + names_len
+        index.sized = memoryview(data)[sized:] if hasattr(memoryview, 'cast') else bytearray(data[sized:])
+        index.data = data
+        return index, link_base
+
+
+class _NameTable(object):
+    """
+    The names in a memory-mapped `SymbolIndex`, which are only decoded when
+    they're looked up.
+    """
+    def __init__(self, data, offsets, base):
+        self.data = data
+        self.offsets = offsets
+        self.base = base
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[self.base + self.offsets[i]:self.base + self.offsets[i + 1]].decode('utf-8')
+
+
+class InstructionIndex(object):
+    """
+    The decoded instruction records of a module by their offset from the
+    module's start, so they can be kept in the disk cache and used again
+    wherever the module is loaded in a later session.
+
+    `base` and `size` are the address the module is loaded at and the size of
+    the range of memory it's loaded in. Records are only kept for addresses
+    in that range. Records loaded from the disk cache are kept in a
+    memory-mapped file, and ones added since are kept in `added` until the
+    index is written with `write()`.
+    """
+    def __init__(self, base, size):
+        self.base = base
+        self.size = size
+        self.mapped = ([], [])
+        self.added = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.mapped[0]) + len(self.added)
+
+    def get(self, address):
+        """
+        Get the record for the instruction at `address`, or None.
+        """
+        offset = address - self.base
+        record = self.added.get(offset)
+        if record is not None:
+            return record
+        offsets, records = self.mapped
+        i = bisect.bisect_left(offsets, offset)
+        if i < len(offsets) and offsets[i] == offset:
+            return records[i]
+        return None
+
+    def run(self, address, count):
+        """
+        Get the records for up to `count` consecutive instructions starting at
+        `address`. The run stops at the first instruction that isn't known.
+        """
+        run = []
+        while len(run) < count:
+            record = self.get(address)
+            if record is None:
+                break
+            run.append(record)
+            address += record['size']
+        return run
+
+    def add(self, records):
+        """
+        Add decoded instruction records (as returned by
+        `DebuggerAdaptor._instructions()`) to the index.
+        """
+        with self.lock:
+            for record in records:
+                if 0 <= record['address'] - self.base < self.size and self.get(record['address']) != record:
+                    self.added[record['address'] - self.base] = record
+                    self.dirty = True
+
+    def write(self, disk_cache, key):
+        """
+        Save the index in the disk cache under `key` (the module's build ID)
+        and map the saved file in place of the records that were added, so
+        they aren't serialised again by the next write.
+        """
+        with self.lock:
+            added = dict(self.added)
+            self.dirty = False
+        path = disk_cache.write(key, 'instructions', self.save(added))
+        saved = self.load(path, self.base)
+        with self.lock:
+            self.mapped = saved.mapped
+            for offset, record in added.items():
+                if self.added.get(offset) is record:
+                    del self.added[offset]
+
+    # the file format is a header followed by arrays of the offsets of the
+    # instructions and of their records in native byte order, then the
+    # records as JSON without their addresses
+    file_magic = b'VINS'
+    file_version = 1
+    file_header = struct.Struct('=4sIIIQQQ')
+
+    def save(self, added=None):
+        """
+        Serialise the index (with `added` in place of the records that have
+        been added to it, if given) in a format that can be memory-mapped by
+        `load()`. Returns a list of bytes-like objects.
+        """
+        if added is None:
+            added = self.added
+        offsets, records = self.mapped
+        texts = []
+        for offset in sorted(set(offsets) | set(added)):
+            if offset in added:
+                record = dict(added[offset])
+                del record['address']
+                texts.append((offset, json.dumps(record, sort_keys=True).encode('utf-8')))
+            else:
+                texts.append((offset, records.text(bisect.bisect_left(offsets, offset))))
+        positions = array.array('Q', [0])
+        for offset, text in texts:
+            positions.append(positions[-1] + len(text))
+        header = self.file_header.pack(self.file_magic, self.file_version, len(texts),
+                                       1 if sys.byteorder == 'little' else 2, self.base, self.size, positions[-1])
+        return [header, array.array('Q', [t[0] for t in texts]), positions, b''.join(t[1] for t in texts)]
+
+    @classmethod
+    def load(cls, path, base):
+        """
+        Load an index saved by `save()` for a module that is loaded at `base`.
+        The file is memory-mapped and records are only decoded when they're
+        looked up, with their addresses (and the addresses in their operands
+        and comments within the module) moved to where the module is loaded.
+
+        Raises ValueError if the file isn't an index in the current format.
+        """
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, order, saved_base, size, texts_len = cls.file_header.unpack_from(data, 0)
+        if (magic, version, order) != (cls.file_magic, cls.file_version, 1 if sys.byteorder == 'little' else 2):
+            raise ValueError("Not an instruction index in the current format")
+        if len(data) != cls.file_header.size + 8 * (2 * count + 1) + texts_len:
+            raise ValueError("Truncated instruction index")
+
+        def words(offset, count):
+            if hasattr(memoryview, 'cast'):
+                return memoryview(data)[offset:offset + 8 * count].cast('Q')
+            return array.array('Q', data[offset:offset + 8 * count])
+
+        index = cls(base, size)
+        offset = cls.file_header.size
+        offsets = words(offset, count)
+        index.mapped = (offsets, _RecordTable(data, offsets, words(offset + 8 * count, count + 1),
+                                              offset + 8 * (2 * count + 1), base, base - saved_base,
+                                              saved_base + size))
+        return index
+
+
+class _RecordTable(object):
+    """
+    The records in a memory-mapped `InstructionIndex`, which are only decoded
+    (and rebased by `delta`) when they're looked up.
+    """
+    address_pattern = re.compile(r'0x[0-9a-fA-F]+')
+
+    def __init__(self, data, offsets, positions, start, base, delta, end):
+        self.data = data
+        self.offsets = offsets
+        self.positions = positions
+        self.start = start
+        self.base = base
+        self.delta = delta
+        self.low = base - delta
+        self.high = end
+
+    def __len__(self):
+        return len(self.positions) - 1
+
+    def __getitem__(self, i):
+        record = json.loads(self.data[self.start + self.positions[i]:self.start + self.positions[i + 1]].decode('utf-8'))
+        record['address'] = self.base + self.offsets[i]
+        if self.delta:
+            if record.get('target') is not None and self.low <= record['target'] < self.high:
+                record['target'] += self.delta
+            for key in ('operands', 'comment'):
+                if record.get(key):
+                    record[key] = self.address_pattern.sub(self._move, record[key])
+        return record
+
+    def text(self, i):
+        """
+        Get the saved form of record `i` for where the module is loaded now,
+        which is copied from the file unless the record had to be rebased.
+        """
+        if not self.delta:
+            return self.data[self.start + self.positions[i]:self.start + self.positions[i + 1]]
+        record = self[i]
+        del record['address']
+        return json.dumps(record, sort_keys=True).encode('utf-8')
+
+    def _move(self, match):
+        address = int(match.group(0), 16)
+        if self.low <= address < self.high:
+            return hex(address + self.delta)
+        return match.group(0)
+
+
+class InstructionIndexWriter(threading.Thread):
+    """
+    A worker thread that writes `InstructionIndex`es to a `DiskCache`, so the
+    target stopping or continuing doesn't wait for them to be written.
+
+    Indexes are queued with `add()`, and are written at most once for each
+    time they're queued.
+    """
+    def __init__(self, disk_cache):
+        super(InstructionIndexWriter, self).__init__()
+        self.daemon = True
+        self.disk_cache = disk_cache
+        self.queue = Queue()
+        self.lock = threading.Lock()
+        self.queued = set()
+
+    def add(self, key, index):
+        """
+        Queue an index to be written under `key` (the module's build ID),
+        unless it's already queued.
+        """
+        with self.lock:
+            if key in self.queued:
+                return
+            self.queued.add(key)
+        self.queue.put((key, index))
+
+    def flush(self):
+        """
+        Wait for the queued indexes to be written.
+        """
+        self.queue.join()
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    break
+                key, index = item
+                with self.lock:
+                    self.queued.discard(key)
+                try:
+                    index.write(self.disk_cache, key)
+                except (IOError, OSError, ValueError) as e:
+                    log.debug("Couldn't cache instructions for {}: {}".format(key, e))
+            finally:
+                self.queue.task_done()
+
+    def stop(self):
+        self.queue.put(None)
+
+
+class ModuleSymbolIndex(object):
+    """
+    An index of the symbols in each of a target's modules.
+
+    `modules` is a list of dicts, each with the "path" of the module, the
+    "start" and "end" of the range of memory it's loaded at, and a
+    `SymbolIndex` of its "symbols" with the addresses in the module's file.
+    "link_base" is the file address that is loaded at "start".
+
+    The symbol indexes don't depend on where modules are loaded, so they can
+    be reused each time the target stops (and for each run of the target) and
+    only built when a module is first loaded. Finding the symbol for an
+    address is O(log n) in the number of modules plus O(log n) in the number
+    of symbols in the module.
+    """
+    def __init__(self, modules):
+        self.modules = sorted(modules, key=lambda m: m['start'])
+        self.starts = [m['start'] for m in self.modules]
+
+    def __len__(self):
+        return sum(len(m['symbols']) for m in self.modules)
+
+    def module(self, address):
+        """
+        Get the module loaded at `address`, or None.
+        """
+        i = bisect.bisect_right(self.starts, address) - 1
+        if i >= 0 and address < self.modules[i]['end']:
+            return self.modules[i]
+        return None
+
+    def lookup(self, address):
+        """
+        Get the name of the symbol containing `address` and the address's
+        offset into it as a tuple, or None.
+        """
+        module = self.module(address)
+        if module:
+            return module['symbols'].lookup(address - module['start'] + module['link_base'])
+        return None
+
+    def symbolicate(self, address):
+        """
+        Get a description of `address` like "main + 0x1F", or None.
+        """
+        sym = self.lookup(address)
+        return '{} + 0x{:X}'.format(*sym) if sym else None
+
+    def bounds(self, address):
+        """
+        Get the name, start and end of the symbol containing `address` as a
+        tuple, with the start and end where the module is loaded, or None.
+        """
+        module = self.module(address)
+        if module:
+            sym = module['symbols'].bounds(address - module['start'] + module['link_base'])
+            if sym:
+                delta = module['start'] - module['link_base']
+                return sym[0], sym[1] + delta, sym[2] + delta
+        return None
+
+
+# mnemonics of the instructions that branch to an address given in their
+# last operand: x86 jumps, calls and loops, ARM/AArch64 (conditional) branches,
+# compare/test and branches, and PowerPC counter branches
+branch_pattern = re.compile(r'^(?:j\w+|call\w*|loop\w*'
+                            r'|b(?:l|lx|x)?(?:\.?(?:eq|ne|cs|hs|cc|lo|mi|pl|vs|vc|hi|ls|ge|lt|gt|le|al))?(?:\.[wn])?'
+                            r'|cbn?z|tbn?z|bdn?z\w*)$')
+branch_target_pattern = re.compile(r'^[#$]?(?:0x)?([0-9a-fA-F]+)$')
+instruction_pattern = re.compile(r'^((?:(?:rep\w*|lock|bnd|notrack|data16|addr32|[c-gs]s)\s+)*\S+)\s*(.*)$')
+comment_pattern = re.compile(r'\s+[#;@]\s+(.*)$')
+symbol_suffix_pattern = re.compile(r'\s*<([^>]*)>$')
+
+
+def parse_instruction(text):
+    """
+    Split the text of a disassembled instruction, like "call 0x401030
+    <puts@plt>", into its mnemonic (including any prefixes), its operands,
+    the symbol the debugger printed after them and its comment.
+
+    Returns a tuple of (mnemonic, operands, symbol, comment), where the symbol
+    and the comment are None if there aren't any.
+    """
+    text = text.strip()
+    comment = None
+    m = comment_pattern.search(text)
+    if m:
+        text, comment = text[:m.start()], m.group(1).strip()
+    m = instruction_pattern.match(text)
+    if not m:
+        return text, '', None, comment
+    mnemonic, operands = m.group(1), m.group(2).strip()
+    symbol = None
+    m = symbol_suffix_pattern.search(operands)
+    if m:
+        operands, symbol = operands[:m.start()], m.group(1)
+    return mnemonic, operands, symbol, comment
+
+
+def branch_target(mnemonic, operands):
+    """
+    Get the address a branch instruction branches to from its mnemonic and
+    operands, or None if it isn't a branch or branches somewhere that isn't
+    given as an immediate address (e.g. through a register).
+    """
+    if not branch_pattern.match(mnemonic.split()[-1].lower()):
+        return None
+    operands = symbol_suffix_pattern.sub('', operands.strip())
+    m = branch_target_pattern.match(operands.split(',')[-1].strip())
+    return int(m.group(1), 16) if m else None
+
+
+def format_instructions(records, pc=None):
+    """
+    Format instruction records returned by `DebuggerAdaptor.instructions()`
+    as text, one instruction per line, with the instruction at `pc` marked.
+    """
+    width = max(len('{:x}'.format(r['address'])) for r in records) if records else 0
+    lines = []
+    for r in records:
+        line = '{} 0x{:0{}x}:  {:<7} {}'.format('->' if r['address'] == pc else '  ', r['address'], width,
+                                              r['mnemonic'], r['operands'])
+        notes = [n for n in (r.get('symbol'), r.get('comment')) if n]
+        if notes:
+            line = '{}  ; {}'.format(line.rstrip(), ', '.join(notes))
+        lines.append(line.rstrip())
+    return '\n'.join(lines)
+
+
+# mnemonics of instructions by how they change the flow of control, for
+# recovering control flow graphs. "blr" is a call on AArch64 (with a register
+# operand) and a return on PowerPC (with none), and "bx lr" is an ARM return.
+call_pattern = re.compile(r'^(?:call\w*|bl|blx|blr|bctrl)$')
+return_pattern = re.compile(r'^(?:i?ret\w*|hlt|ud2)$')
+conditional_pattern = re.compile(r'^(?:j(?!mp)\w+|loop\w*'
+                                 r'|b\.?(?:eq|ne|cs|hs|cc|lo|mi|pl|vs|vc|hi|ls|ge|lt|gt|le)(?:\.[wn])?'
+                                 r'|cbn?z|tbn?z|bdn?z\w*)$')
+jump_pattern = re.compile(r'^(?:jmp\w*|b|bal|b\.al|b\.[wn]|br|bx|bctr)$')
+
+
+def branch_kind(mnemonic, operands=''):
+    """
+    Get how an instruction changes the flow of control: "call", "return"
+    (or otherwise doesn't continue), "conditional" (a conditional branch),
+    "jump" (an unconditional branch) or None.
+    """
+    mnemonic = mnemonic.split()[-1].lower() if mnemonic.strip() else ''
+    operands = operands.strip().lower()
+    if return_pattern.match(mnemonic) or (mnemonic == 'bx' and operands == 'lr') or \
+            (mnemonic == 'blr' and not operands):
+        return 'return'
+    if call_pattern.match(mnemonic):
+        return 'call'
+    if conditional_pattern.match(mnemonic):
+        return 'conditional'
+    if jump_pattern.match(mnemonic):
+        return 'jump'
+    return None
+
+
+def recover_cfg(decode, start, end, max_instructions=20000):
+    """
+    Recover the control flow graph of the function from `start` to `end`.
+
+    `decode` is a function taking an address and returning instruction
+    records (as returned by `DebuggerAdaptor._decoded_instructions()`) for
+    some instructions from that address.
+
+    Code is decoded from the start of the function following branches, so
+    data in the function isn't decoded. Branches through registers (e.g.
+    jump tables) aren't followed, and calls are assumed to return.
+
+    Returns a dict like this:
+    {
+        "blocks": [
+            {"start": 0x401120, "end": 0x40112b, "instructions": [ ... ]},
+            ...
+        ],
+        "edges": [
+            {"from": 0x401120, "to": 0x401140, "type": "taken"},
+            {"from": 0x401120, "to": 0x40112b, "type": "fallthrough"},
+            ...
+        ]
+    }
+
+    Edges are between block starts, and their type is "taken" or
+    "fallthrough" for conditional branches, "jump" for unconditional ones,
+    or "fallthrough" into a block that starts with a branch target.
+    """
+    instructions = {}
+    leaders = set([start])
+    work = [start]
+    while work and len(instructions) < max_instructions:
+        address = work.pop()
+        while start <= address < end and address not in instructions:
+            records = decode(address)
+            if not records or records[0]['address'] != address:
+                break
+            done = False
+            for record in records:
+                if record['address'] != address or address in instructions or not start <= address < end:
+                    break
+                instructions[address] = record
+                kind = branch_kind(record['mnemonic'], record['operands'])
+                target = record.get('target')
+                if kind in ('jump', 'conditional') and target is not None and start <= target < end:
+                    if target not in leaders:
+                        leaders.add(target)
+                        work.append(target)
+                address += record['size']
+                if kind == 'conditional':
+                    leaders.add(address)
+                elif kind in ('jump', 'return'):
+                    done = True
+                    break
+            if done:
+                break
+
+    # split the instructions into blocks at the leaders and after branches
+    blocks = []
+    block = None
+    for address in sorted(instructions):
+        record = instructions[address]
+        if block is None or address in leaders or address != block['end']:
+            block = {"start": address, "end": address, "instructions": []}
+            blocks.append(block)
+        block['instructions'].append(record)
+        block['end'] = address + record['size']
+        if branch_kind(record['mnemonic'], record['operands']) in ('jump', 'conditional', 'return'):
+            block = None
+
+    starts = set(b['start'] for b in blocks)
+    edges = []
+    for block in blocks:
+        last = block['instructions'][-1]
+        kind = branch_kind(last['mnemonic'], last['operands'])
+        target = last.get('target')
+        if kind in ('jump', 'conditional') and target in starts:
+            edges.append({"from": block['start'], "to": target, "type": "taken" if kind == 'conditional' else "jump"})
+        if kind not in ('jump', 'return') and block['end'] in starts:
+            edges.append({"from": block['start'], "to": block['end'], "type": "fallthrough"})
+
+    return {"blocks": blocks, "edges": edges}
+
+
+def rebase_cfg(cfg, delta):
+    """
+    Copy a control flow graph returned by `recover_cfg()` with every address
+    in it moved by `delta`.
+    """
+    def move(record):
+        record = dict(record, address=record['address'] + delta)
+        if record.get('target') is not None:
+            record['target'] += delta
+        return record
+    return {
+        "blocks": [{"start": b['start'] + delta, "end": b['end'] + delta,
+                    "instructions": [move(r) for r in b['instructions']]} for b in cfg['blocks']],
+        "edges": [dict(e, **{"from": e['from'] + delta, "to": e['to'] + delta}) for e in cfg['edges']]
+    }
+
+
+class ProcessMemoryError(Exception):
+    pass
+
+
+class ProcessMemory(object):
+    """
+    Reads memory straight from a local Linux process, with `process_vm_readv`
+    or `/proc/<pid>/mem`, rather than through the debugger.
+
+    The process's region map is read from `/proc/<pid>/maps` when the object
+    is created, so it should be thrown away when the process resumes. Reads
+    are split at region boundaries, and reads that touch an unmapped or
+    unreadable page raise `ProcessMemoryError` without asking the kernel.
+    """
+    IOV_MAX = 1024
+
+    class iovec(ctypes.Structure):
+        _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        process_vm_readv = libc.process_vm_readv
+        process_vm_readv.restype = ctypes.c_ssize_t
+    except (OSError, AttributeError):
+        process_vm_readv = None
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.usable = True
+        self._fd = None
+        self.regions = []
+        with open('/proc/{}/maps'.format(pid)) as f:
+            for region in parse_proc_maps(f.read()):
+                if region['perms'][0] != 'r':
+                    continue
+                if self.regions and self.regions[-1][1] == region['start']:
+                    # merge adjacent regions
+                    self.regions[-1][1] = region['end']
+                else:
+                    self.regions.append([region['start'], region['end']])
+        self.starts = [r[0] for r in self.regions]
+
+    def __del__(self):
+        if self._fd is not None:
+            os.close(self._fd)
+
+    @classmethod
+    def attach(cls, pid):
+        """
+        Get a `ProcessMemory` for a process if it's running on this machine
+        and is being traced by this process (or a child of this process, like
+        lldb-server), or None.
+        """
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            tracer = cls._status(pid)['TracerPid']
+            if tracer != os.getpid() and (not tracer or cls._status(tracer)['PPid'] != os.getpid()):
+                return None
+            return cls(pid)
+        except (IOError, OSError, KeyError, ValueError):
+            return None
+
+    @staticmethod
+    def _status(pid):
+        status = {}
+        with open('/proc/{}/status'.format(pid)) as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('PPid', 'TracerPid'):
+                    status[key] = int(value)
+        return status
+
+    def segments(self, address, length):
+        """
+        Split a range of memory at the boundaries of the regions it lies in.
+
+        Returns a list of (address, length) tuples. Raises
+        `ProcessMemoryError` if any of the range isn't readable.
+        """
+        end = address + length
+        i = bisect.bisect_right(self.starts, address) - 1
+        segments = []
+        while address < end:
+            if i < 0 or i >= len(self.regions) or not self.regions[i][0] <= address < self.regions[i][1]:
+                raise ProcessMemoryError("Address 0x{:x} is not mapped".format(address))
+            seg_end = min(end, self.regions[i][1])
+            segments.append((address, seg_end - address))
+            address = seg_end
+            i += 1
+        return segments
+
+    def read(self, address, length):
+        """
+        Read `length` bytes of memory at `address`. Returns bytes.
+        """
+        segments = self.segments(address, length)
+        if self.process_vm_readv:
+            try:
+                return self._readv(segments, length)
+            except OSError:
+                pass
+        try:
+            return self._pread(segments)
+        except (IOError, OSError) as e:
+            # no point trying again until the process stops again
+            self.usable = False
+            raise ProcessMemoryError(str(e))
+
+    def _readv(self, segments, length):
+        buf = ctypes.create_string_buffer(length)
+        local = self.iovec(ctypes.cast(buf, ctypes.c_void_p), length)
+        offset = 0
+        for i in range(0, len(segments), self.IOV_MAX):
+            chunk = segments[i:i + self.IOV_MAX]
+            remote = (self.iovec * len(chunk))(*[self.iovec(a, l) for a, l in chunk])
+            size = sum(l for a, l in chunk)
+            local.iov_base = ctypes.cast(buf, ctypes.c_void_p).value + offset
+            local.iov_len = size
+            n = self.process_vm_readv(self.pid, ctypes.byref(local), 1, remote, len(chunk), 0)
+            if n != size:
+                raise OSError(ctypes.get_errno(), "process_vm_readv read {} of {} bytes".format(n, size))
+            offset += size
+        return buf.raw
+
+    def _pread(self, segments):
+        if self._fd is None:
+            self._fd = os.open('/proc/{}/mem'.format(self.pid), os.O_RDONLY)
+        data = []
+        for address, length in segments:
+            if hasattr(os, 'pread'):
+                data.append(os.pread(self._fd, length, address))
+            else:
+                os.lseek(self._fd, address, os.SEEK_SET)
+                data.append(os.read(self._fd, length))
+            if len(data[-1]) != length:
+                raise OSError("Short read at 0x{:x}".format(address))
+        return b''.join(data)
+
 
 class DebuggerAdaptor(object):
     reg_names = {
-        "x86":      {"pc": "eip", "sp": "esp"},
-        "x86_64":   {"pc": "rip", "sp": "rsp"},
-        "armv6":    {"pc": "pc", "sp": "sp"},
-        "armv7":    {"pc": "pc", "sp": "sp"},
-        "armv7s":   {"pc": "pc", "sp": "sp"},
-        "arm64":    {"pc": "pc", "sp": "sp"},
-        "powerpc":  {"pc": "pc", "sp": "r1"},
+        "x86":      {"pc": "eip", "sp": "esp", "fp": "ebp"},
+        "x86_64":   {"pc": "rip", "sp": "rsp", "fp": "rbp"},
+        "arm":      {"pc": "pc", "sp": "sp", "fp": "r11"},
+        "armv6":    {"pc": "pc", "sp": "sp", "fp": "r7"},
+        "armv7":    {"pc": "pc", "sp": "sp", "fp": "r7"},
+        "armv7s":   {"pc": "pc", "sp": "sp", "fp": "r7"},
+        "arm64":    {"pc": "pc", "sp": "sp", "fp": "x29"},
+        "powerpc":  {"pc": "pc", "sp": "r1", "fp": "r31"},
     }
 
+    # categories registers can be requested by, and the patterns that match
+    # register names in each category other than 'general'
+    register_categories = ['general', 'flags', 'segment', 'sse', 'avx', 'avx512', 'neon', 'sve', 'fpu',
+                           'system']
+
+    # categories of wide vector registers, which are only returned when they
+    # are asked for
+    vector_categories = ['avx', 'avx512', 'neon', 'sve']
+    register_category_patterns = [(c, re.compile(p)) for c, p in [
+        ('flags',   r'^([er]?flags|cpsr|cr|xer)$'),
+        ('segment', r'^([cdefgs]s|[fg]s_base)$'),
+        ('sse',     r'^(xmm\d+|mxcsr)$'),
+        ('avx',     r'^ymm\d+h?$'),
+        ('avx512',  r'^(zmm\d+h?|k[0-7])$'),
+        ('neon',    r'^[qv]\d+$'),
+        ('sve',     r'^([zp]\d+|ffr|vg)$'),
+        ('fpu',     r'^(st\d|stmm\d|f(ctrl|stat|tag|iseg|ioff|oseg|ooff|op|cw|sw|tw|ip|cs|dp|ds|pscr|psr|pcr)|[sdf]\d+)$'),
+        ('system',  r'^(cr\d+|dr\d+|msr|trapno|err|faultvaddr|exception|far|esr|orig_[er]ax)$'),
+    ]]
+
     def __init__(self, *args, **kwargs):
         self.listeners = []
+        self.epoch = 0
+        self._stop_cache = {}
+
+        config = voltron.config['debugger']['memory_cache'].to_dict() if voltron.config else {}
+        self.memory_cache_config = config if config.get('enabled', True) else None
+        self.memory_caches = {}
+
+        config = voltron.config['debugger']['instruction_cache'].to_dict() if voltron.config else {}
+        self.instruction_cache_config = config if config.get('enabled', True) else None
+        self.instruction_caches = {}
+
+        # addresses of the instructions in functions that have been
+        # disassembled backwards, by target ID and function start
+        self.function_layouts = OrderedDict()
+
+        # control flow graphs of functions relative to their start, by module
+        # key (or target ID) and function offset and size
+        self.function_cfgs = OrderedDict()
+
+        # symbol indexes and link bases of modules, by module key (see
+        # `_modules()`), kept as long as the adaptor is around
+        self.module_symbols = {}
+
+        # decoded instructions of modules to keep in the disk cache, by module
+        # key and load address, and the thread that writes them
+        self.module_instructions = {}
+        self.instruction_writer = None
+
+        # things that are expensive to work out about modules, kept between
+        # sessions
+        if voltron.config and voltron.config['debugger']['disk_cache']:
+            self.disk_cache = DiskCache(voltron.env.voltron_dir.cache.path)
+        else:
+            self.disk_cache = None
+        self.direct_memory = voltron.config['debugger']['direct_memory'] if voltron.config else True
+
+        # xref indexes of modules, built by a worker thread that is started
+        # the first time xrefs are asked for
+        config = voltron.config['debugger']['xref_index'].to_dict() if voltron.config else {}
+        self.xref_index_enabled = config.get('enabled', False)
+        self.xref_indexer = None
+
+        # symbols and source lines of frames, by module key (or target ID)
+        # and offset of the frame's address
+        self.frame_symbols = OrderedDict()
+        self.backtrace_depth = voltron.config['debugger']['backtrace_depth'] if voltron.config else 64
+
+    def memory_cache(self, target_id=0):
+        """
+        Get the memory cache for a target, or None if the memory cache is
+        disabled.
+        """
+        config = self.memory_cache_config
+        if config is None:
+            return None
+        if target_id not in self.memory_caches:
+            self.memory_caches[target_id] = MemoryCache(lambda address, length: self._fetch_memory(address, length, target_id=target_id),
+                                                        page_size=config.get('page_size', 4096),
+                                                        budget=config.get('budget', 16*1024*1024))
+        return self.memory_caches[target_id]
+
+    def instruction_cache(self, target_id=0):
+        """
+        Get the decoded instruction cache for a target, or None if the
+        instruction cache is disabled.
+        """
+        config = self.instruction_cache_config
+        if config is None:
+            return None
+        if target_id not in self.instruction_caches:
+            self.instruction_caches[target_id] = InstructionCache(size=config.get('size', 65536))
+        return self.instruction_caches[target_id]
+
+    def read_memory(self, address, length, target_id=0):
+        """
+        Read memory from the target, through the memory cache if it's
+        enabled. Adaptors implement `_read_memory()` to do the actual read.
+        """
+        cache = self.memory_cache(target_id)
+        if cache:
+            return cache.read(address, length)
+        return self._fetch_memory(address, length, target_id=target_id)
+
+    def _fetch_memory(self, address, length, target_id=0):
+        """
+        Read memory from the target, bypassing the memory cache. The memory is
+        read straight from the process if it's a local process (see
+        `ProcessMemory`), and with `_read_memory()` otherwise or if that fails,
+        so failed reads raise the debugger's usual exceptions.
+
+        Ranges that overlap a software breakpoint are always read with
+        `_read_memory()`, as the debugger hides the trap instructions it has
+        written to memory and the process's memory doesn't.
+        """
+        direct = self._process_memory(target_id=target_id)
+        if direct and direct.usable and not self._overlaps_breakpoint(address, length, target_id=target_id):
+            try:
+                return direct.read(address, length)
+            except ProcessMemoryError:
+                pass
+        return self._read_memory(address, length, target_id=target_id)
+
+    @stop_cached
+    def _process_memory(self, target_id=0):
+        if not self.direct_memory:
+            return None
+        pid = self._local_pid(target_id=target_id)
+        return ProcessMemory.attach(pid) if pid else None
+
+    # the most bytes of memory a software breakpoint replaces (e.g. an ARM
+    # udf or AArch64 brk), starting at its address
+    max_breakpoint_size = 4
+
+    def _overlaps_breakpoint(self, address, length, target_id=0):
+        """
+        Check whether a range of memory might contain a software breakpoint's
+        trap instruction. If the adaptor doesn't know where its breakpoints
+        are, every range might.
+        """
+        sites = self._breakpoint_site_addresses(target_id=target_id)
+        if sites is None:
+            return True
+        i = bisect.bisect_left(sites, address - self.max_breakpoint_size + 1)
+        return i < len(sites) and sites[i] < address + length
+
+    @stop_cached
+    def _breakpoint_site_addresses(self, target_id=0):
+        sites = self._breakpoint_sites(target_id=target_id)
+        return sorted(sites) if sites is not None else None
+
+    def _breakpoint_sites(self, target_id=0):
+        """
+        Get a list of the addresses where the debugger has written software
+        breakpoints into the target's memory, or None if it can't tell us, in
+        which case memory is never read directly from the process. Adaptors
+        that implement `_local_pid()` implement this.
+        """
+        return None
+
+    # classes of values returned by `classify_pointers()`
+    pointer_classes = ['code', 'stack', 'heap', 'string', 'rodata', 'data', 'invalid', 'unknown']
+
+    def _words(self, address, count, target_id=0):
+        """
+        Read `count` pointer-sized words from memory at `address`.
+        """
+        info = self._target(target_id=target_id)
+        size = info['addr_size']
+        fmt = ('<' if info['byte_order'] == 'little' else '>') + {2: 'H', 4: 'L', 8: 'Q'}[size] * count
+        return struct.unpack(fmt, bytes(self.read_memory(address, size * count, target_id=target_id)))
+
+    @validate_busy
+    @validate_target
+    @lock_host
+    def dereference_many(self, pointers=None, address=None, count=None, target_id=0):
+        """
+        Recursively dereference a list of pointers for display.
+
+        `pointers` is a list of pointers to dereference
+        `address` and `count` can be given instead, to dereference each of
+        the `count` pointer-sized words in memory at `address`
+        `target_id` is a target ID (or None for the first target)
+
+        Returns a list of chains in the same format as `dereference()`, one
+        for each pointer. Memory reads go through the memory cache, and
+        pointers that are repeated or whose chains end at the same address
+        share their symbol lookups.
+        """
+        if pointers is None:
+            pointers = self._words(address, count, target_id=target_id)
+
+        memo = {}
+        chains = {}
+        for pointer in pointers:
+            if pointer not in chains:
+                chains[pointer] = self._dereference(pointer, target_id=target_id, memo=memo)
+        return [chains[pointer] for pointer in pointers]
+
+    def _dereference(self, pointer, target_id=0, memo=None):
+        """
+        Recursively dereference a pointer. Adaptors implement this, and look
+        up information about the end of the chain with `_pointer_info()`. By
+        default the chain is just the pointer itself.
+        """
+        return [('pointer', pointer)] + self._pointer_info(pointer, target_id=target_id, memo=memo)
+
+    def _pointer_chain(self, pointer, target_id=0, memo=None):
+        """
+        Follow a chain of pointers through the target's memory, for adaptors'
+        implementations of `_dereference()`.
+
+        The chain has a ('pointer', address) entry for each mapped address
+        that is read, followed by the entries from `_pointer_info()` for the
+        last of them. It ends at an address that isn't mapped or can't be
+        read, after `MAX_DEREF` pointers, or at a pointer back to an address
+        already in the chain, which adds a ('circular', 'circular') entry.
+        """
+        info = self._target(target_id=target_id)
+        size = info['addr_size']
+        fmt = ('<' if info['byte_order'] == 'little' else '>') + {2: 'H', 4: 'L', 8: 'Q'}[size]
+        memory_map = self._memory_map(target_id=target_id)
+
+        # read through the memory cache, as pointer chains tend to stay
+        # within a few pages
+        chain = []
+        visited = set()
+        circular = False
+        addr = pointer
+        while len(chain) < MAX_DEREF and memory_map.is_valid(addr, size):
+            try:
+                (ptr,) = struct.unpack(fmt, self.read_memory(addr, size, target_id=target_id))
+            except Exception:
+                break
+            chain.append(('pointer', addr))
+            visited.add(addr)
+            if ptr in visited:
+                circular = True
+                break
+            addr = ptr
+
+        # get some info for the last pointer
+        if chain:
+            chain.extend(self._pointer_info(chain[-1][1], target_id=target_id, memo=memo))
+        if circular:
+            chain.append(('circular', 'circular'))
+        return chain
+
+    @validate_busy
+    @validate_target
+    @lock_host
+    def classify_pointers(self, pointers=None, address=None, count=None, target_id=0):
+        """
+        Classify a list of values by what they point to.
+
+        `pointers` is a list of values to classify
+        `address` and `count` can be given instead, to classify each of the
+        `count` pointer-sized words in memory at `address`
+        `target_id` is a target ID (or None for the first target)
+
+        Returns a list with a dict for each value, like this:
+        {
+            "class":    "code",
+            "module":   "/bin/ls",
+            "symbol":   "main + 0x10"
+        }
+
+        The class is one of `pointer_classes`: "code", "stack", "heap",
+        "string" (read-only data that looks like a C string, which is
+        included as "string"), "rodata", "data" (writable data), "invalid"
+        (not mapped) or "unknown" (the debugger can't tell us the target's
+        memory map). "module" and "symbol" are included if they're known.
+
+        This only uses the memory map and symbol index, which are cached until
+        the target next stops, and the memory cache, so it's cheap enough to
+        classify every word in a view on every stop.
+        """
+        if pointers is None:
+            pointers = self._words(address, count, target_id=target_id)
+
+        classes = {}
+        for pointer in pointers:
+            if pointer not in classes:
+                classes[pointer] = self._classify_pointer(pointer, target_id=target_id)
+        return [classes[pointer] for pointer in pointers]
+
+    def _classify_pointer(self, value, target_id=0):
+        memory_map = self._memory_map(target_id=target_id)
+        symbol = self._symbol_index(target_id=target_id).symbolicate(value)
+        region = memory_map.find(value)
+        if region is None:
+            if symbol:
+                return {"class": "code", "symbol": symbol}
+            return {"class": "unknown" if not len(memory_map) else "invalid"}
+
+        perms = region['perms']
+        info = {}
+        if region['type'] == 'module':
+            info['module'] = region['file']
+        if symbol:
+            info['symbol'] = symbol
+
+        if perms and perms[0] != 'r':
+            info['class'] = 'invalid'
+        elif (perms and perms[2] == 'x') or (not perms and symbol):
+            info['class'] = 'code'
+        elif region['type'] in ('stack', 'heap'):
+            info['class'] = region['type']
+        elif perms and perms[1] != 'w':
+            string = self._read_string(value, min(64, region['end'] - value), target_id=target_id)
+            if string:
+                info['class'] = 'string'
+                info['string'] = string
+            else:
+                info['class'] = 'rodata'
+        else:
+            info['class'] = 'data'
+        return info
+
+    def _read_string(self, address, max_length, target_id=0, min_length=4):
+        """
+        Get the printable ASCII C string at `address`, or None if it doesn't
+        look like one.
+        """
+        try:
+            data = bytearray(self.read_memory(address, max_length, target_id=target_id))
+        except Exception:
+            return None
+        end = data.find(b'\0')
+        if end != -1:
+            data = data[:end]
+        if len(data) < min_length or any(c < 0x20 and c not in (0x09, 0x0a, 0x0d) or c > 0x7e for c in data):
+            return None
+        return data.decode('ascii')
+
+    @validate_busy
+    @validate_target
+    @lock_host
+    def symbolicate(self, addresses, target_id=0):
+        """
+        Find the symbols containing a list of addresses.
+
+        `addresses` is a list of addresses
+        `target_id` is a target ID (or None for the first target)
+
+        Returns a list with an entry for each address, which is None if no
+        symbol contains the address, or a dict like this:
+        {
+            "symbol":   "main",
+            "offset":   0x10,
+            "module":   "/bin/ls"
+        }
+
+        "module" is None if it isn't known.
+        """
+        index = self._symbol_index(target_id=target_id)
+        symbols = []
+        for address in addresses:
+            sym = index.lookup(address)
+            if sym:
+                module = index.module(address) if isinstance(index, ModuleSymbolIndex) else None
+                symbols.append({"symbol": sym[0], "offset": sym[1], "module": module['path'] if module else None})
+            else:
+                symbols.append(None)
+        return symbols
+
+    @stop_cached
+    def _symbol_index(self, target_id=0):
+        """
+        Get an index of the target's symbols.
+
+        This is a `ModuleSymbolIndex` built from the symbol indexes of the
+        modules the target has loaded, which are only built the first time a
+        module is seen. If no symbols can be found for any module this way
+        (e.g. the target is remote and its files aren't available locally) a
+        `SymbolIndex` of the symbols from `_symbols()` is used instead.
+        """
+        modules = []
+        for module in self._modules(target_id=target_id):
+            key = module['key']
+            if key not in self.module_symbols:
+                self.module_symbols[key] = self._load_module_symbols(module, target_id=target_id)
+            symbols, link_base = self.module_symbols[key]
+            modules.append(dict(module, symbols=symbols, link_base=link_base))
+
+        index = ModuleSymbolIndex(modules)
+        if len(index):
+            return index
+        return SymbolIndex(self._symbols(target_id=target_id),
+                           size_of=lambda address: self._symbol_size(address, target_id=target_id))
+
+    def _load_module_symbols(self, module, target_id=0):
+        """
+        Get the symbol index and link base for a module from the disk cache,
+        or build them with `_module_symbols()` and store them in the disk
+        cache.
+        """
+        path = None
+        if self.disk_cache:
+            path = self.disk_cache.path_for(self._module_build_id(module), 'symbols')
+            try:
+                return SymbolIndex.load(path)
+            except (IOError, OSError, ValueError, struct.error):
+                pass
+
+        try:
+            symbols, link_base = self._module_symbols(module, target_id=target_id)
+        except Exception as e:
+            log.debug("Couldn't get symbols for {}: {}".format(module['path'], e))
+            return SymbolIndex([]), module['start']
+
+        index = SymbolIndex(symbols)
+        if path:
+            try:
+                self.disk_cache.write(self._module_build_id(module), 'symbols', index.save(link_base))
+            except (IOError, OSError) as e:
+                log.debug("Couldn't cache symbols for {}: {}".format(module['path'], e))
+        return index, link_base
+
+    def _module_build_id(self, module):
+        """
+        Get an ID for a module's file to key the disk cache with. This is the
+        module's "build_id" if `_modules()` included one, the GNU build ID of
+        its ELF file, or failing that a hash of its key.
+        """
+        build_id = module.get('build_id')
+        if not build_id:
+            try:
+                elf = ELFFile(module['path'])
+                try:
+                    build_id = elf.build_id
+                finally:
+                    elf.close()
+            except Exception:
+                pass
+        if not build_id:
+            build_id = hashlib.sha1(repr(module['key']).encode('utf-8')).hexdigest()
+        return build_id
+
+    def _modules(self, target_id=0):
+        """
+        Get a list of the modules the target has loaded, as dicts with the
+        "path" of the module, the "start" and "end" of the range of memory
+        it's loaded at, and a "key" that identifies the module's file. A
+        "build_id" can be included to key the disk cache with.
+
+        By default the modules are found in the memory map, and the key is the
+        path, size and modification time of the file, so only files that can
+        be read locally are included. Adaptors can implement this if the
+        debugger can tell us about its modules.
+        """
+        ranges = OrderedDict()
+        for region in self._memory_map(target_id=target_id).regions:
+            path = region['file']
+            if region['type'] != 'module' or path.startswith('['):
+                continue
+            start, end = ranges.get(path, (region['start'], region['end']))
+            ranges[path] = (min(start, region['start']), max(end, region['end']))
+
+        modules = []
+        for path, (start, end) in ranges.items():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            modules.append({"path": path, "start": start, "end": end, "key": (path, st.st_size, st.st_mtime)})
+        return modules
+
+    def _module_symbols(self, module, target_id=0):
+        """
+        Get the symbols for a module returned by `_modules()`, as a list of
+        (address, size, name) tuples with the addresses in the module's file,
+        and the file address that is loaded at the module's "start".
+
+        By default the symbols are read from the module's ELF file. Adaptors
+        can implement this if the debugger can tell us about the symbols.
+        """
+        elf = ELFFile(module['path'])
+        try:
+            return elf.symbols(), elf.load_base
+        finally:
+            elf.close()
+
+    def _symbols(self, target_id=0):
+        """
+        Get a list of (address, size, name) tuples for the target's symbols,
+        for when symbols can't be found for its modules. Adaptors implement
+        this if the debugger can list symbols.
+        """
+        return []
+
+    def _symbol_size(self, address, target_id=0):
+        """
+        Get the size of the symbol at `address` from `_symbols()` that had no
+        size, or 0 if it isn't known. This is only called for the symbols that
+        lookups need, so adaptors can implement it if finding a symbol's size
+        is too expensive to do for all of them.
+        """
+        return 0
+
+    def _pointer_info(self, addr, target_id=0, memo=None):
+        """
+        Get the entries describing the address at the end of a chain of
+        pointers (e.g. its symbol), looking them up with
+        `_describe_pointer()` unless they're already in `memo`.
+        """
+        if memo is None:
+            return self._describe_pointer(addr, target_id=target_id)
+        if addr not in memo:
+            memo[addr] = self._describe_pointer(addr, target_id=target_id)
+        return memo[addr]
+
+    def _describe_pointer(self, addr, target_id=0):
+        """
+        Get a list of entries describing an address for a dereference chain.
+        Adaptors implement this if the debugger knows more about addresses
+        than the chain itself.
+        """
+        return []
+
+    @validate_busy
+    @validate_target
+    @lock_host
+    def memory_map(self, target_id=0):
+        """
+        Get the target's mapped memory regions.
+
+        `target_id` is a target ID (or None for the first target)
+
+        Returns a list of regions sorted by address, like this:
+        [
+            {
+                "start":    0x400000,
+                "end":      0x401000,
+                "perms":    "r-x",
+                "file":     "/bin/ls",
+                "type":     "module"
+            }
+        ]
+
+        See `MemoryMap` for the types of region. This is cached until the
+        target next stops, continues or exits.
+        """
+        return self._memory_map(target_id=target_id).regions
+
+    @stop_cached
+    def _memory_map(self, target_id=0):
+        """
+        Get a `MemoryMap` of the target's regions.
+        """
+        regions = self._memory_regions(target_id=target_id)
+        try:
+            sp = self.context(target_id=target_id)['sp']
+        except Exception:
+            sp = None
+        return MemoryMap(regions, sp=sp)
+
+    def _memory_regions(self, target_id=0):
+        """
+        Get a list of the target's mapped regions, as described in
+        `memory_map()` but without the "type", or an empty list if the
+        debugger can't tell us. Adaptors implement this.
+        """
+        return []
+
+    @validate_busy
+    @validate_target
+    @lock_host
+    def instructions(self, target_id=0, address=None, count=16):
+        """
+        Disassemble instructions into records that can be inspected without
+        parsing the debugger's disassembly.
+
+        `target_id` is a target ID (or None for the first target)
+        `address` is the address at which to disassemble. If None, the
+        current program counter is used.
+        `count` is the number of instructions to disassemble.
+
+        Returns a list of records like this:
+        [
+            {
+                "address":  0x401126,
+                "bytes":    "e805ffffff",
+                "size":     5,
+                "mnemonic": "call",
+                "operands": "0x401030",
+                "comment":  null,
+                "target":   0x401030,
+                "symbol":   "puts + 0x0"
+            }
+        ]
+
+        "target" is the address the instruction branches to, if it's a branch
+        to an immediate address, and "symbol" is the symbol containing the
+        target. Use `format_instructions()` to get them as text.
+        """
+        if address is None:
+            pc_name, address = self.program_counter(target_id=target_id)
+
+        return self._with_target_symbols(self._decoded_instructions(address, count, target_id=target_id),
+                                         target_id=target_id)
+
+    def _with_target_symbols(self, records, target_id=0):
+        """
+        Copy instruction records with the "symbol" containing each one's
+        branch target filled in from the symbol index, falling back to the
+        symbol the debugger printed, if any.
+        """
+        index = self._symbol_index(target_id=target_id)
+        result = []
+        for record in records:
+            record = dict(record)
+            if record['target'] is not None:
+                record['symbol'] = index.symbolicate(record['target']) or record.get('symbol')
+            else:
+                record['symbol'] = None
+            result.append(record)
+        return result
+
+    def _decoded_instructions(self, address, count, target_id=0):
+        """
+        Get records for `count` instructions from `address` as returned by
+        `_instructions()`, with their branch targets, from the instruction
+        cache where possible.
+
+        Cached instructions are only used if their code bytes are the same as
+        the target's memory, which is checked with a single read of the
+        cached run through the memory cache. The rest are decoded by the
+        debugger and cached.
+        """
+        cache = self.instruction_cache(target_id)
+        run = cache.run(address, count) if cache is not None else []
+        cached = len(run)
+
+        # carry on from the instructions of the module kept in the disk cache
+        end = run[-1][1]['address'] + run[-1][1]['size'] if run else address
+        index = self._module_instructions(end, target_id=target_id) if len(run) < count else None
+        if index is not None:
+            run += [(bytes(bytearray.fromhex(r['bytes'])), r) for r in index.run(end, count - len(run))]
+
+        records = []
+        if run:
+            end = run[-1][1]['address'] + run[-1][1]['size']
+            try:
+                memory = self.read_memory(address, end - address, target_id=target_id)
+            except Exception:
+                memory = b''
+            for code, record in run:
+                offset = record['address'] - address
+                if memory[offset:offset + len(code)] != code:
+                    if cache is not None:
+                        cache.discard(record['address'])
+                    break
+                records.append(record)
+            if cache is not None:
+                cache.store(records[cached:])
+
+        if len(records) < count:
+            start = records[-1]['address'] + records[-1]['size'] if records else address
+            decoded = self._instructions(start, count - len(records), target_id=target_id)
+            for record in decoded:
+                if record.get('target') is None:
+                    record['target'] = branch_target(record['mnemonic'], record['operands'])
+                record.setdefault('comment', None)
+            if cache is not None:
+                cache.store(decoded)
+            index = self._module_instructions(start, target_id=target_id)
+            if index is not None:
+                index.add(decoded)
+            records += decoded
+        return records
+
+    def _module_instructions(self, address, target_id=0):
+        """
+        Get the `InstructionIndex` of the module containing `address` from
+        the disk cache, or a new one if the module's instructions haven't
+        been cached. Returns None if the disk cache is disabled or the
+        address isn't in a known module.
+        """
+        if not self.disk_cache:
+            return None
+        index = self._symbol_index(target_id=target_id)
+        module = index.module(address) if isinstance(index, ModuleSymbolIndex) else None
+        if module is None:
+            return None
+        key = (module['key'], module['start'])
+        if key not in self.module_instructions:
+            build_id = self._module_build_id(module)
+            try:
+                instructions = InstructionIndex.load(self.disk_cache.path_for(build_id, 'instructions'),
+                                                     module['start'])
+            except (IOError, OSError, ValueError, struct.error):
+                instructions = InstructionIndex(module['start'], module['end'] - module['start'])
+            self.module_instructions[key] = (build_id, instructions)
+        return self.module_instructions[key][1]
+
+    def _save_instructions(self):
+        """
+        Queue the instructions of modules that have been decoded since they
+        were last saved to be written to the disk cache by an
+        `InstructionIndexWriter`, which is started the first time there are
+        any.
+        """
+        for build_id, index in list(self.module_instructions.values()):
+            if index.dirty:
+                if self.instruction_writer is None:
+                    self.instruction_writer = InstructionIndexWriter(self.disk_cache)
+                    self.instruction_writer.start()
+                self.instruction_writer.add(build_id, index)
+
+    @validate_busy
+    @validate_target
+    @lock_host
+    def disassembly_window(self, target_id=0, address=None, offset=0, count=16, prefetch=False):
+        """
+        Disassemble a window of instructions around an address, for views
+        that scroll through code.
+
+        `target_id` is a target ID (or None for the first target)
+        `address` is the address the window is anchored at. If None, the
+        current program counter is used.
+        `offset` is the number of instructions from the anchor to the start
+        of the window, which is negative to start before the anchor.
+        `count` is the number of instructions in the window.
+        `prefetch` is whether to decode the windows either side of this one,
+        so scrolling to them is quick.
+
+        Returns a dict like this:
+        {
+            "address":      0x401126,
+            "function":     {"name": "main", "start": 0x401120, "end": 0x401180},
+            "instructions": [ ... ]
+        }
+
+        "function" is the symbol containing the anchor, or None. The
+        instructions are records as returned by `instructions()`. There can
+        be fewer than `count` if the window runs into memory that can't be
+        disassembled. Scrolling is done by moving the offset by `count` with
+        the same anchor.
+        """
+        if address is None:
+            pc_name, address = self.program_counter(target_id=target_id)
+
+        # the instructions before the anchor, then the rest from the anchor
+        if offset < 0:
+            records = self._instructions_before(address, -offset, target_id=target_id)[:count]
+            skip = 0
+        else:
+            records = []
+            skip = offset
+        if len(records) < count:
+            records += self._decoded_instructions(address, skip + count - len(records), target_id=target_id)[skip:]
+
+        if prefetch and records:
+            self._instructions_before(records[0]['address'], count, target_id=target_id)
+            self._decoded_instructions(records[-1]['address'] + records[-1]['size'], count, target_id=target_id)
+
+        sym = self._symbol_index(target_id=target_id).bounds(address)
+        return {
+            "address":      address,
+            "function":     {"name": sym[0], "start": sym[1], "end": sym[2]} if sym else None,
+            "instructions": self._with_target_symbols(records, target_id=target_id)
+        }
+
+    # the size of the code that is analysed when asked for the control flow
+    # graph of an address that isn't in a function
+    max_cfg_size = 0x1000
+
+    @validate_busy
+    @validate_target
+    @lock_host
+    def function_cfg(self, target_id=0, address=None):
+        """
+        Get the control flow graph of the function containing an address.
+
+        `target_id` is a target ID (or None for the first target)
+        `address` is an address in the function. If None, the current program
+        counter is used.
+
+        Returns a dict like this:
+        {
+            "address":  0x401126,
+            "function": {"name": "main", "start": 0x401120, "end": 0x401180},
+            "blocks":   [ ... ],
+            "edges":    [ ... ]
+        }
+
+        The blocks and edges are as returned by `recover_cfg()`, with the
+        instructions as returned by `instructions()`. "function" is None if
+        no symbol contains the address, in which case the graph is of the
+        code reachable from the address.
+
+        Graphs are cached by the module and the function's offset in it, so a
+        function is only analysed again if its code changes (which is checked
+        with a read of the function through the memory cache) or it's in a
+        module that is loaded from a different file.
+        """
+        if address is None:
+            pc_name, address = self.program_counter(target_id=target_id)
+
+        index = self._symbol_index(target_id=target_id)
+        sym = index.bounds(address)
+        if sym:
+            name, start, end = sym
+        else:
+            name, start, end = None, address, address + self.max_cfg_size
+        module = index.module(start) if isinstance(index, ModuleSymbolIndex) else None
+        if module:
+            key = (module['key'], start - module['start'], end - start)
+        else:
+            key = (target_id, start, end - start)
+
+        cfg = self.function_cfgs.pop(key, None)
+        if cfg is not None:
+            cfg = rebase_cfg(cfg, start)
+            if not self._cfg_is_current(cfg, start, end, target_id=target_id):
+                cfg = None
+        if cfg is None:
+            def decode(addr):
+                try:
+                    return self._decoded_instructions(addr, 32, target_id=target_id)
+                except Exception:
+                    return []
+            cfg = recover_cfg(decode, start, end)
+        self.function_cfgs[key] = rebase_cfg(cfg, -start)
+        while len(self.function_cfgs) > 256:
+            self.function_cfgs.popitem(last=False)
+
+        for block in cfg['blocks']:
+            block['instructions'] = self._with_target_symbols(block['instructions'], target_id=target_id)
+        return {
+            "address":  address,
+            "function": {"name": name, "start": start, "end": end} if name else None,
+            "blocks":   cfg['blocks'],
+            "edges":    cfg['edges']
+        }
+
+    def _cfg_is_current(self, cfg, start, end, target_id=0):
+        """
+        Check that the code in a cached control flow graph is the same as the
+        code in the target's memory.
+        """
+        try:
+            memory = self.read_memory(start, end - start, target_id=target_id)
+        except Exception:
+            return False
+        for block in cfg['blocks']:
+            for record in block['instructions']:
+                offset = record['address'] - start
+                if memory[offset:offset + record['size']] != bytes(bytearray.fromhex(record['bytes'])):
+                    return False
+        return True
+
+    @validate_busy
+    @validate_target
+    @lock_host
+    def xrefs(self, address, types=None, target_id=0):
+        """
+        Get the xrefs to an address from the code in the module it's in.
+
+        `address` is the address to find xrefs to
+        `types` is a list of the types of xref to include ("call", "jump"
+        or "data"), or None for all of them
+        `target_id` is a target ID (or None for the first target)
+
+        Returns a dict like this:
+        {
+            "xrefs": [
+                {"from": 0x401146, "type": "call", "symbol": "main + 0x26"}
+            ],
+            "pending":      [],
+            "unavailable":  []
+        }
+
+        Modules are indexed in the background by an `XrefIndexer`, which is
+        started by the first call and queues all of the target's modules, so
+        this returns immediately. "pending" lists the paths of the modules
+        that haven't been indexed yet, which will be in later results, and
+        "unavailable" the ones that can't be indexed (e.g. because capstone
+        isn't installed), whose xrefs will never be found. Only xrefs from
+        the same module are found, so calls from other modules through a PLT
+        are xrefs to the PLT entry.
+        """
+        if not self.xref_index_enabled:
+            raise Exception("The xref index is disabled (see debugger.xref_index in the config)")
+        if self.xref_indexer is None:
+            self.xref_indexer = XrefIndexer(self._xref_decoder, disk_cache=self.disk_cache,
+                                            build_id=self._module_build_id)
+            self.xref_indexer.start()
+
+        index = self._symbol_index(target_id=target_id)
+        xrefs = []
+        pending = []
+        unavailable = []
+        for module in self._modules(target_id=target_id):
+            self.xref_indexer.add(module)
+            if not module['start'] <= address < module['end']:
+                continue
+            result = self.xref_indexer.index(module['key'])
+            if result is None:
+                pending.append(module['path'])
+                continue
+            if result is False:
+                unavailable.append(module['path'])
+                continue
+            xref_index, link_base = result
+            delta = module['start'] - link_base
+            for source, kind in xref_index.lookup(address - delta):
+                if types and kind not in types:
+                    continue
+                source += delta
+                xrefs.append({"from": source, "type": kind, "symbol": index.symbolicate(source)})
+        return {"xrefs": xrefs, "pending": pending, "unavailable": unavailable}
+
+    def _xref_decoder(self, arch):
+        """
+        Get a decoder for the xref indexer (see `build_xref_index()`) for an
+        architecture, or None if it can't be decoded. This is called from the
+        indexer's thread, so it mustn't use the debugger. By default the
+        decoder uses capstone, if it's installed.
+        """
+        return capstone_decoder(arch)
+
+    @validate_busy
+    @validate_target
+    @lock_host
+    def backtrace(self, target_id=0, thread_id=None, depth=None):
+        """
+        Get the frames on a thread's stack.
+
+        `target_id` is a target ID (or None for the first target)
+        `thread_id` is a thread ID (or None for the selected thread)
+        `depth` is the maximum number of frames to return, or None for the
+        `debugger.backtrace_depth` config setting
+
+        Returns a dict like this:
+        {
+            "frames": [
+                {
+                    "index":    0,
+                    "pc":       0x401126,
+                    "sp":       0x7fffffffe3f0,
+                    "fp":       0x7fffffffe400,
+                    "function": "main",
+                    "offset":   0x6,
+                    "module":   "/tmp/inferior",
+                    "file":     "/tmp/inferior.c",
+                    "line":     12
+                }
+            ],
+            "truncated": false,
+            "unwinder":  "debugger"
+        }
+
+        Frames are unwound by the debugger (see `_frames()`). If it can't
+        unwind past the first frame, which is usually because there's no
+        debug or unwind info, the chain of saved frame pointers is followed
+        instead and "unwinder" is "frame_pointer". "truncated" is true if
+        there were more than `depth` frames.
+
+        The "function", "offset", "module", "file" and "line" of each frame
+        are None if they aren't known, and are cached by the frame's address
+        (see `_frame_symbol()`).
+        """
+        if depth is None:
+            depth = self.backtrace_depth
+
+        unwinder = 'debugger'
+        frames = self._frames(depth + 1, target_id=target_id, thread_id=thread_id)
+        if len(frames) <= 1:
+            fp_frames = self._frame_pointer_frames(depth + 1, target_id=target_id, thread_id=thread_id)
+            if len(fp_frames) > len(frames):
+                frames, unwinder = fp_frames, 'frame_pointer'
+
+        records = []
+        for i, frame in enumerate(frames[:depth]):
+            record = {"index": i, "pc": frame['pc'], "sp": frame['sp'], "fp": frame['fp']}
+            record.update(self._frame_symbol(frame['pc'], caller=i > 0, target_id=target_id))
+            records.append(record)
+        return {"frames": records, "truncated": len(frames) > depth, "unwinder": unwinder}
+
+    def _frame_pointer_frames(self, count, target_id=0, thread_id=None):
+        """
+        Unwind up to `count` frames by following the chain of saved frame
+        pointers, where each frame pointer points at the caller's saved frame
+        pointer followed by the return address. This is what x86 and AArch64
+        code compiled with frame pointers does. The chain ends when a read
+        fails or the next frame isn't further up the stack.
+        """
+        pc_name, pc = self.program_counter(target_id=target_id, thread_id=thread_id)
+        sp_name, sp = self.stack_pointer(target_id=target_id, thread_id=thread_id)
+        fp_name, fp = self.frame_pointer(target_id=target_id, thread_id=thread_id)
+        size = self._target(target_id=target_id)['addr_size']
+
+        frames = [{"pc": pc, "sp": sp, "fp": fp}]
+        while len(frames) < count and sp <= fp and not fp % size:
+            try:
+                saved_fp, ret = self._words(fp, 2, target_id=target_id)
+            except Exception:
+                break
+            if not ret:
+                break
+            sp = fp + 2 * size
+            frames.append({"pc": ret, "sp": sp, "fp": saved_fp})
+            if saved_fp <= fp:
+                break
+            fp = saved_fp
+        return frames
+
+    def _frame_symbol(self, pc, caller=False, target_id=0):
+        """
+        Get the "function", "offset", "module", "file" and "line" of a frame
+        at `pc` as a dict.
+
+        `caller` is true if `pc` is a return address, in which case the
+        instruction before it is looked up, as the call may be the last
+        instruction in its function.
+
+        These are cached by the module and the offset of the address in it
+        like control flow graphs are, so each address is only looked up in
+        the symbol index and the debugger's line tables once.
+        """
+        address = pc - 1 if caller else pc
+        index = self._symbol_index(target_id=target_id)
+        module = index.module(address) if isinstance(index, ModuleSymbolIndex) else None
+        if module:
+            key = (module['key'], address - module['start'], caller)
+        else:
+            key = (target_id, address, caller)
+
+        symbol = self.frame_symbols.pop(key, None)
+        if symbol is None:
+            sym = index.lookup(address)
+            try:
+                source = self._frame_source(address, target_id=target_id)
+            except Exception:
+                source = None
+            symbol = {
+                "function": sym[0] if sym else None,
+                "offset":   sym[1] + pc - address if sym else None,
+                "module":   module['path'] if module else None,
+                "file":     source[0] if source else None,
+                "line":     source[1] if source else None
+            }
+        self.frame_symbols[key] = symbol
+        while len(self.frame_symbols) > 4096:
+            self.frame_symbols.popitem(last=False)
+        return dict(symbol)
+
+    def _frames(self, count, target_id=0, thread_id=None):
+        """
+        Unwind up to `count` frames of a thread's stack with the debugger's
+        unwinder, as a list of dicts with the "pc", "sp" and "fp" of each
+        frame, innermost first. Adaptors implement this if the debugger has
+        an unwinder, otherwise the frame pointer chain is followed.
+        """
+        return []
+
+    def _frame_source(self, address, target_id=0):
+        """
+        Get the source file and line of the code at `address` as a tuple, or
+        None if there's no debug info for it. Adaptors implement this if the
+        debugger can read line tables.
+        """
+        return None
+
+    def _instructions_before(self, address, count, target_id=0):
+        """
+        Get records for up to `count` instructions that come before
+        `address`, as returned by `_decoded_instructions()`.
+
+        Instruction boundaries can't be found by decoding backwards, so the
+        instructions are found by decoding forwards from the start of the
+        symbol containing them (see `_function_layout()`). If there's no
+        symbol, they are found by decoding from a little before `address`
+        until a start lands on it (see `_sync_backwards()`).
+        """
+        records = []
+        while len(records) < count:
+            need = count - len(records)
+            sym = self._symbol_index(target_id=target_id).bounds(address - 1)
+            run = None
+            if sym:
+                for retry in (False, True):
+                    addresses = self._function_layout(sym[1], address, rebuild=retry, target_id=target_id)
+                    if not addresses:
+                        break
+                    i = max(0, len(addresses) - need)
+                    run = self._decoded_instructions(addresses[i], len(addresses) - i, target_id=target_id)
+                    if run and run[-1]['address'] + run[-1]['size'] == address:
+                        break
+                    run = None
+            if run is None:
+                run = self._sync_backwards(address, need, target_id=target_id)
+            if not run:
+                break
+            records = run + records
+            address = run[0]['address']
+        return records[-count:] if records else []
+
+    # the size of instructions on architectures where they're all the same size
+    fixed_instruction_sizes = {'arm64': 4, 'aarch64': 4, 'powerpc': 4}
+
+    def _function_layout(self, start, address, rebuild=False, target_id=0):
+        """
+        Get the addresses of the instructions from the function starting at
+        `start` up to `address`, or None if `address` isn't the start of an
+        instruction when the function is decoded from its start.
+
+        The addresses are cached per function, and only decoded as far as
+        they've been needed. `rebuild` throws away what is cached, for when
+        the code has changed.
+        """
+        key = (target_id, start)
+        layout = self.function_layouts.pop(key, None)
+        if layout is None or rebuild:
+            layout = ([], start)
+        addresses, end = layout
+        while end < address:
+            try:
+                decoded = self._decoded_instructions(end, 64, target_id=target_id)
+            except Exception:
+                decoded = []
+            if not decoded:
+                break
+            for record in decoded:
+                if record['address'] != end:
+                    break
+                addresses.append(end)
+                end += record['size']
+        self.function_layouts[key] = (addresses, end)
+        while len(self.function_layouts) > 4096:
+            self.function_layouts.popitem(last=False)
+
+        i = bisect.bisect_left(addresses, address)
+        if (i < len(addresses) and addresses[i] == address) or end == address:
+            return addresses[:i]
+        return None
+
+    def _sync_backwards(self, address, count, target_id=0):
+        """
+        Get records for up to `count` instructions before `address` without
+        knowing where any of them start.
+
+        On architectures with fixed size instructions this is easy. Otherwise
+        a few start addresses before `address` are tried, and the first one
+        whose instructions land on `address` is used. Instruction streams
+        tend to resynchronise after a few instructions, so this is usually
+        right for all but the first few instructions.
+        """
+        memory_map = self._memory_map(target_id=target_id)
+        try:
+            size = self.fixed_instruction_sizes.get(self._target(target_id=target_id)['arch'])
+        except Exception:
+            size = None
+        if size:
+            starts = [address - count * size]
+        else:
+            starts = [address - back for back in range(count * 3, count * 3 + 16)]
+
+        for start in starts:
+            start = max(start, 0)
+            if start >= address or not memory_map.is_valid(start, address - start):
+                continue
+            try:
+                decoded = self._decoded_instructions(start, address - start, target_id=target_id)
+            except Exception:
+                continue
+            run = []
+            for record in decoded:
+                if record['address'] >= address:
+                    break
+                run.append(record)
+            if run and run[-1]['address'] + run[-1]['size'] == address:
+                return run[-count:]
+        return []
+
+    def _instructions(self, address, count, target_id=0):
+        """
+        Decode `count` instructions from `address` into records as described
+        in `instructions()`. The "target" and "symbol" can be left out if the
+        debugger doesn't know them, in which case they are worked out from
+        the operands. Adaptors implement this.
+        """
+        raise NotImplementedError()
+
+    def _local_pid(self, target_id=0):
+        """
+        Get the process ID of the target if it's a process on this machine,
+        or None. Adaptors that can read memory directly from a local process
+        implement this.
+        """
+        return None
+
+    def _read_memory(self, address, length, target_id=0):
+        """
+        Read memory from the target through the debugger.
+        """
+        raise NotImplementedError()
+
+    def invalidate(self):
+        """
+        Throw away everything that has been cached for the current stop (see
+        the `stop_cached` decorator) and start a new stop epoch.
+
+        This is called by `update_state()` when the target stops, and by the
+        debugger's hooks when the target continues or exits, or when new
+        modules are loaded. It also empties the memory cache, but not the
+        instruction cache, whose entries are checked against memory when
+        they're used, and queues newly decoded instructions of modules to be
+        written to the disk cache.
+        """
+        self.epoch += 1
+        self._stop_cache = {}
+        for cache in self.memory_caches.values():
+            cache.invalidate()
+        self._save_instructions()
+
+    # element types the bytes of each class of vector register can be viewed
+    # as, and the size of the registers in bytes (None if it depends on the
+    # target's vector length)
+    vector_layouts = {
+        'x86': {
+            'ymm':  {'size': 32, 'elements': ['i8', 'i16', 'i32', 'i64', 'f32', 'f64']},
+            'zmm':  {'size': 64, 'elements': ['i8', 'i16', 'i32', 'i64', 'f32', 'f64']},
+            'k':    {'size': 8, 'elements': ['i8', 'i16', 'i32', 'i64']},
+        },
+        'arm': {
+            'q':    {'size': 16, 'elements': ['i8', 'i16', 'i32', 'i64', 'f32', 'f64']},
+        },
+        'arm64': {
+            'v':    {'size': 16, 'elements': ['i8', 'i16', 'i32', 'i64', 'f16', 'f32', 'f64']},
+            'z':    {'size': None, 'elements': ['i8', 'i16', 'i32', 'i64', 'f16', 'f32', 'f64']},
+            'p':    {'size': None, 'elements': ['i8']},
+        },
+    }
+    vector_layouts['x86_64'] = vector_layouts['x86']
+    vector_register_pattern = re.compile(r'^(ymm|zmm|k|q|v|z|p)\d+$')
+
+    def vector_register_class(self, arch, name):
+        """
+        Return the class of vector register (a key in `vector_layouts`) that a
+        register is in, or None if it isn't a vector register.
+
+        Vector registers are returned by `registers()` as bytearrays of their
+        little-endian contents rather than as ints.
+
+        `arch` is the target's architecture
+        `name` is a register name (e.g. 'ymm0', 'v1', 'z2')
+        """
+        if name == 'ffr':
+            cls = 'p'
+        else:
+            m = self.vector_register_pattern.match(name)
+            cls = m.group(1) if m else None
+        if cls in self.vector_layouts.get(arch, {}):
+            return cls
+        return None
+
+    def register_category(self, name):
+        """
+        Return the category a register is in, based on its name.
+
+        `name` is a register name (e.g. 'rax', 'xmm0', 'cpsr')
+        """
+        for category, pattern in self.register_category_patterns:
+            if pattern.match(name):
+                return category
+        return 'general'
 
     def target_exists(self, target_id=0):
         """
@@ -144,7 +2489,11 @@ class DebuggerAdaptor(object):
 
         This is called by the debugger's stop-hook.
         """
-        for listener in self.listeners:
+        self.invalidate()
+
+        # listeners (ie. wait requests) remove themselves when called, so
+        # iterate over a copy
+        for listener in list(self.listeners):
             listener['callback']()
 
     def register_command_plugin(self, name, cls):
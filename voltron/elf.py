@@ -0,0 +1,180 @@
+"""
+A minimal ELF reader for getting symbols and load information from the
+binaries a target has mapped, without going through the debugger.
+
+Files are memory-mapped, so only the headers, symbol tables and string
+tables are actually read.
+"""
+import mmap
+import struct
+import logging
+
+log = logging.getLogger('debugger')
+
+PT_LOAD = 1
+PT_NOTE = 4
+SHT_SYMTAB = 2
+SHT_DYNSYM = 11
+SHT_NOBITS = 8
+SHF_ALLOC = 0x2
+SHF_EXECINSTR = 0x4
+SHN_UNDEF = 0
+STT_OBJECT = 1
+STT_FUNC = 2
+STT_GNU_IFUNC = 10
+NT_GNU_BUILD_ID = 3
+
+
+class NotAnELFFileError(Exception):
+    pass
+
+
+class ELFFile(object):
+    """
+    An ELF file.
+
+    `path` is the path to the file. Raises `NotAnELFFileError` if it isn't
+    an ELF file, or IOError/OSError if it can't be read.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise NotAnELFFileError("Empty file")
+
+        if self.data[:4] != b'\x7fELF':
+            raise NotAnELFFileError("Bad magic")
+        self.is64 = self.data[4:5] == b'\x02'
+        self.endian = '<' if self.data[5:6] == b'\x01' else '>'
+
+        if self.is64:
+            (self.type, self.machine, _, self.entry, phoff, shoff, _, _, phentsize, phnum, shentsize, shnum,
+             self.shstrndx) = struct.unpack_from(self.endian + 'HHIQQQIHHHHHH', self.data, 16)
+        else:
+            (self.type, self.machine, _, self.entry, phoff, shoff, _, _, phentsize, phnum, shentsize, shnum,
+             self.shstrndx) = struct.unpack_from(self.endian + 'HHIIIIIHHHHHH', self.data, 16)
+
+        self.segments = [self._segment(phoff + i * phentsize) for i in range(phnum)]
+        self.sections = [self._section(shoff + i * shentsize) for i in range(shnum)]
+
+    def close(self):
+        self.data.close()
+
+    def _segment(self, offset):
+        if self.is64:
+            p_type, flags, p_offset, vaddr, _, filesz, memsz, align = \
+                struct.unpack_from(self.endian + 'IIQQQQQQ', self.data, offset)
+        else:
+            p_type, p_offset, vaddr, _, filesz, memsz, flags, align = \
+                struct.unpack_from(self.endian + 'IIIIIIII', self.data, offset)
+        return {'type': p_type, 'offset': p_offset, 'vaddr': vaddr, 'filesz': filesz, 'memsz': memsz,
+                'flags': flags, 'align': align}
+
+    def _section(self, offset):
+        if self.is64:
+            name, sh_type, flags, addr, sh_offset, size, link, info, align, entsize = \
+                struct.unpack_from(self.endian + 'IIQQQQIIQQ', self.data, offset)
+        else:
+            name, sh_type, flags, addr, sh_offset, size, link, info, align, entsize = \
+                struct.unpack_from(self.endian + 'IIIIIIIIII', self.data, offset)
+        return {'name': name, 'type': sh_type, 'flags': flags, 'addr': addr, 'offset': sh_offset, 'size': size,
+                'link': link, 'entsize': entsize}
+
+    def _string(self, table, offset):
+        start = self.sections[table]['offset'] + offset
+        end = self.data.find(b'\0', start)
+        return self.data[start:end].decode('utf-8', 'replace')
+
+    @property
+    def load_base(self):
+        """
+        The lowest virtual address of the file's loadable segments, ie. the
+        address the start of the file is mapped at if it isn't relocated.
+        """
+        loads = [s['vaddr'] - s['offset'] for s in self.segments if s['type'] == PT_LOAD]
+        return min(loads) if loads else 0
+
+    @property
+    def build_id(self):
+        """
+        The file's GNU build ID as a hex string, or None.
+        """
+        for seg in self.segments:
+            if seg['type'] != PT_NOTE:
+                continue
+            offset, end = seg['offset'], seg['offset'] + seg['filesz']
+            while offset + 12 <= end:
+                namesz, descsz, n_type = struct.unpack_from(self.endian + 'III', self.data, offset)
+                name_off = offset + 12
+                desc_off = name_off + ((namesz + 3) & ~3)
+                if n_type == NT_GNU_BUILD_ID and self.data[name_off:name_off + namesz] == b'GNU\0':
+                    desc = bytearray(self.data[desc_off:desc_off + descsz])
+                    return ''.join('{:02x}'.format(b) for b in desc)
+                offset = desc_off + ((descsz + 3) & ~3)
+        return None
+
+    def executable_sections(self):
+        """
+        Get the file's executable sections as a list of (address, data)
+        tuples, with the addresses as they are in the file.
+        """
+        return [(s['addr'], self.data[s['offset']:s['offset'] + s['size']]) for s in self.sections
+                if s['flags'] & SHF_EXECINSTR and s['type'] != SHT_NOBITS and s['size']]
+
+    def allocated_ranges(self):
+        """
+        Get the ranges of addresses taken up by the file's sections when it's
+        loaded as a sorted list of (start, end) tuples, with the addresses as
+        they are in the file. Adjacent and overlapping sections are merged.
+        """
+        ranges = []
+        for start, end in sorted((s['addr'], s['addr'] + s['size']) for s in self.sections
+                                 if s['flags'] & SHF_ALLOC and s['size']):
+            if ranges and start <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end))
+            else:
+                ranges.append((start, end))
+        return ranges
+
+    @property
+    def machine_name(self):
+        """
+        The name of the file's architecture as used for targets (e.g.
+        "x86_64"), or None if it isn't one we know about.
+        """
+        return {3: 'x86', 62: 'x86_64', 40: 'arm', 183: 'arm64', 20: 'powerpc'}.get(self.machine)
+
+    def symbols(self):
+        """
+        Get the file's defined function and object symbols from its .symtab,
+        or its .dynsym if it's been stripped.
+
+        Returns a list of (address, size, name) tuples, with addresses as
+        they are in the file (ie. not relocated).
+        """
+        symbols = []
+        for sh_type in (SHT_SYMTAB, SHT_DYNSYM):
+            for section in self.sections:
+                if section['type'] == sh_type and section['entsize']:
+                    symbols.extend(self._symbols(section))
+            if symbols:
+                break
+        return symbols
+
+    def _symbols(self, section):
+        symbols = []
+        if self.is64:
+            fmt, value_idx, size_idx, info_idx, shndx_idx = self.endian + 'IBBHQQ', 4, 5, 1, 3
+        else:
+            fmt, value_idx, size_idx, info_idx, shndx_idx = self.endian + 'IIIBBH', 1, 2, 3, 5
+        strtab = section['link']
+        for offset in range(section['offset'], section['offset'] + section['size'], section['entsize']):
+            sym = struct.unpack_from(fmt, self.data, offset)
+            if sym[0] == 0 or sym[shndx_idx] == SHN_UNDEF or not sym[value_idx]:
+                continue
+            if sym[info_idx] & 0xf not in (STT_FUNC, STT_OBJECT, STT_GNU_IFUNC):
+                continue
+            symbols.append((sym[value_idx], sym[size_idx], self._string(strtab, sym[0])))
+        return symbols
@@ -167,4 +167,6 @@ all_lexers = {
     'lldb_intel': LLDBIntelLexer,
     'gdb_intel': LLDBIntelLexer,
     'vdb_intel': VDBIntelLexer,
+    # disassembly formatted from instruction records by voltron.dbg.format_instructions
+    'voltron_intel': LLDBIntelLexer,
 }
@@ -8,6 +8,8 @@ import logging.config
 import voltron
 from .view import *
 from .core import *
+from .bench import *
+from .replay import *
 try:
     from .console import *
     HAS_CONSOLE = True
@@ -38,6 +40,9 @@ def main(debugger=None):
     if HAS_CONSOLE:
         Console.configure_subparser(top_level_sp)
 
+    Bench.configure_subparser(top_level_sp)
+    Replay.configure_subparser(top_level_sp)
+
     # Parse args
     args = parser.parse_args()
     if args.debug:
@@ -221,7 +221,7 @@ class APIPlugin(VoltronPlugin):
     def initialise(cls):
         if cls.request_class:
             cls.request_class._plugin = cls
-            cls.request_class.request = cls.request
+            cls.request_class._compile(request=cls.request)
 
 
 class DebuggerAdaptorPlugin(VoltronPlugin):
@@ -0,0 +1,97 @@
+import voltron
+import logging
+
+from voltron.api import *
+
+log = logging.getLogger('api')
+
+
+class APIBacktraceRequest(APIRequest):
+    """
+    API backtrace request.
+
+    {
+        "type":         "request",
+        "request":      "backtrace",
+        "data": {
+            "target_id":    0,
+            "thread_id":    123456,
+            "depth":        16
+        }
+    }
+
+    `target_id` and `thread_id` are optional. If not present, the currently
+    selected target and thread will be used.
+    `depth` is optional. It is the maximum number of frames to return, and
+    defaults to the `debugger.backtrace_depth` config setting.
+
+    Frame symbols and source lines are cached by the debugger by the frame's
+    address, so views can request the backtrace on every stop.
+
+    This request will return immediately.
+    """
+    _fields = {'target_id': False, 'thread_id': False, 'depth': False}
+
+    target_id = 0
+    thread_id = None
+    depth = None
+
+    @server_side
+    def dispatch(self):
+        try:
+            bt = voltron.debugger.backtrace(target_id=self.target_id, thread_id=self.thread_id, depth=self.depth)
+            res = APIBacktraceResponse(**bt)
+        except NoSuchTargetException:
+            res = APINoSuchTargetErrorResponse()
+        except TargetBusyException:
+            res = APITargetBusyErrorResponse()
+        except Exception as e:
+            msg = "Exception getting backtrace: {}".format(e)
+            log.exception(msg)
+            res = APIGenericErrorResponse(msg)
+
+        return res
+
+
+class APIBacktraceResponse(APISuccessResponse):
+    """
+    API backtrace response.
+
+    {
+        "type":         "response",
+        "status":       "success",
+        "data": {
+            "frames": [
+                {
+                    "index":    0,
+                    "pc":       0x100000d2a,
+                    "sp":       0x7fff5fbff7a0,
+                    "fp":       0x7fff5fbff7c0,
+                    "function": "main",
+                    "offset":   0x3a,
+                    "module":   "/tmp/inferior",
+                    "file":     "/tmp/inferior.c",
+                    "line":     12
+                }
+            ],
+            "truncated":    false,
+            "unwinder":     "debugger"
+        }
+    }
+
+    `function`, `offset`, `module`, `file` and `line` are null if they
+    aren't known. `truncated` is true if there were more frames than the
+    depth. `unwinder` is "frame_pointer" if the debugger couldn't unwind the
+    stack and the chain of saved frame pointers was followed instead.
+    """
+    _fields = {'frames': True, 'truncated': False, 'unwinder': False}
+
+    frames = []
+    truncated = False
+    unwinder = None
+
+
+class APIBacktracePlugin(APIPlugin):
+    request = 'backtrace'
+    request_class = APIBacktraceRequest
+    response_class = APIBacktraceResponse
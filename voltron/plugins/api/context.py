@@ -0,0 +1,78 @@
+import voltron
+import logging
+
+from voltron.api import *
+
+log = logging.getLogger('api')
+
+
+class APIContextRequest(APIRequest):
+    """
+    API context request.
+
+    {
+        "type":         "request",
+        "request":      "context",
+        "data": {
+            "target_id": 0,
+            "thread_id": 123456
+        }
+    }
+
+    `target_id` and `thread_id` are optional. If not present, the currently
+    selected target and thread will be used.
+
+    This is a cheaper way to get the program counter, stack pointer and frame
+    pointer than the `registers` request, as the debugger reads them directly
+    rather than fetching a set of registers.
+
+    This request will return immediately.
+    """
+    _fields = {'target_id': False, 'thread_id': False}
+
+    target_id = 0
+    thread_id = None
+
+    @server_side
+    def dispatch(self):
+        try:
+            context = voltron.debugger.context(target_id=self.target_id, thread_id=self.thread_id)
+            res = APIContextResponse()
+            res.thread_id = context['thread_id']
+            res.pc = context['pc']
+            res.sp = context['sp']
+            res.fp = context['fp']
+        except TargetBusyException:
+            res = APITargetBusyErrorResponse()
+        except NoSuchTargetException:
+            res = APINoSuchTargetErrorResponse()
+        except Exception as e:
+            msg = "Exception getting context from debugger: {}".format(e)
+            log.exception(msg)
+            res = APIGenericErrorResponse(msg)
+
+        return res
+
+
+class APIContextResponse(APISuccessResponse):
+    """
+    API context response.
+
+    {
+        "type":         "response",
+        "status":       "success",
+        "data": {
+            "thread_id":    123456,
+            "pc":           0x100000cf0,
+            "sp":           0x7fff5fbff7a8,
+            "fp":           0x7fff5fbff7c0
+        }
+    }
+    """
+    _fields = {'thread_id': True, 'pc': True, 'sp': True, 'fp': True}
+
+
+class APIContextPlugin(APIPlugin):
+    request = 'context'
+    request_class = APIContextRequest
+    response_class = APIContextResponse
@@ -0,0 +1,109 @@
+import logging
+
+import voltron
+from voltron.api import *
+
+log = logging.getLogger('api')
+
+
+class APIDerefManyRequest(APIRequest):
+    """
+    API dereference many pointers request.
+
+    {
+        "type":         "request",
+        "request":      "dereference_many",
+        "data": {
+            "target_id":0,
+            "pointers": [0xffffff8012341234, 0xffffff8012345678]
+        }
+    }
+
+    or, to dereference each pointer-sized word in a range of memory:
+
+    {
+        "type":         "request",
+        "request":      "dereference_many",
+        "data": {
+            "target_id":0,
+            "address":  0x7fff5fbff7a8,
+            "count":    16
+        }
+    }
+
+    `target_id` is optional. If not present, the currently selected target
+    will be used.
+
+    This is much cheaper than sending a `dereference` request for each
+    pointer, as memory reads and symbol lookups are shared between the
+    chains.
+
+    Each pointer is also classified by what it points to (see
+    `DebuggerAdaptor.classify_pointers`), so views can colour them.
+
+    This request will return immediately.
+    """
+    _fields = {'target_id': False, 'pointers': False, 'address': False, 'count': False}
+
+    target_id = 0
+    pointers = None
+    address = None
+    count = None
+
+    @server_side
+    def dispatch(self):
+        if self.pointers is None and (self.address is None or self.count is None):
+            return APIInvalidRequestErrorResponse()
+
+        try:
+            chains = voltron.debugger.dereference_many(pointers=self.pointers, address=self.address,
+                                                       count=self.count, target_id=self.target_id)
+            classes = voltron.debugger.classify_pointers(pointers=self.pointers, address=self.address,
+                                                         count=self.count, target_id=self.target_id)
+            res = APIDerefManyResponse()
+            res.chains = chains
+            res.classes = classes
+        except TargetBusyException:
+            res = APITargetBusyErrorResponse()
+        except NoSuchTargetException:
+            res = APINoSuchTargetErrorResponse()
+        except Exception as e:
+            msg = "Exception dereferencing pointers: {}".format(e)
+            log.exception(msg)
+            res = APIGenericErrorResponse(msg)
+
+        return res
+
+
+class APIDerefManyResponse(APISuccessResponse):
+    """
+    API dereference many pointers response.
+
+    {
+        "type":         "response",
+        "status":       "success",
+        "data": {
+            "chains": [
+                [["pointer", 0xffffff8012341234], ["symbol", "main + 0x123"]],
+                [["pointer", 0xffffff8012345678], ["string", "hello"]]
+            ],
+            "classes": [
+                {"class": "code", "module": "/bin/ls", "symbol": "main + 0x123"},
+                {"class": "string", "module": "/bin/ls", "string": "hello"}
+            ]
+        }
+    }
+
+    There is one chain and one class for each pointer. The chains are in the
+    same format as the output of the `dereference` request.
+    """
+    _fields = {'chains': True, 'classes': False}
+
+    chains = []
+    classes = []
+
+
+class APIDerefManyPlugin(APIPlugin):
+    request = "dereference_many"
+    request_class = APIDerefManyRequest
+    response_class = APIDerefManyResponse
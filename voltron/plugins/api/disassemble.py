@@ -3,6 +3,7 @@ import logging
 
 from voltron.api import *
 from voltron.plugin import *
+from voltron.dbg import format_instructions
 
 log = logging.getLogger('api')
 
@@ -16,7 +17,9 @@ class APIDisassembleRequest(APIRequest):
         "data": {
             "target_id":    0,
             "address":      0x12341234,
-            "count":        16
+            "count":        16,
+            "structured":   false,
+            "text":         false
         }
     }
 
@@ -24,23 +27,37 @@ class APIDisassembleRequest(APIRequest):
     `address` is the address at which to start disassembling. Defaults to
     instruction pointer if not specified.
     `count` is the number of instructions to disassemble.
+    `structured` is optional. If true, the instructions are returned as
+    records (see `DebuggerAdaptor.instructions`) instead of the debugger's
+    disassembly text.
+    `text` is optional, and only used with `structured`. If true, the
+    records are also formatted as text in `disassembly`.
 
     This request will return immediately.
     """
-    _fields = {'target_id': False, 'address': False, 'count': True}
+    _fields = {'target_id': False, 'address': False, 'count': True, 'structured': False, 'text': False}
 
     target_id = 0
     address = None
     count = 16
+    structured = False
+    text = False
 
     @server_side
     def dispatch(self):
         try:
             if self.address == None:
                 pc_name, self.address = voltron.debugger.program_counter(target_id=self.target_id)
-            disasm = voltron.debugger.disassemble(target_id=self.target_id, address=self.address, count=self.count)
             res = APIDisassembleResponse()
-            res.disassembly = disasm
+            if self.structured:
+                res.instructions = voltron.debugger.instructions(target_id=self.target_id, address=self.address,
+                                                                 count=self.count)
+                if self.text:
+                    pc_name, pc = voltron.debugger.program_counter(target_id=self.target_id)
+                    res.disassembly = format_instructions(res.instructions, pc=pc)
+            else:
+                res.disassembly = voltron.debugger.disassemble(target_id=self.target_id, address=self.address,
+                                                               count=self.count)
             try:
                 res.flavor = voltron.debugger.disassembly_flavor()
             except:
@@ -69,10 +86,35 @@ class APIDisassembleResponse(APISuccessResponse):
             "disassembly":  "mov blah blah"
         }
     }
+
+    or, for a structured request:
+
+    {
+        "type":         "response",
+        "status":       "success",
+        "data": {
+            "instructions": [
+                {
+                    "address":  0x401126,
+                    "bytes":    "e805ffffff",
+                    "size":     5,
+                    "mnemonic": "call",
+                    "operands": "0x401030",
+                    "comment":  null,
+                    "target":   0x401030,
+                    "symbol":   "puts + 0x0"
+                }
+            ]
+        }
+    }
+
+    `disassembly` is only included in a response to a structured request if
+    the text was asked for.
     """
-    _fields = {'disassembly': True, 'formatted': False, 'flavor': False, 'host': False}
+    _fields = {'disassembly': False, 'instructions': False, 'formatted': False, 'flavor': False, 'host': False}
 
     disassembly = None
+    instructions = None
     formatted = None
     flavor = None
     host = None
@@ -0,0 +1,112 @@
+import voltron
+import logging
+
+from voltron.api import *
+
+log = logging.getLogger('api')
+
+
+class APIDisassembleWindowRequest(APIRequest):
+    """
+    API disassemble window request.
+
+    {
+        "type":         "request",
+        "request":      "disassemble_window",
+        "data": {
+            "target_id":    0,
+            "address":      0x401126,
+            "offset":       -8,
+            "count":        32,
+            "prefetch":     true
+        }
+    }
+
+    `target_id` is optional.
+    `address` is the address the window is anchored at. Defaults to the
+    instruction pointer if not specified.
+    `offset` is optional. It is the number of instructions from the anchor
+    to the start of the window, and is negative to include instructions
+    before the anchor. Defaults to 0.
+    `count` is the number of instructions in the window.
+    `prefetch` is optional. If true, the windows either side of this one are
+    decoded too, so scrolling to them is quick.
+
+    To scroll, send the same anchor with the offset moved by `count`.
+    Instructions before an address are found by decoding from the start of
+    the function containing them, which is cached per function.
+
+    This request will return immediately.
+    """
+    _fields = {'target_id': False, 'address': False, 'offset': False, 'count': True, 'prefetch': False}
+
+    target_id = 0
+    address = None
+    offset = 0
+    count = 16
+    prefetch = False
+
+    @server_side
+    def dispatch(self):
+        try:
+            window = voltron.debugger.disassembly_window(target_id=self.target_id, address=self.address,
+                                                         offset=self.offset, count=self.count,
+                                                         prefetch=self.prefetch)
+            res = APIDisassembleWindowResponse(**window)
+            try:
+                res.flavor = voltron.debugger.disassembly_flavor()
+            except:
+                res.flavor = 'NA'
+        except NoSuchTargetException:
+            res = APINoSuchTargetErrorResponse()
+        except TargetBusyException:
+            res = APITargetBusyErrorResponse()
+        except Exception as e:
+            msg = "Exception disassembling window: {}".format(e)
+            log.exception(msg)
+            res = APIGenericErrorResponse(msg)
+
+        return res
+
+
+class APIDisassembleWindowResponse(APISuccessResponse):
+    """
+    API disassemble window response.
+
+    {
+        "type":         "response",
+        "status":       "success",
+        "data": {
+            "address":      0x401126,
+            "function":     {"name": "main", "start": 0x401120, "end": 0x401180},
+            "instructions": [
+                {
+                    "address":  0x401126,
+                    "bytes":    "e805ffffff",
+                    "size":     5,
+                    "mnemonic": "call",
+                    "operands": "0x401030",
+                    "comment":  null,
+                    "target":   0x401030,
+                    "symbol":   "puts + 0x0"
+                }
+            ],
+            "flavor":       "intel"
+        }
+    }
+
+    `address` is the anchor of the window. `function` is the symbol
+    containing the anchor, or null.
+    """
+    _fields = {'address': True, 'function': False, 'instructions': True, 'flavor': False}
+
+    address = None
+    function = None
+    instructions = []
+    flavor = None
+
+
+class APIDisassembleWindowPlugin(APIPlugin):
+    request = 'disassemble_window'
+    request_class = APIDisassembleWindowRequest
+    response_class = APIDisassembleWindowResponse
@@ -0,0 +1,105 @@
+import voltron
+import logging
+
+from voltron.api import *
+
+log = logging.getLogger('api')
+
+
+class APIFunctionCFGRequest(APIRequest):
+    """
+    API function control flow graph request.
+
+    {
+        "type":         "request",
+        "request":      "function_cfg",
+        "data": {
+            "target_id":    0,
+            "address":      0x401126
+        }
+    }
+
+    `target_id` is optional.
+    `address` is optional. It is an address in the function to get the graph
+    of. Defaults to the instruction pointer if not specified.
+
+    Graphs are cached by the debugger per module and function, and are only
+    recovered again if the function's code changes, so views can request
+    the graph on every stop.
+
+    This request will return immediately.
+    """
+    _fields = {'target_id': False, 'address': False}
+
+    target_id = 0
+    address = None
+
+    @server_side
+    def dispatch(self):
+        try:
+            cfg = voltron.debugger.function_cfg(target_id=self.target_id, address=self.address)
+            res = APIFunctionCFGResponse(**cfg)
+        except NoSuchTargetException:
+            res = APINoSuchTargetErrorResponse()
+        except TargetBusyException:
+            res = APITargetBusyErrorResponse()
+        except Exception as e:
+            msg = "Exception getting control flow graph: {}".format(e)
+            log.exception(msg)
+            res = APIGenericErrorResponse(msg)
+
+        return res
+
+
+class APIFunctionCFGResponse(APISuccessResponse):
+    """
+    API function control flow graph response.
+
+    {
+        "type":         "response",
+        "status":       "success",
+        "data": {
+            "address":  0x401126,
+            "function": {"name": "main", "start": 0x401120, "end": 0x401180},
+            "blocks": [
+                {
+                    "start":        0x401120,
+                    "end":          0x40112b,
+                    "instructions": [
+                        {
+                            "address":  0x401126,
+                            "bytes":    "7518",
+                            "size":     2,
+                            "mnemonic": "jne",
+                            "operands": "0x401140",
+                            "comment":  null,
+                            "target":   0x401140,
+                            "symbol":   "main + 0x20"
+                        }
+                    ]
+                }
+            ],
+            "edges": [
+                {"from": 0x401120, "to": 0x401140, "type": "taken"},
+                {"from": 0x401120, "to": 0x40112b, "type": "fallthrough"}
+            ]
+        }
+    }
+
+    `address` is the address the graph was requested for, so views can
+    highlight the block containing it. `function` is the symbol containing
+    the address, or null. Edges are between block starts, and their `type`
+    is "taken", "fallthrough" or "jump".
+    """
+    _fields = {'address': True, 'function': False, 'blocks': True, 'edges': True}
+
+    address = None
+    function = None
+    blocks = []
+    edges = []
+
+
+class APIFunctionCFGPlugin(APIPlugin):
+    request = 'function_cfg'
+    request_class = APIFunctionCFGRequest
+    response_class = APIFunctionCFGResponse
@@ -0,0 +1,88 @@
+import voltron
+import logging
+
+from voltron.api import *
+
+log = logging.getLogger('api')
+
+
+class APIMemoryMapRequest(APIRequest):
+    """
+    API memory map request.
+
+    {
+        "type":         "request",
+        "request":      "memory_map",
+        "data": {
+            "target_id": 0
+        }
+    }
+
+    `target_id` is optional. If not present, the currently selected target
+    will be used.
+
+    The map is cached by the debugger until the target next stops, so views
+    can request it on every stop cheaply.
+
+    This request will return immediately.
+    """
+    _fields = {'target_id': False}
+
+    target_id = 0
+
+    @server_side
+    def dispatch(self):
+        try:
+            regions = voltron.debugger.memory_map(target_id=self.target_id)
+            res = APIMemoryMapResponse(regions=regions)
+        except TargetBusyException:
+            res = APITargetBusyErrorResponse()
+        except NoSuchTargetException:
+            res = APINoSuchTargetErrorResponse()
+        except Exception as e:
+            msg = "Exception getting memory map from debugger: {}".format(e)
+            log.exception(msg)
+            res = APIGenericErrorResponse(msg)
+
+        return res
+
+
+class APIMemoryMapResponse(APISuccessResponse):
+    """
+    API memory map response.
+
+    {
+        "type":         "response",
+        "status":       "success",
+        "data": {
+            "regions": [
+                {
+                    "start":    0x100000000,
+                    "end":      0x100001000,
+                    "perms":    "r-x",
+                    "file":     "/bin/ls",
+                    "type":     "module"
+                },
+                {
+                    "start":    0x7fff5fc00000,
+                    "end":      0x7fff5fc3b000,
+                    "perms":    "rw-",
+                    "file":     null,
+                    "type":     "stack"
+                }
+            ]
+        }
+    }
+
+    `perms` is null if the debugger can't tell. `type` is one of "stack",
+    "heap", "module" or "anon".
+    """
+    _fields = {'regions': True}
+
+    regions = []
+
+
+class APIMemoryMapPlugin(APIPlugin):
+    request = 'memory_map'
+    request_class = APIMemoryMapRequest
+    response_class = APIMemoryMapResponse
@@ -1,6 +1,8 @@
-import voltron
+import base64
 import logging
 
+import voltron
+
 from voltron.api import *
 
 log = logging.getLogger('api')
@@ -16,7 +18,8 @@ class APIRegistersRequest(APIRequest):
         "data": {
             "target_id": 0,
             "thread_id": 123456,
-            "registers": ['rsp']
+            "registers": ['rsp'],
+            "categories": ['general', 'flags']
         }
     }
 
@@ -26,20 +29,32 @@ class APIRegistersRequest(APIRequest):
     `registers` is optional. If it is not included all registers will be
     returned.
 
+    `categories` is optional. It is a list of categories of registers to
+    return, in addition to any named in `registers`. Valid categories are
+    'general', 'flags', 'segment', 'sse', 'avx', 'avx512', 'neon', 'sve',
+    'fpu' and 'system'. If neither `registers` nor `categories` is included
+    all registers except those in the wide vector categories ('avx',
+    'avx512', 'neon' and 'sve') will be returned.
+
     This request will return immediately.
     """
-    _fields = {'target_id': False, 'thread_id': False, 'registers': False}
+    _fields = {'target_id': False, 'thread_id': False, 'registers': False, 'categories': False}
 
     target_id = 0
     thread_id = None
     registers = []
+    categories = []
 
     @server_side
     def dispatch(self):
         try:
-            regs = voltron.debugger.registers(target_id=self.target_id, thread_id=self.thread_id, registers=self.registers)
+            regs = voltron.debugger.registers(target_id=self.target_id, thread_id=self.thread_id, registers=self.registers,
+                                               categories=self.categories)
             res = APIRegistersResponse()
-            res.registers = regs
+            # vector registers come back from the debugger as bytearrays
+            res.vectors = {name: base64.b64encode(bytes(val)).decode('ascii')
+                           for name, val in regs.items() if isinstance(val, bytearray)}
+            res.registers = {name: val for name, val in regs.items() if name not in res.vectors}
         except TargetBusyException:
             res = APITargetBusyErrorResponse()
         except NoSuchTargetException:
@@ -60,11 +75,29 @@ class APIRegistersResponse(APISuccessResponse):
         "type":         "response",
         "status":       "success",
         "data": {
-            "registers": { "rip": 0x12341234, ... }
+            "registers": { "rip": 0x12341234, ... },
+            "vectors": { "ymm0": "AAECAwQFBgcICQoLDA0ODxAREhMUFRYXGBkaGxwdHh8=", ... }
         }
     }
+
+    `vectors` contains any wide vector registers (ymm, zmm and k registers on
+    x86, NEON and SVE registers on ARM) as base64 encoded strings of their
+    contents in little-endian order. The element types they can be viewed
+    as are described by the target's `vector_layout` (see the `targets`
+    API). Use `vector()` to get a register's bytes.
     """
-    _fields = {'registers': True}
+    _fields = {'registers': True, 'vectors': False}
+
+    vectors = {}
+
+    def vector(self, name):
+        """
+        Return the contents of a vector register as bytes, or None if it
+        wasn't returned.
+        """
+        if self.vectors and name in self.vectors:
+            return base64.b64decode(self.vectors[name])
+        return None
 
 
 class APIRegistersPlugin(APIPlugin):
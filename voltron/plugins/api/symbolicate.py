@@ -0,0 +1,80 @@
+import logging
+
+import voltron
+from voltron.api import *
+
+log = logging.getLogger('api')
+
+
+class APISymbolicateRequest(APIRequest):
+    """
+    API symbolicate request.
+
+    {
+        "type":         "request",
+        "request":      "symbolicate",
+        "data": {
+            "target_id":    0,
+            "addresses":    [0x100000d20, 0x7fff8fd2a5c9]
+        }
+    }
+
+    `target_id` is optional. If not present, the currently selected target
+    will be used.
+
+    `addresses` is a list of addresses to find symbols for. Symbols are found
+    in an index of each module's symbols that is kept by the debugger adaptor,
+    so there's no need to limit the number of addresses.
+
+    This request will return immediately.
+    """
+    _fields = {'target_id': False, 'addresses': True}
+
+    target_id = 0
+    addresses = []
+
+    @server_side
+    def dispatch(self):
+        try:
+            symbols = voltron.debugger.symbolicate(addresses=self.addresses, target_id=self.target_id)
+            res = APISymbolicateResponse()
+            res.symbols = symbols
+        except TargetBusyException:
+            res = APITargetBusyErrorResponse()
+        except NoSuchTargetException:
+            res = APINoSuchTargetErrorResponse()
+        except Exception as e:
+            msg = "Exception symbolicating addresses: {}".format(e)
+            log.exception(msg)
+            res = APIGenericErrorResponse(msg)
+
+        return res
+
+
+class APISymbolicateResponse(APISuccessResponse):
+    """
+    API symbolicate response.
+
+    {
+        "type":         "response",
+        "status":       "success",
+        "data": {
+            "symbols": [
+                {"symbol": "main", "offset": 0x0, "module": "/tmp/inferior"},
+                null
+            ]
+        }
+    }
+
+    There is an entry for each address, which is null if no symbol contains
+    the address. `module` is null if it isn't known.
+    """
+    _fields = {'symbols': True}
+
+    symbols = []
+
+
+class APISymbolicatePlugin(APIPlugin):
+    request = "symbolicate"
+    request_class = APISymbolicateRequest
+    response_class = APISymbolicateResponse
@@ -45,7 +45,14 @@ class APITargetsResponse(APISuccessResponse):
                 "id":       0,         # ID that can be used in other funcs
                 "file":     "/bin/ls", # target's binary file
                 "arch":     "x86_64",  # target's architecture
-                "state:     "stopped"  # state
+                "state:     "stopped", # state
+                "stop_reason": "breakpoint 1.1", # why it stopped, if known
+                "vector_layout": {     # vector register classes (see the
+                    "ymm": {           # `registers` API)
+                        "size":     32,
+                        "elements": ["i8", "i16", "i32", "i64", "f32", "f64"]
+                    }, ...
+                }
             }]
         }
     }
@@ -1,3 +1,5 @@
+import os
+
 import voltron
 import voltron.api
 from voltron.api import *
@@ -19,6 +21,7 @@ class APIVersionRequest(APIRequest):
         res = APIVersionResponse()
         res.api_version = voltron.api.version
         res.host_version = voltron.debugger.version()
+        res.host_pid = os.getpid()
         return res
 
 
@@ -31,14 +34,19 @@ class APIVersionResponse(APISuccessResponse):
         "status":       "success",
         "data": {
             "api_version":  1.0,
-            "host_version": 'lldb-something'
+            "host_version": 'lldb-something',
+            "host_pid":     1234
         }
     }
+
+    `host_pid` is the process ID of the debugger host, for clients that want
+    to keep an eye on its resource usage.
     """
-    _fields = {'api_version': True, 'host_version': True}
+    _fields = {'api_version': True, 'host_version': True, 'host_pid': False}
 
     api_version = None
     host_version = None
+    host_pid = None
 
 class APIVersionPlugin(APIPlugin):
     request = 'version'
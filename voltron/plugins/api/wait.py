@@ -30,6 +30,7 @@ class APIWaitRequest(APIRequest):
     implement some others.
     """
     _fields = {'target_id': False, 'timeout': False, 'state_changes': False}
+    __slots__ = ('wait_event',)
 
     target_id = 0
     timeout = None
@@ -0,0 +1,88 @@
+import voltron
+import logging
+
+from voltron.api import *
+
+log = logging.getLogger('api')
+
+
+class APIXrefsRequest(APIRequest):
+    """
+    API xrefs request.
+
+    {
+        "type":         "request",
+        "request":      "xrefs",
+        "data": {
+            "target_id":    0,
+            "address":      0x401126,
+            "types":        ["call"]
+        }
+    }
+
+    `target_id` is optional.
+    `address` is the address to find xrefs to.
+    `types` is optional. It is a list of the types of xref to include
+    ("call", "jump" or "data"). Defaults to all of them.
+
+    Xrefs are found in indexes of the target's modules that are built in the
+    background, which needs `debugger.xref_index.enabled` set in the config.
+
+    This request will return immediately.
+    """
+    _fields = {'target_id': False, 'address': True, 'types': False}
+
+    target_id = 0
+    address = None
+    types = None
+
+    @server_side
+    def dispatch(self):
+        try:
+            xrefs = voltron.debugger.xrefs(self.address, types=self.types, target_id=self.target_id)
+            res = APIXrefsResponse(**xrefs)
+        except NoSuchTargetException:
+            res = APINoSuchTargetErrorResponse()
+        except TargetBusyException:
+            res = APITargetBusyErrorResponse()
+        except Exception as e:
+            msg = "Exception getting xrefs: {}".format(e)
+            log.exception(msg)
+            res = APIGenericErrorResponse(msg)
+
+        return res
+
+
+class APIXrefsResponse(APISuccessResponse):
+    """
+    API xrefs response.
+
+    {
+        "type":         "response",
+        "status":       "success",
+        "data": {
+            "xrefs": [
+                {"from": 0x401146, "type": "call", "symbol": "main + 0x26"}
+            ],
+            "pending": ["/lib/x86_64-linux-gnu/libc.so.6"],
+            "unavailable": []
+        }
+    }
+
+    `pending` lists the modules that haven't been indexed yet. If the module
+    containing the address is pending, its xrefs will be in a later response.
+    `unavailable` lists the modules that can't be indexed (e.g. because no
+    disassembler for their architecture is installed), so no xrefs will ever
+    be found in them.
+    """
+    _fields = {'xrefs': True, 'pending': False, 'unavailable': False}
+
+    xrefs = []
+    pending = []
+    unavailable = []
+
+
+class APIXrefsPlugin(APIPlugin):
+    request = 'xrefs'
+    request_class = APIXrefsRequest
+    response_class = APIXrefsResponse
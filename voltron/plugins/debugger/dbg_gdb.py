@@ -25,22 +25,181 @@ if HAVE_GDB:
             'i386:x86-64': 'x86_64', 'i386:x86-64:intel': 'x86_64',
             'arm': 'arm', 'armv2': 'arm', 'armv2a': 'arm', 'armv3': 'arm', 'armv3m': 'arm', 'armv4': 'arm',
             'armv4t': 'arm', 'armv5': 'arm', 'armv5t': 'arm', 'armv5te': 'arm',
+            'aarch64': 'arm64',
             'powerpc:common': 'powerpc'
         }
         sizes = {
             'x86': 4,
             'x86_64': 8,
             'arm': 4,
+            'arm64': 8,
             'powerpc': 4,
         }
 
+        # registers returned for each architecture, by register set
+        register_sets = {
+            'x86_64': [
+                ('general', ['rax', 'rbx', 'rcx', 'rdx', 'rbp', 'rsp', 'rdi', 'rsi', 'rip',
+                             'r8', 'r9', 'r10', 'r11', 'r12', 'r13', 'r14', 'r15']),
+                ('flags',   ['eflags']),
+                ('segment', ['cs', 'ds', 'es', 'fs', 'gs', 'ss']),
+                ('sse',     ['xmm{}'.format(i) for i in range(16)]),
+                ('fpu',     ['st{}'.format(i) for i in range(8)]),
+                ('avx',     ['ymm{}'.format(i) for i in range(16)]),
+                ('avx512',  ['zmm{}'.format(i) for i in range(32)] + ['k{}'.format(i) for i in range(8)]),
+            ],
+            'x86': [
+                ('general', ['eax', 'ebx', 'ecx', 'edx', 'ebp', 'esp', 'edi', 'esi', 'eip']),
+                ('flags',   ['eflags']),
+                ('segment', ['cs', 'ds', 'es', 'fs', 'gs', 'ss']),
+                ('sse',     ['xmm{}'.format(i) for i in range(8)]),
+                ('fpu',     ['st{}'.format(i) for i in range(8)]),
+                ('avx',     ['ymm{}'.format(i) for i in range(8)]),
+                ('avx512',  ['zmm{}'.format(i) for i in range(8)] + ['k{}'.format(i) for i in range(8)]),
+            ],
+            'arm': [
+                ('general', ['pc', 'sp', 'lr'] + ['r{}'.format(i) for i in range(13)]),
+                ('flags',   ['cpsr']),
+                ('fpu',     ['d{}'.format(i) for i in range(32)] + ['fpscr']),
+                ('neon',    ['q{}'.format(i) for i in range(16)]),
+            ],
+            'arm64': [
+                ('general', ['pc', 'sp'] + ['x{}'.format(i) for i in range(31)]),
+                ('flags',   ['cpsr']),
+                ('fpu',     ['fpsr', 'fpcr']),
+                ('neon',    ['v{}'.format(i) for i in range(32)]),
+                ('sve',     ['vg', 'ffr'] + ['z{}'.format(i) for i in range(32)] + ['p{}'.format(i) for i in range(16)]),
+            ],
+            'powerpc': [
+                ('general', ['pc', 'lr', 'ctr'] + ['r{}'.format(i) for i in range(32)]),
+                ('flags',   ['cr']),
+                ('system',  ['msr']),
+            ],
+        }
+
+        # registers that are returned under a different name to GDB's
+        register_aliases = {
+            'x86_64': {'eflags': 'rflags'},
+        }
+
+        # register types that are converted straight to an int
+        int_type_codes = (gdb.TYPE_CODE_INT, gdb.TYPE_CODE_PTR, gdb.TYPE_CODE_FLAGS,
+                          gdb.TYPE_CODE_ENUM, gdb.TYPE_CODE_BOOL, gdb.TYPE_CODE_CHAR)
+
+        # names of the events in `gdb.events` and the methods that handle them
+        # (not all of them exist in older versions of GDB)
+        events = [
+            ('stop',                'on_stop'),
+            ('cont',                'on_cont'),
+            ('exited',              'on_exited'),
+            ('new_objfile',         'on_new_objfile'),
+            ('clear_objfiles',      'on_new_objfile'),
+            ('inferior_call',       'on_inferior_call'),
+            ('memory_changed',      'on_memory_changed'),
+            ('register_changed',    'on_register_changed'),
+            ('breakpoint_created',  'on_breakpoint_created'),
+            ('breakpoint_modified', 'on_breakpoint_modified'),
+            ('breakpoint_deleted',  'on_breakpoint_deleted'),
+        ]
+
         """
         The interface with an instance of GDB
         """
         def __init__(self, *args, **kwargs):
-            self.listeners = []
+            super(GDBAdaptor, self).__init__()
             self.host_lock = threading.RLock()
             self.host = gdb
+            self._states = {}
+            self._breakpoints = {}
+
+        def connect_events(self):
+            """
+            Connect to GDB's events, so the adaptor can keep track of the
+            inferior's state rather than asking GDB for it on every request,
+            notify listeners when the inferior stops, and invalidate anything
+            cached when it changes.
+            """
+            for name, handler in self.events:
+                if hasattr(gdb.events, name):
+                    getattr(gdb.events, name).connect(getattr(self, handler))
+            self._breakpoints = {bp.number: self._breakpoint_settings(bp) for bp in (gdb.breakpoints() or [])}
+
+        def disconnect_events(self):
+            """
+            Disconnect from GDB's events.
+            """
+            for name, handler in self.events:
+                if hasattr(gdb.events, name):
+                    getattr(gdb.events, name).disconnect(getattr(self, handler))
+            self._states = {}
+
+        def on_stop(self, event):
+            self._set_state("stopped")
+            self.update_state()
+
+        def on_cont(self, event):
+            thread = getattr(event, 'inferior_thread', None)
+            self._set_state("running", thread.inferior if thread else None)
+            self.invalidate()
+
+        def on_exited(self, event):
+            self._states.pop(getattr(event, 'inferior', gdb.selected_inferior()).num, None)
+            # let anyone waiting for the inferior to stop know it's gone
+            self.update_state()
+
+        def on_new_objfile(self, event):
+            self.invalidate()
+
+        def on_inferior_call(self, event):
+            # the inferior runs while GDB calls a function in it
+            if isinstance(event, gdb.InferiorCallPreEvent):
+                self._set_state("running")
+            else:
+                self._set_state("stopped")
+            self.invalidate()
+
+        def on_memory_changed(self, event):
+            # memory was written by the user (e.g. with `set var`), so only the
+            # cached pages it touched are stale
+            for cache in self.memory_caches.values():
+                cache.invalidate(int(event.address), event.length)
+
+        def on_register_changed(self, event):
+            # a register was written by the user (e.g. with `set $rax = 0`)
+            self.invalidate()
+
+        def on_breakpoint_created(self, breakpoint):
+            self._breakpoints[breakpoint.number] = self._breakpoint_settings(breakpoint)
+            self.on_breakpoint_changed(breakpoint)
+
+        def on_breakpoint_modified(self, breakpoint):
+            # GDB reports a breakpoint as modified whenever its hit count goes
+            # up, ie. every time the inferior stops at it, and views already
+            # update for the stop, so only pass on changes to its settings
+            settings = self._breakpoint_settings(breakpoint)
+            if self._breakpoints.get(breakpoint.number) != settings:
+                self._breakpoints[breakpoint.number] = settings
+                self.on_breakpoint_changed(breakpoint)
+
+        def on_breakpoint_deleted(self, breakpoint):
+            self._breakpoints.pop(breakpoint.number, None)
+            self.on_breakpoint_changed(breakpoint)
+
+        def on_breakpoint_changed(self, breakpoint):
+            # let views update if the inferior is stopped
+            if self._state() == "stopped":
+                self.update_state()
+            else:
+                self.invalidate()
+
+        @staticmethod
+        def _breakpoint_settings(breakpoint):
+            """
+            Get everything about a breakpoint except its hit count.
+            """
+            return tuple(getattr(breakpoint, attr, None) for attr in
+                         ('enabled', 'silent', 'thread', 'task', 'ignore_count', 'condition', 'location',
+                          'expression', 'temporary', 'pending'))
 
         def version(self):
             """
@@ -68,6 +227,17 @@ if HAVE_GDB:
                 "state:     "stopped"  # state
             }
             """
+            d = dict(self._target_info())
+            d["state"] = self._state()
+            return d
+
+        @stop_cached
+        def _target_info(self):
+            """
+            Return the properties of the current inferior that don't change
+            while it's running (everything `_target()` returns except the
+            state), cached until the next stop.
+            """
             # get target
             target = gdb.selected_inferior()
 
@@ -76,22 +246,18 @@ if HAVE_GDB:
             d["id"] = 0
             d["num"] = target.num
 
-            # get target state
-            d["state"] = self._state()
-
-            # get inferior file (doesn't seem to be available through the API)
-            lines = list(filter(lambda x: x != '', gdb.execute('info inferiors', to_string=True).split('\n')))
-            if len(lines) > 1:
-                info = list(filter(lambda x: '*' in x[0], map(lambda x: x.split(), lines[1:])))
-                d["file"] = info[0][-1]
-            else:
-                log.debug("No inferiors in `info inferiors`")
-                raise NoSuchTargetException()
+            # get inferior file
+            try:
+                d["file"] = target.progspace.filename
+            except AttributeError:
+                # GDB < 9
+                d["file"] = gdb.current_progspace().filename
 
             # get arch
             d["arch"] = self.get_arch()
             d['byte_order'] = self.get_byte_order()
             d['addr_size'] = self.get_addr_size()
+            d['vector_layout'] = self.vector_layouts.get(d['arch'], {})
 
             return d
 
@@ -129,40 +295,44 @@ if HAVE_GDB:
         @validate_busy
         @validate_target
         @lock_host
-        def registers(self, target_id=0, thread_id=None, registers=[]):
+        def registers(self, target_id=0, thread_id=None, registers=[], categories=[]):
             """
             Get the register values for a given target/thread.
+
+            `registers` is a list of register names to return
+            `categories` is a list of categories of registers to return (see
+            `DebuggerAdaptor.register_categories`)
+
+            If neither is specified all registers except wide vector registers
+            (see `DebuggerAdaptor.vector_categories`) are returned. Only the
+            register sets that are needed are read, and registers in them that
+            the target doesn't have are left out. Vector registers are
+            returned as bytearrays.
             """
             arch = self.get_arch()
+            if arch not in self.reg_names or arch not in self.register_sets:
+                raise UnknownArchitectureException()
+            aliases = self.register_aliases.get(arch, {})
 
-            # if we got 'sp' or 'pc' in registers, change it to whatever the right name is for the current arch
-            if arch in self.reg_names:
-                if 'pc' in registers:
-                    registers.remove('pc')
-                    registers.append(self.reg_names[arch]['pc'])
-                if 'sp' in registers:
-                    registers.remove('sp')
-                    registers.append(self.reg_names[arch]['sp'])
-            else:
-                raise Exception("Unsupported architecture: {}".format(target['arch']))
-
-            # get registers
-            if registers != []:
-                regs = {}
-                for reg in registers:
-                    regs[reg] = self.get_register(reg)
+            if registers or categories:
+                # if we got 'sp' or 'pc' in registers, change it to whatever
+                # the right name is for the current arch
+                names = [self.reg_names[arch].get(reg, reg) for reg in registers]
+                names = [{v: k for k, v in aliases.items()}.get(reg, reg) for reg in names]
             else:
                 log.debug('Getting registers for arch {}'.format(arch))
-                if arch == "x86_64":
-                    regs = self.get_registers_x86_64()
-                elif arch == "x86":
-                    regs = self.get_registers_x86()
-                elif arch == "arm":
-                    regs = self.get_registers_arm()
-                elif arch == "powerpc":
-                    regs = self.get_registers_powerpc()
-                else:
-                    raise UnknownArchitectureException()
+                names = []
+                categories = [c for c in self.register_categories if c not in self.vector_categories]
+
+            available = self._available_registers()
+            for regset, regs in self.register_sets[arch]:
+                if regset in categories:
+                    names += [reg for reg in regs if reg not in names and (available is None or reg in available)]
+
+            regs = self.get_registers(names)
+            for name, alias in aliases.items():
+                if name in regs:
+                    regs[alias] = regs.pop(name)
 
             return regs
 
@@ -173,14 +343,8 @@ if HAVE_GDB:
             """
             Get the value of the stack pointer register.
             """
-            arch = self.get_arch()
-            if arch in self.reg_names:
-                sp_name = self.reg_names[arch]['sp']
-                sp = self.get_register(sp_name)
-            else:
-                raise UnknownArchitectureException()
-
-            return sp_name, sp
+            sp_name = self._reg_name('sp')
+            return sp_name, self.get_register(sp_name)
 
         @validate_busy
         @validate_target
@@ -189,14 +353,44 @@ if HAVE_GDB:
             """
             Get the value of the program counter register.
             """
-            arch = self.get_arch()
-            if arch in self.reg_names:
-                pc_name = self.reg_names[arch]['pc']
-                pc = self.get_register(pc_name)
-            else:
-                raise UnknownArchitectureException()
+            return self._reg_name('pc'), int(gdb.selected_frame().pc())
 
-            return pc_name, pc
+        @validate_busy
+        @validate_target
+        @lock_host
+        def frame_pointer(self, target_id=0, thread_id=None):
+            """
+            Get the value of the frame pointer register.
+            """
+            fp_name = self._reg_name('fp')
+            return fp_name, self.get_register(fp_name)
+
+        @validate_busy
+        @validate_target
+        @lock_host
+        def context(self, target_id=0, thread_id=None):
+            """
+            Get the program counter, stack pointer and frame pointer for the
+            selected thread, read straight from the selected frame.
+
+            `target_id` and `thread_id` are ignored.
+
+            Returns data in the following structure:
+            {
+                "thread_id":    1234,
+                "pc":           0x400526,
+                "sp":           0x7fffffffe3a0,
+                "fp":           0x7fffffffe3b0
+            }
+            """
+            frame = gdb.selected_frame()
+            thread = gdb.selected_thread()
+            return {
+                "thread_id":    thread.ptid[1] or thread.num,
+                "pc":           int(frame.pc()),
+                "sp":           self._read_register(frame, self._reg_name('sp')),
+                "fp":           self._read_register(frame, self._reg_name('fp')),
+            }
 
         @validate_busy
         @validate_target
@@ -210,8 +404,125 @@ if HAVE_GDB:
             """
             # read memory
             log.debug('Reading 0x{:x} bytes of memory at 0x{:x}'.format(length, address))
-            memory = bytes(gdb.selected_inferior().read_memory(address, length))
-            return memory
+            return self.read_memory(address, length)
+
+        def _read_memory(self, address, length, target_id=0):
+            # this is a buffer (a memoryview in python 3) and is passed all the
+            # way through to the client socket without being copied if it
+            # doesn't go through the memory cache
+            return gdb.selected_inferior().read_memory(address, length)
+
+        def _local_pid(self, target_id=0):
+            inferior = gdb.selected_inferior()
+            # GDB 11+ tells us whether the inferior is remote
+            connection = getattr(inferior, 'connection', None)
+            if connection is not None and connection.type != 'native':
+                return None
+            return inferior.pid or None
+
+        def _breakpoint_sites(self, target_id=0):
+            # in all-stop mode GDB takes its breakpoints out of memory when the
+            # inferior stops, unless it's told to always leave them in
+            if not gdb.parameter('non-stop') and gdb.parameter('breakpoint always-inserted') is not True:
+                return []
+            sites = []
+            for bp in gdb.breakpoints() or []:
+                # breakpoint locations are only available in GDB 13+
+                if not hasattr(bp, 'locations'):
+                    return None
+                sites.extend(loc.address for loc in bp.locations if loc.address is not None)
+            return sites
+
+        def _memory_regions(self, target_id=0):
+            pid = self._local_pid(target_id=target_id)
+            if pid:
+                try:
+                    with open('/proc/{}/maps'.format(pid)) as f:
+                        return parse_proc_maps(f.read())
+                except IOError:
+                    pass
+
+            try:
+                output = gdb.execute('info proc mappings', to_string=True)
+            except gdb.error:
+                return []
+
+            # GDB 12+ has a column for the permissions
+            regions = []
+            for line in output.splitlines():
+                fields = line.split()
+                if len(fields) < 4 or not fields[0].startswith('0x'):
+                    continue
+                if len(fields) > 4 and re.match(r'^[r-][w-][x-][ps]$', fields[4]):
+                    perms, name = fields[4][:3], ' '.join(fields[5:])
+                else:
+                    perms, name = None, ' '.join(fields[4:])
+                regions.append({
+                    "start":    int(fields[0], 16),
+                    "end":      int(fields[1], 16),
+                    "perms":    perms,
+                    "file":     name or None,
+                })
+            return regions
+
+        def _symbols(self, target_id=0):
+            # GDB's Python API can't list symbols, but the minimal symbol
+            # table can be dumped with their relocated addresses. It doesn't
+            # include their sizes, which are looked up by `_symbol_size()`
+            # when they're needed
+            output = gdb.execute('maint print msymbols', to_string=True)
+            return [(int(m.group(1), 16), 0, m.group(2))
+                    for m in re.finditer(r'^\[\s*\d+\] \S (0x[0-9a-fA-F]+) (\S+)', output, re.MULTILINE)]
+
+        def _symbol_size(self, address, target_id=0):
+            """
+            Get the size of the function starting at `address` from its debug
+            info, or 0 if there isn't any. This only expands the symbol table
+            of the function's compilation unit, which is why it isn't done for
+            every symbol up front.
+            """
+            try:
+                block = gdb.block_for_pc(address)
+            except RuntimeError:
+                return 0
+            while block is not None and block.function is None:
+                block = block.superblock
+            if block is not None and block.start == address:
+                return block.end - block.start
+            return 0
+
+        def _frames(self, count, target_id=0, thread_id=None):
+            # unwinding another thread means switching to it, so switch back
+            # to the selected frame afterwards
+            selected = gdb.selected_thread()
+            selected_frame = gdb.selected_frame()
+            thread = selected
+            if thread_id:
+                threads = [t for t in gdb.selected_inferior().threads() if thread_id in (t.ptid[1], t.num)]
+                if not threads:
+                    raise NoSuchThreadException()
+                thread = threads[0]
+            try:
+                thread.switch()
+                frames = []
+                frame = gdb.newest_frame()
+                while frame is not None and len(frames) < count:
+                    try:
+                        fp = int(frame.read_register('fp'))
+                    except (gdb.error, ValueError):
+                        fp = None
+                    frames.append({"pc": int(frame.pc()), "sp": int(frame.read_register('sp')), "fp": fp})
+                    frame = frame.older()
+                return frames
+            finally:
+                selected.switch()
+                selected_frame.select()
+
+        def _frame_source(self, address, target_id=0):
+            sal = gdb.find_pc_line(address)
+            if sal.symtab and sal.line:
+                return sal.symtab.fullname(), sal.line
+            return None
 
         @validate_busy
         @validate_target
@@ -252,6 +563,22 @@ if HAVE_GDB:
 
             return output
 
+        def _instructions(self, address, count, target_id=0):
+            records = []
+            for inst in gdb.selected_frame().architecture().disassemble(address, count=count):
+                mnemonic, operands, symbol, comment = parse_instruction(inst['asm'])
+                raw = bytearray(self.read_memory(inst['addr'], inst['length'], target_id=target_id))
+                records.append({
+                    "address":  inst['addr'],
+                    "bytes":    ''.join('{:02x}'.format(b) for b in raw),
+                    "size":     inst['length'],
+                    "mnemonic": mnemonic,
+                    "operands": operands,
+                    "comment":  comment,
+                    "symbol":   symbol,
+                })
+            return records
+
         @validate_busy
         @validate_target
         @lock_host
@@ -259,43 +586,34 @@ if HAVE_GDB:
             """
             Recursively dereference a pointer for display
             """
-            fmt = ('<' if self.get_byte_order() == 'little' else '>') + {2: 'H', 4: 'L', 8: 'Q'}[self.get_addr_size()]
-
-            addr = pointer
-            chain = []
-
-            # recursively dereference
-            while True:
-                try:
-                    mem = gdb.selected_inferior().read_memory(addr, self.get_addr_size())
-                    log.debug("read mem: {}".format(mem))
-                    (ptr,) = struct.unpack(fmt, mem)
-                    if ptr in chain:
-                        break
-                    chain.append(('pointer', addr))
-                    addr = ptr
-                except gdb.MemoryError:
-                    log.exception("Dereferencing pointer 0x{:X}".format(addr))
-                    break
-
-            # get some info for the last pointer
-            # first try to resolve a symbol context for the address
-            if len(chain):
-                p, addr = chain[-1]
-                output = gdb.execute('info symbol {}'.format(addr), to_string=True)
-                if 'No symbol matches' not in output:
-                    chain.append(('symbol', output))
-                    log.debug("symbol context: {}".format(str(chain[-1])))
-                else:
-                    log.debug("no symbol context")
-                    mem = gdb.selected_inferior().read_memory(addr, 1)
-                    if ord(mem[0]) < 127:
-                        output = gdb.execute('x/s 0x{:X}'.format(addr), to_string=True)
-                        chain.append(('string', '"'.join(output.split('"')[1:-1])))
+            return self._dereference(pointer, target_id=target_id)
 
+        def _dereference(self, pointer, target_id=0, memo=None):
+            chain = self._pointer_chain(pointer, target_id=target_id, memo=memo)
             log.debug("chain: {}".format(chain))
             return chain
 
+        def _describe_pointer(self, addr, target_id=0):
+            # first try to find a symbol for the address, asking GDB only if
+            # we couldn't find any symbols ourselves
+            index = self._symbol_index(target_id=target_id)
+            if len(index):
+                symbol = index.symbolicate(addr)
+            else:
+                output = gdb.execute('info symbol {}'.format(addr), to_string=True)
+                symbol = output.strip() if 'No symbol matches' not in output else None
+            if symbol:
+                log.debug("symbol context: {}".format(symbol))
+                return [('symbol', symbol)]
+
+            log.debug("no symbol context")
+            region = self._memory_map(target_id=target_id).find(addr)
+            string = self._read_string(addr, min(256, region['end'] - addr) if region else 256,
+                                       target_id=target_id, min_length=1)
+            if string:
+                return [('string', string)]
+            return []
+
         @lock_host
         def command(self, command=None):
             """
@@ -305,6 +623,8 @@ if HAVE_GDB:
             """
             if command:
                 res = gdb.execute(command, to_string=True)
+                # the command may have changed anything we know about the target
+                self.invalidate()
             else:
                 raise Exception("No command specified")
 
@@ -379,171 +699,166 @@ if HAVE_GDB:
 
         def _state(self):
             """
-            Get the state of a given target. Internal use.
+            Get the state of the current inferior. Internal use.
+
+            The state is kept up to date by GDB's events (see
+            `connect_events()`). If we haven't seen an event for the inferior
+            yet, the state of its selected thread is used.
             """
             target = gdb.selected_inferior()
-
-            if target.is_valid():
-                try:
-                    output = gdb.execute('info program', to_string=True)
-                    if "not being run" in output:
-                        state = "invalid"
-                    elif "stopped" in output:
-                        state = "stopped"
-                except gdb.error as e:
-                    if 'Selected thread is running.' == str(e):
-                        state = "running"
-            else:
-                state = "invalid"
-
+            if not target.is_valid() or target.pid == 0:
+                return "invalid"
+
+            state = self._states.get(target.num)
+            if state is None:
+                thread = gdb.selected_thread()
+                if thread is None:
+                    return "invalid"
+                state = "running" if thread.is_running() else "stopped"
             return state
 
-        def get_register(self, reg_name):
-            arch = self.get_arch()
+        def _set_state(self, state, inferior=None):
+            """
+            Record the state of an inferior (the current one by default).
+            """
+            if inferior is None:
+                inferior = gdb.selected_inferior()
+            self._states[inferior.num] = state
 
-            if arch == "x86_64":
-                reg = self.get_register_x86_64(reg_name)
-            elif arch == "x86":
-                reg = self.get_register_x86(reg_name)
-            elif arch == "arm":
-                reg = self.get_register_arm(reg_name)
-            elif arch == "powerpc":
-                reg = self.get_register_powerpc(reg_name)
-            else:
+        def _reg_name(self, reg):
+            """
+            Get the name of the 'pc', 'sp' or 'fp' register for the current
+            architecture.
+            """
+            arch = self.get_arch()
+            if arch not in self.reg_names:
                 raise UnknownArchitectureException()
+            return self.reg_names[arch][reg]
 
-            return reg
-
-        def get_registers_x86_64(self):
-            # Get regular registers
-            regs = ['rax','rbx','rcx','rdx','rbp','rsp','rdi','rsi','rip','r8','r9','r10','r11','r12','r13','r14','r15',
-                    'cs','ds','es','fs','gs','ss']
-            vals = {}
-            for reg in regs:
-                try:
-                    vals[reg] = self.get_register_x86_64(reg)
-                except:
-                    log.debug('Failed getting reg: ' + reg)
-                    vals[reg] = 'N/A'
-
-            # Get flags
-            try:
-                vals['rflags'] = int(gdb.execute('info reg $eflags', to_string=True).split()[1], 16)
-            except:
-                log.debug('Failed getting reg: eflags')
-                vals['rflags'] = 'N/A'
-
-            # Get SSE registers
-            try:
-                sse = self.get_registers_sse(16)
-                vals = dict(list(vals.items()) + list(sse.items()))
-            except gdb.error:
-                log.exception("Failed to get SSE registers")
-
-            # Get FPU registers
-            try:
-                fpu = self.get_registers_fpu()
-                vals = dict(list(vals.items()) + list(fpu.items()))
-            except gdb.error:
-                log.exception("Failed to get FPU registers")
-
-            return vals
+        def get_register(self, reg_name):
+            """
+            Get the value of a single register from the selected frame.
+            """
+            return self._read_register(gdb.selected_frame(), reg_name)
 
-        def get_register_x86_64(self, reg):
-            return int(gdb.parse_and_eval('(long long)$'+reg)) & 0xFFFFFFFFFFFFFFFF
+        def get_registers(self, names):
+            """
+            Get the values of a list of registers from the selected frame.
 
-        def get_registers_x86(self):
-            # Get regular registers
-            regs = ['eax','ebx','ecx','edx','ebp','esp','edi','esi','eip','cs','ds','es','fs','gs','ss']
+            The registers are all read from the same frame object in one pass,
+            rather than evaluating an expression or parsing the output of
+            `info registers` for each one. Registers that can't be read are
+            returned as 'N/A'.
+            """
+            frame = gdb.selected_frame()
+            available = self._available_registers()
             vals = {}
-            for reg in regs:
+            for name in names:
+                if available is not None and name not in available:
+                    log.debug('Register not available: ' + name)
+                    vals[name] = 'N/A'
+                    continue
                 try:
-                    vals[reg] = self.get_register_x86(reg)
-                except:
-                    log.debug('Failed getting reg: ' + reg)
-                    vals[reg] = 'N/A'
-
-            # Get flags
-            try:
-                vals['eflags'] = int(gdb.execute('info reg $eflags', to_string=True).split()[1], 16)
-            except:
-                log.debug('Failed getting reg: eflags')
-                vals['eflags'] = 'N/A'
-
-            # Get SSE registers
-            sse = self.get_registers_sse(8)
-            vals = dict(list(vals.items()) + list(sse.items()))
-
-            # Get FPU registers
-            fpu = self.get_registers_fpu()
-            vals = dict(list(vals.items()) + list(fpu.items()))
-
+                    vals[name] = self._read_register(frame, name)
+                except (gdb.error, ValueError):
+                    log.debug('Failed getting reg: ' + name)
+                    vals[name] = 'N/A'
             return vals
 
-        def get_register_x86(self, reg):
-            log.debug('Getting register: ' + reg)
-            return int(gdb.parse_and_eval('(long)$'+reg)) & 0xFFFFFFFF
-
-        def get_registers_sse(self, num=8):
-            # the old way of doing this randomly crashed gdb or threw a python exception
-            regs = {}
-            for line in gdb.execute('info all-registers', to_string=True).split('\n'):
-                m = re.match('^([xyz]mm\d+)\s.*uint128 = (0x[0-9a-f]+)\}', line)
-                if m:
-                    regs[m.group(1)] = int(m.group(2), 16)
-            return regs
-
-        def get_registers_fpu(self):
-            regs = {}
-            for i in range(8):
-                reg = 'st'+str(i)
-                try:
-                    regs[reg] = int(gdb.execute('info reg '+reg, to_string=True).split()[-1][2:-1], 16)
-                except:
-                    log.debug('Failed getting reg: ' + reg)
-                    regs[reg] = 'N/A'
-            return regs
+        def _read_register(self, frame, name):
+            """
+            Read a register from a frame.
 
-        def get_registers_arm(self):
-            log.debug('Getting registers')
-            regs = ['pc','sp','lr','cpsr','r0','r1','r2','r3','r4','r5','r6', 'r7','r8','r9','r10','r11','r12']
-            vals = {}
-            for reg in regs:
-                try:
-                    vals[reg] = self.get_register_arm(reg)
-                except:
-                    log.debug('Failed getting reg: ' + reg)
-                    vals[reg] = 'N/A'
-            return vals
+            Vector registers are returned as a bytearray of their contents in
+            little-endian order. Integer, pointer and flags registers are
+            returned as unsigned ints. Anything else (e.g. an x87 or xmm
+            register) is returned as the int value of its raw little-endian
+            bytes, as GDB shows it in `info registers`.
+            """
+            try:
+                value = frame.read_register(name)
+            except AttributeError:
+                # GDB < 7.8
+                value = gdb.parse_and_eval('$' + name)
+            t = value.type.strip_typedefs()
+            if self.vector_register_class(self.get_arch(), name):
+                return self._register_bytes(value, t, name)
+            if t.code in self.int_type_codes:
+                return int(value) & ((1 << (t.sizeof * 8)) - 1)
+            return sum(b << (8 * i) for i, b in enumerate(self._register_bytes(value, t, name)))
+
+        def _register_bytes(self, value, t, name=None):
+            """
+            Get the raw contents of a register as a little-endian bytearray.
+            """
+            if hasattr(value, 'bytes'):
+                # GDB 14+ exposes the value's contents directly
+                return bytearray(value.bytes)
+            if t.code in self.int_type_codes:
+                n = int(value)
+            else:
+                arr = self._byte_view(value, t)
+                if arr is not None:
+                    return bytearray(int(arr[i]) & 0xFF for i in range(t.sizeof))
+                # no byte view (e.g. an x87 register), so have GDB format the
+                # raw contents
+                if hasattr(value, 'format_string'):
+                    n = int(value.format_string(format='z'), 16)
+                else:
+                    # GDB < 9 can only show them in `info registers`
+                    n = self._raw_register(name, value)
+            return bytearray((n >> (8 * i)) & 0xFF for i in range(t.sizeof))
 
-        def get_register_arm(self, reg):
-            log.debug('Getting register: ' + reg)
-            return int(gdb.parse_and_eval('(long)$'+reg)) & 0xFFFFFFFF
-
-        def get_registers_powerpc(self):
-            log.debug('Getting registers')
-            # TODO This could ideally pull from a single definition for the arch
-            regs = ['pc','msr','cr','lr', 'ctr',
-                    'r0','r1','r2','r3','r4','r5','r6', 'r7',
-                    'r8','r9','r10','r11','r12','r13','r14', 'r15',
-                    'r16','r17','r18','r19','r20','r21','r22', 'r23',
-                    'r24','r25','r26','r27','r28','r29','r30', 'r31']
-            vals = {}
-            for reg in regs:
+        def _raw_register(self, name, value):
+            """
+            Get the raw contents of a register as an int from the "raw" field
+            GDB shows for it in `info registers`, or the int value of `value`
+            if there isn't one.
+            """
+            if name:
                 try:
-                    vals[reg] = self.get_register_powerpc(reg)
-                except:
-                    log.debug('Failed getting reg: ' + reg)
-                    vals[reg] = 'N/A'
-            return vals
-
-        def get_register_powerpc(self, reg):
-            log.debug('Getting register: ' + reg)
-            return int(gdb.parse_and_eval('(long)$'+reg)) & 0xFFFFFFFF
+                    output = gdb.execute('info registers ' + name, to_string=True)
+                    m = re.search(r'raw (0x[0-9a-fA-F]+)', output)
+                    if m:
+                        return int(m.group(1), 16)
+                except gdb.error:
+                    pass
+            return int(value)
+
+        def _byte_view(self, value, t, depth=2):
+            """
+            Find a member of a vector register's union that views it as an
+            array of bytes (e.g. `v16_int8` for an x86 xmm register, `u8` for
+            ARM NEON registers).
+            """
+            if t.code == gdb.TYPE_CODE_ARRAY and t.target().strip_typedefs().sizeof == 1:
+                return value
+            if depth and t.code in (gdb.TYPE_CODE_UNION, gdb.TYPE_CODE_STRUCT):
+                for field in t.fields():
+                    ft = field.type.strip_typedefs()
+                    if ft.sizeof == t.sizeof:
+                        arr = self._byte_view(value[field.name], ft, depth - 1)
+                        if arr is not None:
+                            return arr
+            return None
+
+        @stop_cached
+        def _available_registers(self):
+            """
+            Get the names of the registers the selected frame's architecture
+            has, from its register descriptors.
+
+            Returns None if the descriptors aren't available (GDB < 11).
+            """
+            try:
+                return frozenset(r.name for r in gdb.selected_frame().architecture().registers())
+            except (AttributeError, gdb.error):
+                return None
 
         def get_next_instruction(self):
             return self.get_disasm().split('\n')[0].split(':')[1].strip()
 
+        @stop_cached
         def get_arch(self):
             try:
                 arch = gdb.selected_frame().architecture().name()
@@ -551,11 +866,13 @@ if HAVE_GDB:
                 arch = re.search('\(currently (.*)\)', gdb.execute('show architecture', to_string=True)).group(1)
             return self.archs[arch]
 
+        @stop_cached
         def get_addr_size(self):
             arch = self.get_arch()
 
             return self.sizes[arch]
 
+        @stop_cached
         def get_byte_order(self):
             return 'little' if 'little' in gdb.execute('show endian', to_string=True) else 'big'
 
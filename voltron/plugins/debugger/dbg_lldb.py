@@ -17,16 +17,92 @@ except ImportError:
 
 log = logging.getLogger('debugger')
 
-MAX_DEREF = 16
-
 if HAVE_LLDB:
+    class LLDBEventPump(threading.Thread):
+        """
+        Waits for events from LLDB's process and target broadcasters and
+        passes them on to an LLDBAdaptor, so it can keep track of its targets'
+        state without polling them on every request, and notify listeners as
+        soon as a target stops.
+        """
+        process_events = lldb.SBProcess.eBroadcastBitStateChanged
+        target_events = (lldb.SBTarget.eBroadcastBitBreakpointChanged | lldb.SBTarget.eBroadcastBitModulesLoaded |
+                         lldb.SBTarget.eBroadcastBitModulesUnloaded | lldb.SBTarget.eBroadcastBitSymbolsLoaded)
+
+        def __init__(self, adaptor):
+            super(LLDBEventPump, self).__init__()
+            self.daemon = True
+            self.adaptor = adaptor
+            self.listener = lldb.SBListener('voltron')
+            self.done = threading.Event()
+
+        def start(self):
+            host = self.adaptor.host
+
+            # listen for events from any targets and processes created from now on
+            self.listener.StartListeningForEventClass(host, lldb.SBProcess.GetBroadcasterClassName(),
+                                                      self.process_events)
+            self.listener.StartListeningForEventClass(host, lldb.SBTarget.GetBroadcasterClassName(),
+                                                      self.target_events)
+
+            # and from the ones that already exist
+            for i in range(host.GetNumTargets()):
+                target = host.GetTargetAtIndex(i)
+                target.GetBroadcaster().AddListener(self.listener, self.target_events)
+                if target.process.IsValid():
+                    target.process.GetBroadcaster().AddListener(self.listener, self.process_events)
+
+            super(LLDBEventPump, self).start()
+
+        def stop(self):
+            host = self.adaptor.host
+
+            # stop the listener from queueing events nobody will read
+            self.listener.StopListeningForEventClass(host, lldb.SBProcess.GetBroadcasterClassName(),
+                                                     self.process_events)
+            self.listener.StopListeningForEventClass(host, lldb.SBTarget.GetBroadcasterClassName(),
+                                                     self.target_events)
+            for i in range(host.GetNumTargets()):
+                target = host.GetTargetAtIndex(i)
+                target.GetBroadcaster().RemoveListener(self.listener, self.target_events)
+                if target.process.IsValid():
+                    target.process.GetBroadcaster().RemoveListener(self.listener, self.process_events)
+
+            self.done.set()
+
+        def run(self):
+            event = lldb.SBEvent()
+            while not self.done.is_set():
+                if self.listener.WaitForEvent(1, event):
+                    try:
+                        self.handle_event(event)
+                    except Exception as e:
+                        log.exception("Exception handling LLDB event: {}".format(e))
+
+        def handle_event(self, event):
+            if lldb.SBProcess.EventIsProcessEvent(event):
+                self.adaptor.process_state_changed(lldb.SBProcess.GetProcessFromEvent(event),
+                                                   lldb.SBProcess.GetStateFromEvent(event),
+                                                   lldb.SBProcess.GetRestartedFromEvent(event))
+            elif lldb.SBBreakpoint.EventIsBreakpointEvent(event):
+                self.adaptor.breakpoints_changed(lldb.SBBreakpoint.GetBreakpointFromEvent(event).GetTarget())
+            elif lldb.SBTarget.EventIsTargetEvent(event):
+                self.adaptor.modules_changed()
+
+
     class LLDBAdaptor(DebuggerAdaptor):
         """
         The interface with an instance of LLDB
         """
+        stopped_states = ['stopped', 'crashed']
+        exited_states = ['exited', 'detached']
+
         def __init__(self, host=None):
-            self.listeners = []
+            super(LLDBAdaptor, self).__init__()
             self.host_lock = threading.RLock()
+            self.event_pump = None
+            self._states = {}
+            self._stop_reasons = {}
             if host:
                 log.debug("Passed a debugger host")
                 self.host = host
@@ -62,6 +138,93 @@ if HAVE_LLDB:
                 arch = "x86_64"
             return (arch, platform, abi)
 
+        def start_event_pump(self):
+            """
+            Start tracking the state of LLDB's targets from its events (see
+            `LLDBEventPump`), rather than asking LLDB for it on each request
+            and relying on a stop-hook to find out when the target stops.
+
+            Returns True if the event pump is running.
+            """
+            if not self.event_pump:
+                pump = LLDBEventPump(self)
+                try:
+                    pump.start()
+                except Exception as e:
+                    log.error("Couldn't start LLDB event pump: {}".format(e))
+                    return False
+                self.event_pump = pump
+            return True
+
+        def stop_event_pump(self):
+            """
+            Stop tracking the state of LLDB's targets from its events.
+            """
+            if self.event_pump:
+                self.event_pump.stop()
+                self.event_pump = None
+                self._states = {}
+                self._stop_reasons = {}
+
+        @lock_host
+        def process_state_changed(self, process, state, restarted=False):
+            """
+            Called by the event pump when a process's state changes. Like the
+            other event handlers, this holds the host lock so the caches it
+            throws away aren't in use by a request.
+            """
+            target_id = self.host.GetIndexOfTarget(process.GetTarget())
+            state = self.host.StateAsCString(state)
+            self._states[target_id] = (process.GetUniqueID(), state)
+            log.debug("Target {} state changed to {}".format(target_id, state))
+
+            if state in self.stopped_states and not restarted:
+                thread = process.GetSelectedThread()
+                self._stop_reasons[target_id] = thread.GetStopDescription(256) if thread.IsValid() else None
+                self.update_state()
+            elif state in self.exited_states:
+                self._stop_reasons.pop(target_id, None)
+                # let anyone waiting for the target to stop know it's gone
+                self.update_state()
+            else:
+                self._stop_reasons.pop(target_id, None)
+                self.invalidate()
+
+        @lock_host
+        def breakpoints_changed(self, target):
+            """
+            Called by the event pump when breakpoints are added, removed or
+            changed. If the target is stopped, listeners are notified so views
+            can update.
+            """
+            target_id = self.host.GetIndexOfTarget(target)
+            if self._state(target_id, target) in self.stopped_states:
+                self.update_state()
+            else:
+                self.invalidate()
+
+        @lock_host
+        def modules_changed(self):
+            """
+            Called by the event pump when modules are loaded or unloaded, or
+            their symbols are loaded.
+            """
+            self.invalidate()
+
+        def _state(self, target_id=0, target=None):
+            """
+            Get the state of a target, from the event pump if it has seen the
+            target's process, otherwise from LLDB.
+            """
+            if target is None:
+                target = self.host.GetTargetAtIndex(target_id)
+            process = target.process
+            if target_id in self._states:
+                uid, state = self._states[target_id]
+                if uid == process.GetUniqueID():
+                    return state
+            return self.host.StateAsCString(process.GetState())
+
         def version(self):
             """
             Get the debugger's version.
@@ -87,9 +250,24 @@ if HAVE_LLDB:
             t = self.host.GetTargetAtIndex(target_id)
 
             # get target properties
+            d = dict(self._target_info(target_id))
+            d["state"] = self._state(target_id, t)
+            if target_id in self._stop_reasons:
+                d["stop_reason"] = self._stop_reasons[target_id]
+
+            return d
+
+        @stop_cached
+        def _target_info(self, target_id=0):
+            """
+            Return the properties of the specified target that don't change
+            while it's running (everything `_target()` returns except the
+            state), cached until the next stop.
+            """
+            t = self.host.GetTargetAtIndex(target_id)
+
             d = {}
             d["id"] = target_id
-            d["state"] = self.host.StateAsCString(t.process.GetState())
             d["file"] = t.GetExecutable().fullpath
             try:
                 d["arch"], _, _ = self.normalize_triple(t.triple)
@@ -99,6 +277,7 @@ if HAVE_LLDB:
                 d["arch"] = 'x86'
             d["byte_order"] = 'little' if t.byte_order == lldb.eByteOrderLittle else 'big'
             d["addr_size"] = t.addr_size
+            d["vector_layout"] = self.vector_layouts.get(d["arch"], {})
 
             return d
 
@@ -149,65 +328,78 @@ if HAVE_LLDB:
 
             `target_id` is a target ID (or None for the first target)
             """
-            target = self.host.GetTargetAtIndex(target_id)
-            state = self.host.StateAsCString(target.process.GetState())
-
-            return state
+            return self._state(target_id)
 
         @validate_busy
         @validate_target
         @lock_host
-        def registers(self, target_id=0, thread_id=None, registers=[]):
+        def registers(self, target_id=0, thread_id=None, registers=[], categories=[]):
             """
             Get the register values for a given target/thread.
 
             `target_id` is a target ID (or None for the first target)
             `thread_id` is a thread ID (or None for the selected thread)
+            `registers` is a list of register names to return
+            `categories` is a list of categories of registers to return (see
+            `DebuggerAdaptor.register_categories`)
+
+            If neither `registers` nor `categories` is specified all registers
+            except wide vector registers (see
+            `DebuggerAdaptor.vector_categories`) are returned. Only the values
+            of the registers that are returned are read. Vector registers are
+            returned as bytearrays.
             """
-            # get the target
-            target = self.host.GetTargetAtIndex(target_id)
+            # get the target and thread
             t_info = self._target(target_id)
+            thread = self._thread(target_id, thread_id)
 
-            # get the thread
-            if not thread_id:
-                thread_id = target.process.selected_thread.id
-            try:
-                thread = target.process.GetThreadByID(thread_id)
-            except:
-                raise NoSuchThreadException()
-
-            # if we got 'sp' or 'pc' in registers, change it to whatever the right name is for the current arch
+            # if we got 'sp', 'pc' or 'fp' in registers, change it to whatever the right name is for the current
+            # arch (keeping the original too, as LLDB calls some registers 'fp', 'sp' and 'pc')
             if t_info['arch'] in self.reg_names:
-                if 'pc' in registers:
-                    registers.remove('pc')
-                    registers.append(self.reg_names[t_info['arch']]['pc'])
-                if 'sp' in registers:
-                    registers.remove('sp')
-                    registers.append(self.reg_names[t_info['arch']]['sp'])
+                registers = registers + [self.reg_names[t_info['arch']].get(reg, reg) for reg in registers]
             else:
                 raise Exception("Unsupported architecture: {}".format(t_info['arch']))
 
             # get the registers
-            log.warn("thing: {}".format(registers))
-            regs = thread.GetFrameAtIndex(0).GetRegisters()
-
-            # extract the actual register values
-            objs = []
-            for i in xrange(len(regs)):
-                objs += regs[i]
+            if not registers and not categories:
+                categories = [c for c in self.register_categories if c not in self.vector_categories]
             regs = {}
-            for reg in objs:
-                val = 'n/a'
-                if reg.value != None:
-                    try:
-                        val = reg.GetValueAsUnsigned()
-                    except:
-                        reg = None
-                if registers == [] or reg.name in registers:
-                    regs[reg.name] = val
+            for regset in thread.GetFrameAtIndex(0).GetRegisters():
+                for reg in regset:
+                    if reg.name not in registers and self.register_category(reg.name) not in categories:
+                        continue
+                    regs[reg.name] = self._register_value(t_info['arch'], reg)
 
             return regs
 
+        def _register_value(self, arch, reg):
+            """
+            Extract the value of a register from its SBValue.
+
+            Vector registers are returned as a bytearray of their contents in
+            little-endian order, registers that fit in 64 bits as unsigned
+            ints, and anything wider (e.g. xmm registers) as the int value of
+            their raw little-endian bytes.
+            """
+            if reg.value == None:
+                return 'n/a'
+            vector = self.vector_register_class(arch, reg.name)
+            if reg.size <= 8 and not vector:
+                try:
+                    return reg.GetValueAsUnsigned()
+                except:
+                    return 'n/a'
+            error = lldb.SBError()
+            data = reg.GetData()
+            raw = bytearray(data.ReadRawData(error, 0, data.GetByteSize()) or b'')
+            if not error.Success():
+                return 'n/a'
+            if data.GetByteOrder() == lldb.eByteOrderBig:
+                raw.reverse()
+            if vector:
+                return raw
+            return sum(b << (8 * i) for i, b in enumerate(raw))
+
         @validate_busy
         @validate_target
         @lock_host
@@ -218,18 +410,8 @@ if HAVE_LLDB:
             `target_id` is a target ID (or None for the first target)
             `thread_id` is a thread ID (or None for the selected thread)
             """
-            # get registers and targets
-            regs = self.registers(target_id=target_id, thread_id=thread_id)
-            target = self._target(target_id=target_id)
-
-            # get stack pointer register
-            if target['arch'] in self.reg_names:
-                sp_name = self.reg_names[target['arch']]['sp']
-                sp = regs[sp_name]
-            else:
-                raise Exception("Unsupported architecture: {}".format(target['arch']))
-
-            return (sp_name, sp)
+            frame = self._thread(target_id, thread_id).GetFrameAtIndex(0)
+            return self._reg_name(target_id, 'sp'), frame.GetSP()
 
         @validate_busy
         @validate_target
@@ -241,18 +423,65 @@ if HAVE_LLDB:
             `target_id` is a target ID (or None for the first target)
             `thread_id` is a thread ID (or None for the selected thread)
             """
-            # get registers and targets
-            regs = self.registers(target_id=target_id, thread_id=thread_id)
-            target = self._target(target_id=target_id)
+            frame = self._thread(target_id, thread_id).GetFrameAtIndex(0)
+            return self._reg_name(target_id, 'pc'), frame.GetPC()
 
-            # get stack pointer register
-            if target['arch'] in self.reg_names:
-                pc_name = self.reg_names[target['arch']]['pc']
-                pc = regs[pc_name]
-            else:
-                raise Exception("Unsupported architecture: {}".format(target['arch']))
+        @validate_busy
+        @validate_target
+        @lock_host
+        def frame_pointer(self, target_id=0, thread_id=None):
+            """
+            Get the value of the frame pointer register.
 
-            return (pc_name, pc)
+            `target_id` is a target ID (or None for the first target)
+            `thread_id` is a thread ID (or None for the selected thread)
+            """
+            frame = self._thread(target_id, thread_id).GetFrameAtIndex(0)
+            return self._reg_name(target_id, 'fp'), frame.GetFP()
+
+        @validate_busy
+        @validate_target
+        @lock_host
+        def context(self, target_id=0, thread_id=None):
+            """
+            Get the program counter, stack pointer and frame pointer for a
+            given target/thread, read straight from the thread's top frame.
+
+            `target_id` is a target ID (or None for the first target)
+            `thread_id` is a thread ID (or None for the selected thread)
+
+            Returns data in the following structure:
+            {
+                "thread_id":    123456,
+                "pc":           0x100000cf0,
+                "sp":           0x7fff5fbff7a8,
+                "fp":           0x7fff5fbff7c0
+            }
+            """
+            thread = self._thread(target_id, thread_id)
+            frame = thread.GetFrameAtIndex(0)
+            return {"thread_id": thread.id, "pc": frame.GetPC(), "sp": frame.GetSP(), "fp": frame.GetFP()}
+
+        def _thread(self, target_id=0, thread_id=None):
+            """
+            Get the specified thread (or the selected thread) of a target.
+            """
+            process = self.host.GetTargetAtIndex(target_id).process
+            if not thread_id:
+                return process.selected_thread
+            thread = process.GetThreadByID(thread_id)
+            if not thread.IsValid():
+                raise NoSuchThreadException()
+            return thread
+
+        def _reg_name(self, target_id, reg):
+            """
+            Get the name of the 'pc', 'sp' or 'fp' register for a target.
+            """
+            arch = self._target(target_id=target_id)['arch']
+            if arch not in self.reg_names:
+                raise Exception("Unsupported architecture: {}".format(arch))
+            return self.reg_names[arch][reg]
 
         @validate_busy
         @validate_target
@@ -265,12 +494,12 @@ if HAVE_LLDB:
             `length` is the number of bytes to read
             `target_id` is a target ID (or None for the first target)
             """
-            # get the target
-            target = self.host.GetTargetAtIndex(target_id)
-
             # read memory
             log.debug('Reading 0x{:x} bytes of memory at 0x{:x}'.format(length, address))
+            return self.read_memory(address, length, target_id=target_id)
 
+        def _read_memory(self, address, length, target_id=0):
+            target = self.host.GetTargetAtIndex(target_id)
             error = lldb.SBError()
             memory = target.process.ReadMemory(address, length, error)
 
@@ -279,6 +508,97 @@ if HAVE_LLDB:
 
             return memory
 
+        def _local_pid(self, target_id=0):
+            target = self.host.GetTargetAtIndex(target_id)
+            if target.GetPlatform().GetName() != 'host':
+                return None
+            return target.process.GetProcessID() or None
+
+        def _breakpoint_sites(self, target_id=0):
+            # LLDB leaves its breakpoints in memory while the process is
+            # stopped. Its internal breakpoints (e.g. for shared library
+            # loading) aren't listed, but they're not in code that's
+            # usually looked at
+            target = self.host.GetTargetAtIndex(target_id)
+            sites = []
+            for bp in target.breakpoint_iter():
+                for i in range(bp.GetNumLocations()):
+                    loc = bp.GetLocationAtIndex(i)
+                    if loc.IsResolved():
+                        sites.append(loc.GetLoadAddress())
+            return sites
+
+        def _memory_regions(self, target_id=0):
+            target = self.host.GetTargetAtIndex(target_id)
+            infos = target.process.GetMemoryRegions()
+            regions = []
+            for i in range(infos.GetSize()):
+                info = lldb.SBMemoryRegionInfo()
+                if not infos.GetMemoryRegionAtIndex(i, info) or not info.IsMapped():
+                    continue
+                name = info.GetName()
+                if not name:
+                    module = target.ResolveLoadAddress(info.GetRegionBase()).GetModule()
+                    if module.IsValid():
+                        name = module.GetFileSpec().fullpath
+                perms = (info.IsReadable(), info.IsWritable(), info.IsExecutable())
+                regions.append({
+                    "start":    info.GetRegionBase(),
+                    "end":      info.GetRegionEnd(),
+                    "perms":    ''.join(c if p else '-' for c, p in zip('rwx', perms)),
+                    "file":     name,
+                })
+            return regions
+
+        def _modules(self, target_id=0):
+            target = self.host.GetTargetAtIndex(target_id)
+            modules = []
+            for module in target.module_iter():
+                # the module's lowest loaded section gives us its start and
+                # the file address it's loaded at
+                sections = [s for s in module.section_iter() if s.GetByteSize() and
+                            s.GetLoadAddress(target) != lldb.LLDB_INVALID_ADDRESS and s.GetName() != '__PAGEZERO']
+                if not sections:
+                    continue
+                first = min(sections, key=lambda s: s.GetFileAddress())
+                path = module.GetFileSpec().fullpath
+                modules.append({
+                    "path":         path,
+                    "start":        first.GetLoadAddress(target),
+                    "end":          max(s.GetLoadAddress(target) + s.GetByteSize() for s in sections),
+                    "link_base":    first.GetFileAddress(),
+                    "key":          (path, module.GetUUIDString(), first.GetFileAddress()),
+                    "build_id":     module.GetUUIDString(),
+                })
+            return modules
+
+        def _module_symbols(self, module, target_id=0):
+            target = self.host.GetTargetAtIndex(target_id)
+            sbmodule = target.FindModule(lldb.SBFileSpec(module['path']))
+            symbols = []
+            for symbol in sbmodule:
+                start = symbol.GetStartAddress().GetFileAddress()
+                end = symbol.GetEndAddress().GetFileAddress()
+                if start == lldb.LLDB_INVALID_ADDRESS:
+                    continue
+                size = end - start if end != lldb.LLDB_INVALID_ADDRESS and end > start else 0
+                symbols.append((start, size, symbol.GetName()))
+            return symbols, module['link_base']
+
+        def _frames(self, count, target_id=0, thread_id=None):
+            thread = self._thread(target_id, thread_id)
+            frames = []
+            for i in range(min(count, thread.GetNumFrames())):
+                frame = thread.GetFrameAtIndex(i)
+                frames.append({"pc": frame.GetPC(), "sp": frame.GetSP(), "fp": frame.GetFP()})
+            return frames
+
+        def _frame_source(self, address, target_id=0):
+            entry = self.host.GetTargetAtIndex(target_id).ResolveLoadAddress(address).GetLineEntry()
+            if entry.IsValid() and entry.GetLine():
+                return entry.GetFileSpec().fullpath, entry.GetLine()
+            return None
+
         @validate_busy
         @validate_target
         @lock_host
@@ -319,6 +639,23 @@ if HAVE_LLDB:
 
             return output
 
+        def _instructions(self, address, count, target_id=0):
+            t = self.host.GetTargetAtIndex(target_id)
+            records = []
+            for inst in t.ReadInstructions(lldb.SBAddress(address, t), count, self.disassembly_flavor()):
+                error = lldb.SBError()
+                data = inst.GetData(t)
+                raw = bytearray(data.ReadRawData(error, 0, data.GetByteSize()) or b'')
+                records.append({
+                    "address":  inst.GetAddress().GetLoadAddress(t),
+                    "bytes":    ''.join('{:02x}'.format(b) for b in raw),
+                    "size":     inst.GetByteSize(),
+                    "mnemonic": inst.GetMnemonic(t),
+                    "operands": inst.GetOperands(t),
+                    "comment":  inst.GetComment(t) or None,
+                })
+            return records
+
         @validate_busy
         @validate_target
         @lock_host
@@ -326,47 +663,37 @@ if HAVE_LLDB:
             """
             Recursively dereference a pointer for display
             """
-            t = self.host.GetTargetAtIndex(target_id)
-            error = lldb.SBError()
+            return self._dereference(pointer, target_id=target_id)
 
-            addr = pointer
-            chain = []
-
-            # recursively dereference
-            for i in range(0, MAX_DEREF):
-                ptr = t.process.ReadPointerFromMemory(addr, error)
-                if error.Success():
-                    if ptr in chain:
-                        chain.append(('circular', 'circular'))
-                        break
-                    chain.append(('pointer', addr))
-                    addr = ptr
-                else:
-                    break
-
-            # get some info for the last pointer
-            # first try to resolve a symbol context for the address
-            p, addr = chain[-1]
-            sbaddr = lldb.SBAddress(addr, t)
-            ctx = t.ResolveSymbolContextForAddress(sbaddr, lldb.eSymbolContextEverything)
-            if ctx.IsValid() and ctx.GetSymbol().IsValid():
-                # found a symbol, store some info and we're done for this pointer
-                fstart = ctx.GetSymbol().GetStartAddress().GetLoadAddress(t)
-                offset = addr - fstart
-                chain.append(('symbol', '{} + 0x{:X}'.format(ctx.GetSymbol().name, offset)))
-                log.debug("symbol context: {}".format(str(chain[-1])))
+        def _dereference(self, pointer, target_id=0, memo=None):
+            return self._pointer_chain(pointer, target_id=target_id, memo=memo)
+
+        def _describe_pointer(self, addr, target_id=0):
+            # first try to find a symbol for the address, asking LLDB only if
+            # we couldn't find any symbols ourselves
+            index = self._symbol_index(target_id=target_id)
+            if len(index):
+                symbol = index.symbolicate(addr)
             else:
-                # no symbol context found, see if it looks like a string
-                log.debug("no symbol context")
-                s = t.process.ReadCStringFromMemory(addr, 256, error)
-                for i in range(0, len(s)):
-                    if ord(s[i]) >= 128:
-                        s = s[:i]
-                        break
-                if len(s):
-                    chain.append(('string', s))
-
-            return chain
+                t = self.host.GetTargetAtIndex(target_id)
+                ctx = t.ResolveSymbolContextForAddress(lldb.SBAddress(addr, t), lldb.eSymbolContextSymbol)
+                symbol = None
+                if ctx.IsValid() and ctx.GetSymbol().IsValid():
+                    offset = addr - ctx.GetSymbol().GetStartAddress().GetLoadAddress(t)
+                    symbol = '{} + 0x{:X}'.format(ctx.GetSymbol().name, offset)
+            if symbol:
+                log.debug("symbol context: {}".format(symbol))
+                return [('symbol', symbol)]
+
+            # no symbol found, see if it looks like a string, reading through
+            # the memory cache
+            log.debug("no symbol context")
+            region = self._memory_map(target_id=target_id).find(addr)
+            string = self._read_string(addr, min(256, region['end'] - addr) if region else 256,
+                                       target_id=target_id, min_length=1)
+            if string:
+                return [('string', string)]
+            return []
 
         @lock_host
         def command(self, command=None):
@@ -380,6 +707,8 @@ if HAVE_LLDB:
                 res = lldb.SBCommandReturnObject()
                 ci = self.host.GetCommandInterpreter()
                 ci.HandleCommand(str(command), res)
+                # the command may have changed anything we know about the target
+                self.invalidate()
                 if res.Succeeded():
                     return res.GetOutput().strip()
                 else:
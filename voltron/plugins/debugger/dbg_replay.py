@@ -0,0 +1,132 @@
+from __future__ import print_function
+
+import json
+import logging
+import threading
+
+from voltron.api import *
+from voltron.plugin import *
+from voltron.dbg import *
+
+log = logging.getLogger('debugger')
+
+
+class ReplayAdaptor(DebuggerAdaptor):
+    """
+    An adaptor that serves API responses from a capture file (see
+    voltron.core.Capture) rather than talking to a real debugger.
+
+    The recording is split into stop epochs - the requests made before the
+    first stop, then those made after each stop. Requests are matched against
+    the ones recorded in the current epoch, falling back to earlier epochs.
+    """
+    live_requests = ['wait', 'version']
+
+    def __init__(self, path=None, *args, **kwargs):
+        super(ReplayAdaptor, self).__init__()
+        self.host_lock = threading.RLock()
+        self.epochs = [{}]
+        self.stop_times = []
+        self.position = 0
+        self.cursors = {}
+        self.host_version = 'replay'
+        if path:
+            self.load(path)
+
+    def load(self, path):
+        """
+        Load a capture file.
+        """
+        requests = {}
+        with open(path) as f:
+            for line in f:
+                record = json.loads(line)
+                if record[0] == 'voltron-capture':
+                    continue
+                t, kind = record[:2]
+                if kind == 'q':
+                    requests[record[2]] = (t, record[3], len(self.epochs) - 1)
+                elif kind == 'r':
+                    if record[2] not in requests:
+                        continue
+                    start, data, epoch = requests.pop(record[2])
+                    try:
+                        key = self.request_key(api_request(json.loads(data)['request'], data=data))
+                    except Exception as e:
+                        log.debug("Skipping unreplayable request {}: {}".format(data, e))
+                        continue
+                    if key is None:
+                        self.record_live(data, record[3])
+                    else:
+                        self.epochs[epoch].setdefault(key, []).append((t - start, record[3]))
+                elif kind == 's':
+                    self.epochs.append({})
+                    self.stop_times.append(t)
+        log.debug("Loaded {} stops from {}".format(len(self.stop_times), path))
+
+    def record_live(self, request, response):
+        """
+        Pick up anything we need from requests that aren't replayed.
+        """
+        try:
+            d = json.loads(response)
+            if d['data'].get('host_version'):
+                self.host_version = d['data']['host_version']
+        except Exception:
+            pass
+
+    def request_key(self, req):
+        """
+        Return the key a request is stored under, or None if it isn't
+        replayed. Requests are serialised by their request class so that
+        default and explicitly-specified fields compare the same.
+        """
+        if req.request in self.live_requests:
+            return None
+        return json.dumps(json.loads(str(req)), sort_keys=True)
+
+    def response(self, req):
+        """
+        Return a (latency, response) tuple for a request, where `response` is
+        the recorded JSON response, or None if it wasn't recorded.
+        """
+        key = self.request_key(req)
+        for epoch in range(self.position, -1, -1):
+            responses = self.epochs[epoch].get(key)
+            if responses:
+                # serve repeated requests in the order they were recorded
+                i = self.cursors.get(key, 0)
+                self.cursors[key] = i + 1
+                return responses[min(i, len(responses) - 1)]
+        return None
+
+    @property
+    def num_stops(self):
+        return len(self.stop_times)
+
+    def next_stop(self):
+        """
+        Move on to the next recorded stop and notify any waiting clients.
+        """
+        if self.position < len(self.epochs) - 1:
+            self.position += 1
+        self.cursors = {}
+        self.update_state()
+
+    def rewind(self):
+        self.position = 0
+        self.cursors = {}
+
+    def version(self):
+        return self.host_version
+
+    def state(self, target_id=0):
+        return "stopped"
+
+    def _target(self, target_id=0):
+        return {"id": 0, "state": "stopped"}
+
+
+class ReplayAdaptorPlugin(DebuggerAdaptorPlugin):
+    host = 'replay'
+    adaptor_class = ReplayAdaptor
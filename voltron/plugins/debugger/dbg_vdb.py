@@ -14,6 +14,7 @@ from voltron.dbg import *
 try:
     import vdb
     import envi
+    import envi.memory
     HAVE_VDB = True
 except ImportError:
     HAVE_VDB = False
@@ -57,7 +58,7 @@ if HAVE_VDB:
         }
 
         def __init__(self, vdb, vtrace, *args, **kwargs):
-            self.listeners = []
+            super(VDBAdaptor, self).__init__()
             self.host_lock = threading.RLock()
             self._vdb = vdb
             self._vtrace = vtrace
@@ -83,13 +84,24 @@ if HAVE_VDB:
                 "state:     "stopped"  # state
             }
             """
+            d = dict(self._target_info())
+            d["state"] = self._state()
+            return d
+
+        @stop_cached
+        def _target_info(self):
+            """
+            Return the properties of the current inferior that don't change
+            while it's running (everything `_target()` returns except the
+            state), cached until the next stop.
+            """
             d = {}
             d["id"] = 0
-            d["state"] = self._state()
             d["file"] = shlex.split(self._vdb.getTrace().getMeta("ExecCommand"))[0]
             d["arch"] = self.get_arch()
             d['byte_order'] = self.get_byte_order()
             d['addr_size'] = self.get_addr_size()
+            d['vector_layout'] = self.vector_layouts.get(d['arch'], {})
             return d
 
         @lock_host
@@ -124,37 +136,38 @@ if HAVE_VDB:
         @validate_busy
         @validate_target
         @lock_host
-        def registers(self, target_id=0, thread_id=None, registers=[]):
+        def registers(self, target_id=0, thread_id=None, registers=[], categories=[]):
             """
             Get the register values for a given target/thread.
             `target_id` is ignored.
+            `registers` is a list of register names to return
+            `categories` is a list of categories of registers to return (see
+            `DebuggerAdaptor.register_categories`)
+            If neither is specified all registers except wide vector registers
+            (see `DebuggerAdaptor.vector_categories`) are returned. Vector
+            registers are returned as bytearrays.
             """
             arch = self.get_arch()
 
             if arch in self.reg_names:
-                if 'pc' in registers:
-                    registers.remove('pc')
-                    registers.append(self.reg_names[arch]['pc'])
-                if 'sp' in registers:
-                    registers.remove('sp')
-                    registers.append(self.reg_names[arch]['sp'])
-            else:
-                raise Exception("Unsupported architecture: {}".format(target['arch']))
-
-            if registers != []:
-                regs = {}
-                for reg in registers:
-                    regs[reg] = self.get_register(reg)
+                registers = [self.reg_names[arch].get(reg, reg) for reg in registers]
             else:
-                log.debug('Getting registers for arch {}'.format(arch))
-                if arch == "x86_64":
-                    regs = self.get_registers_x86_64()
-                elif arch == "x86":
-                    regs = self.get_registers_x86()
-                elif arch == "arm":
-                    regs = self.get_registers_arm()
-                else:
-                    raise UnknownArchitectureException()
+                raise Exception("Unsupported architecture: {}".format(arch))
+
+            if not registers and not categories:
+                categories = [c for c in self.register_categories if c not in self.vector_categories]
+
+            log.debug('Getting registers for arch {}'.format(arch))
+            regs = {}
+            for name, val in self.get_registers().items():
+                if name not in registers and self.register_category(name) not in categories:
+                    continue
+                vector = self.vector_register_class(arch, name)
+                if vector:
+                    # vivisect gives us vector registers as ints
+                    size = self.vector_layouts[arch][vector]['size'] or (val.bit_length() + 7) // 8
+                    val = bytearray((val >> (8 * i)) & 0xFF for i in range(size))
+                regs[name] = val
 
             return regs
 
@@ -166,14 +179,7 @@ if HAVE_VDB:
             Get the value of the stack pointer register.
             `target_id` is ignored.
             """
-            arch = self.get_arch()
-            if arch in self.reg_names:
-                sp_name = self.reg_names[arch]['sp']
-                sp = self.get_register(sp_name)
-            else:
-                raise UnknownArchitectureException()
-
-            return sp_name, sp
+            return self._reg_name('sp'), self._vdb.getTrace().getStackCounter()
 
         @validate_busy
         @validate_target
@@ -183,14 +189,35 @@ if HAVE_VDB:
             Get the value of the program counter register.
             `target_id` is ignored.
             """
-            arch = self.get_arch()
-            if arch in self.reg_names:
-                pc_name = self.reg_names[arch]['pc']
-                pc = self.get_register(pc_name)
-            else:
-                raise UnknownArchitectureException()
+            return self._reg_name('pc'), self._vdb.getTrace().getProgramCounter()
+
+        @validate_busy
+        @validate_target
+        @lock_host
+        def frame_pointer(self, target_id=0, thread_id=None):
+            """
+            Get the value of the frame pointer register.
+            `target_id` is ignored.
+            """
+            fp_name = self._reg_name('fp')
+            return fp_name, self._vdb.getTrace().getRegisterByName(fp_name)
 
-            return pc_name, pc
+        @validate_busy
+        @validate_target
+        @lock_host
+        def context(self, target_id=0, thread_id=None):
+            """
+            Get the program counter, stack pointer and frame pointer for the
+            current thread.
+            `target_id` and `thread_id` are ignored.
+            """
+            trace = self._vdb.getTrace()
+            return {
+                "thread_id":    trace.getCurrentThread(),
+                "pc":           trace.getProgramCounter(),
+                "sp":           trace.getStackCounter(),
+                "fp":           trace.getRegisterByName(self._reg_name('fp')),
+            }
 
         @validate_busy
         @validate_target
@@ -205,12 +232,41 @@ if HAVE_VDB:
             `target_id` is ignored.
             """
             log.debug('Reading 0x{:x} bytes of memory at 0x{:x}'.format(length, address))
+            return self.read_memory(address, length)
+
+        def _read_memory(self, address, length, target_id=0):
             t = self._vdb.getTrace()
             try:
                 return t.readMemory(address, length)
             except:
                 raise FailedToReadMemoryError()
 
+        def _local_pid(self, target_id=0):
+            return self._vdb.getTrace().getPid() or None
+
+        def _breakpoint_sites(self, target_id=0):
+            return [bp.getAddress() for bp in self._vdb.getTrace().getBreakpoints() if bp.getAddress() is not None]
+
+        def _memory_regions(self, target_id=0):
+            regions = []
+            for va, size, perms, fname in self._vdb.getTrace().getMemoryMaps():
+                flags = (envi.memory.MM_READ, envi.memory.MM_WRITE, envi.memory.MM_EXEC)
+                regions.append({
+                    "start":    va,
+                    "end":      va + size,
+                    "perms":    ''.join(c if perms & f else '-' for c, f in zip('rwx', flags)),
+                    "file":     fname or None,
+                })
+            return regions
+
+        def _symbols(self, target_id=0):
+            trace = self._vdb.getTrace()
+            symbols = []
+            for libname in trace.getNormalizedLibNames():
+                for sym in trace.getSymsForFile(libname).getSymList():
+                    symbols.append((int(sym), sym.size, str(sym)))
+            return symbols
+
         @validate_busy
         @validate_target
         @lock_host
@@ -230,22 +286,6 @@ if HAVE_VDB:
 
             return memory
 
-        def _get_n_opcodes_length(self, address, count):
-            """
-            Get the number of bytes used to represent the `n` instructions
-              at `address`.
-
-            `address` is the starting address of the sequence of instructions.
-            `count` is the number of instructions to decode.
-            """
-            length = 0
-            t = self._vdb.getTrace()
-            arch = self._vdb.arch.getArchId()
-            for i in xrange(count):
-                op = t.parseOpcode(address + length, arch=arch)
-                length += op.size
-            return length
-
         @validate_busy
         @validate_target
         @lock_host
@@ -257,13 +297,81 @@ if HAVE_VDB:
             current program counter is used.
             `count` is the number of instructions to disassemble.
             """
+            pc_name, pc = self.program_counter(target_id=target_id)
             if address == None:
-                pc_name, address = self.program_counter(target_id=target_id)
+                address = pc
 
-            length = self._get_n_opcodes_length(address, count)
-            can = envi.memcanvas.StringMemoryCanvas(self._vdb.memobj, self._vdb.symobj)
-            can.renderMemory(address, length, self._vdb.opcoderend)
-            return str(can)
+            # the text is made from the instruction cache's records, so cached
+            # instructions aren't decoded again to render them
+            return format_instructions(self.instructions(target_id=target_id, address=address, count=count), pc=pc)
+
+        def _instructions(self, address, count, target_id=0):
+            t = self._vdb.getTrace()
+            arch = self._vdb.arch.getArchId()
+            records = []
+            for i in xrange(count):
+                op = t.parseOpcode(address, arch=arch)
+                mnemonic, operands, symbol, comment = parse_instruction(str(op))
+                targets = [va for va, flags in op.getBranches()
+                           if va is not None and not flags & (envi.BR_FALL | envi.BR_DEREF)]
+                raw = bytearray(self.read_memory(address, op.size, target_id=target_id))
+                records.append({
+                    "address":  address,
+                    "bytes":    ''.join('{:02x}'.format(b) for b in raw),
+                    "size":     op.size,
+                    "mnemonic": mnemonic,
+                    "operands": operands,
+                    "comment":  comment,
+                    "target":   targets[0] if targets else None,
+                })
+                address += op.size
+            return records
+
+        def _xref_decoder(self, arch):
+            """
+            Decode with the envi architecture module rather than capstone, so
+            no other disassembler is needed.
+            """
+            names = {'x86': 'i386', 'x86_64': 'amd64', 'arm': 'arm'}
+            if arch not in names:
+                return None
+            module = envi.getArchModule(names[arch])
+
+            def decode(data, address):
+                data = bytes(data)
+                offset = 0
+                while offset < len(data):
+                    try:
+                        op = module.archParseOpcode(data, offset, address + offset)
+                    except Exception:
+                        offset += 1
+                        continue
+                    refs = [va for va, flags in op.getBranches()
+                            if va is not None and not flags & (envi.BR_FALL | envi.BR_DEREF)]
+                    for oper in op.opers:
+                        try:
+                            if oper.isImmed():
+                                refs.append(oper.getOperValue(op))
+                            elif oper.isDeref():
+                                va = oper.getOperAddr(op, None)
+                                if va is not None:
+                                    refs.append(va)
+                        except Exception:
+                            pass
+                    if op.iflags & envi.IF_CALL:
+                        kind = 'call'
+                    elif op.iflags & envi.IF_RET:
+                        kind = 'return'
+                    elif op.iflags & envi.IF_COND:
+                        kind = 'conditional'
+                    elif op.iflags & envi.IF_BRANCH:
+                        kind = 'jump'
+                    else:
+                        kind = None
+                    yield address + offset, op.size, kind, sorted(set(refs))
+                    offset += op.size
+
+            return decode
 
         def _get_ascii_string(self, address, min_length=4, max_length=32):
             """
@@ -331,48 +439,28 @@ if HAVE_VDB:
             Recursively dereference a pointer for display
             `target_id` is ignored.
             """
-            fmt = ('<' if self.get_byte_order() == 'little' else '>') + {2: 'H', 4: 'L', 8: 'Q'}[self.get_addr_size()]
-
-            addr = pointer
-            chain = []
+            return self._dereference(pointer, target_id=target_id)
 
-            # recursively dereference
-            while True:
-                try:
-                    mem = self.memory(addr, self.get_addr_size())
-                except FailedToReadMemoryError:
-                    break
-                except Exception as e:
-                    print(e)
-                    print(type(e))
-                    print(e.__class__.__name__)
-                    break
-                log.debug("read mem: {}".format(mem))
-                (ptr,) = struct.unpack(fmt, mem)
-                if ptr in chain:
-                    break
-                chain.append(('pointer', addr))
-                addr = ptr
+        def _dereference(self, pointer, target_id=0, memo=None):
+            chain = self._pointer_chain(pointer, target_id=target_id, memo=memo)
+            log.debug("chain: {}".format(chain))
+            return chain
 
-            # get some info for the last pointer
+        def _describe_pointer(self, addr, target_id=0):
             # first try to resolve a symbol context for the address
-            p, addr = chain[-1]
             output = self._vdb.reprPointer(addr)
             if "Who knows?!?!!?" not in output:
-                chain.append(('symbol', output))
-                log.debug("symbol context: {}".format(str(chain[-1])))
-            else:
-                log.debug("no symbol context")
+                log.debug("symbol context: {}".format(output))
+                return [('symbol', output)]
+
+            log.debug("no symbol context")
+            try:
+                return [("string", self._get_ascii_string(addr))]
+            except NotAStringError:
                 try:
-                    chain.append(("string", self._get_ascii_string(addr)))
+                    return [("string", self._get_unicode_string(addr))]
                 except NotAStringError:
-                    try:
-                        chain.append(("string", self._get_unicode_string(addr)))
-                    except NotAStringError:
-                        pass
-
-            log.debug("chain: {}".format(chain))
-            return chain
+                    return []
 
         @lock_host
         def command(self, command=None):
@@ -391,6 +479,7 @@ if HAVE_VDB:
                     self._vdb.onecmd(command)
                 finally:
                     self._vdb.canvas = oldcan
+                    self.invalidate()
                 return str(newcan).rstrip("\n")
             else:
                 raise Exception("No command specified")
@@ -426,32 +515,15 @@ if HAVE_VDB:
         def get_registers(self):
             return self._vdb.getTrace().getRegisters()
 
+        def _reg_name(self, reg):
+            arch = self.get_arch()
+            if arch not in self.reg_names:
+                raise UnknownArchitectureException()
+            return self.reg_names[arch][reg]
+
         def get_register(self, reg_name):
             return self.get_registers()[reg_name]
 
-        def get_registers_x86_64(self):
-            return self.get_registers()
-
-        def get_registers_x86(self):
-            return self.get_registers()
-
-        def get_registers_arm(self):
-            return self.get_registers()
-
-        def get_registers_sse(self, num=8):
-            sse = {}
-            for k, v in self.get_registers().items():
-                if k.startswith("xmm"):
-                    sse[k] = v
-            return sse
-
-        def get_registers_fpu(self):
-            fpu = {}
-            for k, v in self.get_registers().items():
-                if k.startswith("st"):
-                    fpu[k] = v
-            return fpu
-
         def get_next_instruction(self):
             dis = self.disassemble(address=self.program_counter()[1], count=1)
             return dis.partition("\n")[0].strip()
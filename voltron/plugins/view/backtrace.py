@@ -1,5 +1,8 @@
+import os
 import logging
 
+from blessed import Terminal
+
 from voltron.view import *
 from voltron.plugin import *
 from voltron.api import *
@@ -13,12 +16,17 @@ class BacktraceView (TerminalView):
 
         # Set up header and error message if applicable
         self.title = '[backtrace]'
-        req = api_request('command')
-        req.command = "bt"
+
+        # only ask for as many frames as will fit
+        req = api_request('backtrace', depth=max(height, 1))
         res = self.client.send_request(req)
         if res and res.is_success:
-            # Get the command output
-            self.body = res.output
+            if res.unwinder == 'frame_pointer':
+                self.info = 'frame pointer unwind'
+            else:
+                self.info = ''
+            term = Terminal()
+            self.body = '\n'.join(self.format_frame(frame, term) for frame in res.frames)
         else:
             log.error("Error getting backtrace: {}".format(res.message))
             self.body = self.colour(res.message, 'red')
@@ -26,6 +34,25 @@ class BacktraceView (TerminalView):
         # Call parent's render method
         super(BacktraceView, self).render()
 
+    def format_frame(self, frame, term):
+        """
+        Format a frame record from the backtrace API as a row.
+        """
+        fmt = self.config.format
+        d = dict(frame, t=term)
+        d['current'] = fmt.current.format(t=term) if frame['index'] == 0 else ''
+        if frame['function']:
+            d['function'] = '{} + 0x{:x}'.format(frame['function'], frame['offset'])
+        else:
+            d['function'] = '??'
+        if frame['file']:
+            d['location'] = fmt.source.format(t=term, file=os.path.basename(frame['file']), line=frame['line'])
+        elif frame['module']:
+            d['location'] = fmt.module.format(t=term, module=os.path.basename(frame['module']))
+        else:
+            d['location'] = ''
+        return fmt.row.format(**d)
+
 
 class BacktraceViewPlugin(ViewPlugin):
     plugin_type = 'view'
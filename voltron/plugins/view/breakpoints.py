@@ -14,10 +14,10 @@ class BreakpointsView (TerminalView):
         self.title = '[breakpoints]'
 
         # get PC first so we can highlight a breakpoint we're at
-        req = api_request('registers', registers=['pc'])
+        req = api_request('context')
         res = self.client.send_request(req)
-        if res and res.is_success and len(res.registers) > 0:
-            pc = res.registers[list(res.registers.keys())[0]]
+        if res and res.is_success:
+            pc = res.pc
         else:
             pc = -1
 
@@ -1,6 +1,7 @@
 from voltron.view import *
 from voltron.plugin import *
 from voltron.api import *
+from voltron.dbg import format_instructions
 try:
     from voltron.lexers import *
     have_pygments = True
@@ -8,25 +9,36 @@ except ImportError:
     have_pygments = False
 
 class DisasmView (TerminalView):
+    @classmethod
+    def configure_subparser(cls, subparsers):
+        sp = subparsers.add_parser('disassembly', help='disassembly view', aliases=('d', 'dis', 'disasm'))
+        VoltronView.add_generic_arguments(sp)
+        sp.add_argument('--before', '-b', action='store', type=int, default=None,
+                        help='number of instructions to show before the current one')
+        sp.set_defaults(func=DisasmView)
+
     def render(self):
         height, width = self.window_size()
 
         # Set up header & error message if applicable
         self.title = '[code]'
 
-        # Request data
-        req = api_request('disassemble')
-        req.count = self.body_height()
+        # Request data. The instructions are formatted from records that are
+        # cached by the debugger, so unchanged code isn't decoded every stop
+        before = getattr(self.args, 'before', None)
+        if before is None:
+            before = self.config.before
+        before = min(before, self.body_height() - 1)
+        req = api_request('disassemble_window', offset=-before, count=self.body_height())
         res = self.client.send_request(req)
         if res and res.is_success:
             # Get the disasm
-            disasm = res.disassembly
-            disasm = '\n'.join(disasm.split('\n')[:self.body_height()])
+            disasm = format_instructions(res.instructions, pc=res.address)
 
             # Pygmentize output
             if have_pygments:
                 try:
-                    lexer = all_lexers['{}_{}'.format(res.host, res.flavor)]()
+                    lexer = all_lexers['voltron_{}'.format(res.flavor)]()
                     disasm = pygments.highlight(disasm, lexer, pygments.formatters.TerminalFormatter())
                 except Exception as e:
                     log.warning('Failed to highlight disasm: ' + str(e))
@@ -0,0 +1,73 @@
+import logging
+
+from voltron.view import *
+from voltron.plugin import *
+from voltron.api import *
+from voltron.dbg import format_instructions
+
+log = logging.getLogger('view')
+
+
+class GraphView (TerminalView):
+    """
+    Shows the control flow graph of the current function as a list of basic
+    blocks in address order, each followed by the blocks it branches to,
+    with the current block highlighted.
+    """
+    def render(self):
+        height, width = self.window_size()
+
+        # Set up header and error message if applicable
+        self.title = '[graph]'
+        req = api_request('function_cfg')
+        res = self.client.send_request(req)
+        if res and res.is_success:
+            if res.function:
+                self.info = res.function['name']
+            lines, current = self.format_graph(res)
+
+            # scroll so the current block is at the top
+            start = max(current - 1, 0) if current is not None else 0
+            self.body = '\n'.join(lines[start:])
+        else:
+            log.error("Error getting control flow graph: {}".format(res.message))
+            self.body = self.colour(res.message, 'red')
+
+        # Call parent's render method
+        super(GraphView, self).render()
+
+    def format_graph(self, res):
+        """
+        Format the graph as a list of lines. Returns the lines and the index
+        of the line the current block starts on, or None.
+        """
+        colours = self.config.format
+        successors = {}
+        for edge in res.edges:
+            successors.setdefault(edge['from'], []).append(edge)
+
+        lines = []
+        current = None
+        for block in res.blocks:
+            is_current = block['start'] <= res.address < block['end']
+            label = 'loc_{:x}:'.format(block['start'])
+            if is_current:
+                current = len(lines)
+                label = self.colour(label, colours.current_colour, attrs=['bold'])
+            else:
+                label = self.colour(label, colours.label_colour)
+            lines.append(label)
+            lines.extend(format_instructions(block['instructions'], pc=res.address).split('\n'))
+            edges = successors.get(block['start'], [])
+            if edges:
+                lines.append(self.colour('    => ' + ', '.join('loc_{:x} ({})'.format(e['to'], e['type'])
+                                                              for e in edges), colours.edge_colour))
+            lines.append('')
+        return lines, current
+
+
+class GraphViewPlugin(ViewPlugin):
+    plugin_type = 'view'
+    name = 'graph'
+    aliases = ('g', 'cfg')
+    view_class = GraphView
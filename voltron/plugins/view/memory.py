@@ -71,6 +71,20 @@ class MemoryView (TerminalView):
         if addr != None:
             res = self.client.perform_request('memory', address=addr, length=self.body_height()*self.args.bytes)
             if res and res.is_success:
+                # dereference all of the words at once
+                chains = {}
+                classes = {}
+                if self.args.deref:
+                    fmt = ('<' if target['byte_order'] == 'little' else '>') + \
+                            {2: 'H', 4: 'L', 8: 'Q'}[target['addr_size']]
+                    pointers = {}
+                    for c in range(0, res.bytes - target['addr_size'] + 1, self.args.bytes):
+                        pointers[c] = struct.unpack(fmt, res.memory[c:c+target['addr_size']])[0]
+                    if pointers:
+                        deref_res = self.client.perform_request('dereference_many', pointers=list(pointers.values()))
+                        if deref_res.is_success:
+                            chains = dict(zip(pointers.keys(), deref_res.chains))
+                            classes = dict(zip(pointers.keys(), deref_res.classes or []))
 
                 lines = []
                 for c in range(0, res.bytes, self.args.bytes):
@@ -78,15 +92,13 @@ class MemoryView (TerminalView):
                     addr_str = self.colour(self.format_address(addr + c, size=target['addr_size'], pad=False),
                                             self.config.format.addr_colour)
                     if self.args.deref:
-                        fmt = ('<' if target['byte_order'] == 'little' else '>') + \
-                                {2: 'H', 4: 'L', 8: 'Q'}[target['addr_size']]
                         info_str = ''
                         if len(chunk) == target['addr_size']:
-                            pointer = list(struct.unpack(fmt, chunk))[0]
                             memory_str = ' '.join(["%02X" % x for x in six.iterbytes(chunk)])
-                            deref_res = self.client.perform_request('dereference', pointer=pointer)
-                            if deref_res.is_success:
-                                info_str = self.format_deref(deref_res.output)
+                            if c in classes:
+                                memory_str = self.colour_pointer(memory_str, classes[c])
+                            if c in chains:
+                                info_str = self.format_deref(chains[c])
                     else:
                         memory_str = ' '.join(["%02X" % x for x in six.iterbytes(chunk)])
                         info_str = ''
@@ -113,6 +125,16 @@ class MemoryView (TerminalView):
             addr_str = prefix + addr_str
         return addr_str
 
+    def colour_pointer(self, text, info):
+        """
+        Colour a word by the class of what it points to (see the
+        `dereference_many` API).
+        """
+        colours = self.config.format.pointer_colours
+        if colours and info['class'] in colours:
+            return self.colour(text, colours[info['class']])
+        return text
+
     def format_deref(self, deref, size=8):
         fmtd = []
         for t,item in deref:
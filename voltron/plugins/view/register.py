@@ -6,6 +6,14 @@ from voltron.api import *
 
 
 class RegisterView (TerminalView):
+    # register categories (see the `registers` API request) needed to display
+    # each section
+    SECTION_CATEGORIES = {
+        'general':  ['general', 'flags', 'segment', 'system'],
+        'sse':      ['sse'],
+        'fpu':      ['fpu'],
+    }
+
     FORMAT_INFO = {
         'x86_64': [
             {
@@ -315,14 +323,19 @@ class RegisterView (TerminalView):
                     error = "Architecture '{}' not supported".format(arch)
                 else:
                     # get next instruction
-                    res = self.client.perform_request('disassemble', count=1)
+                    res = self.client.perform_request('disassemble', count=1, structured=True)
                     try:
-                        self.curr_inst = res.disassembly.strip().split('\n')[-1].split(':')[1].strip()
+                        inst = res.instructions[0]
+                        self.curr_inst = '{} {}'.format(inst['mnemonic'], inst['operands']).strip()
                     except:
                         self.curr_inst = None
 
-                    # get registers for target
-                    res = self.client.perform_request('registers')
+                    # get registers for target, only fetching the categories
+                    # of registers that are displayed
+                    categories = []
+                    for sec in self.config.sections:
+                        categories += [c for c in self.SECTION_CATEGORIES[sec] if c not in categories]
+                    res = self.client.perform_request('registers', categories=categories)
                     if res.is_error:
                         error = "Failed getting registers: {}".format(res.message)
 
@@ -340,6 +353,9 @@ class RegisterView (TerminalView):
             formats = self.FORMAT_INFO[arch]
             formatted = {}
             for fmt in formats:
+                if fmt['category'] not in self.config.sections:
+                    continue
+
                 # Apply defaults where they're missing
                 fmt = dict(list(self.config.format.items()) + list(fmt.items()))
 
@@ -0,0 +1,98 @@
+from __future__ import print_function
+
+import time
+import socket
+import logging
+
+from six.moves import input
+
+import voltron
+from .api import *
+from .plugin import *
+from .core import *
+
+log = logging.getLogger('main')
+
+
+class ReplayServer(Server):
+    """
+    Server that answers requests from a recording made with `Capture` instead
+    of dispatching them to a debugger adaptor.
+
+    Responses are delayed by the time the original request took, unless
+    `zero_latency` is set.
+    """
+    def __init__(self, zero_latency=False, *args, **kwargs):
+        super(ReplayServer, self).__init__(*args, **kwargs)
+        self.zero_latency = zero_latency
+
+    def dispatch_request(self, req, client=None, seq=None):
+        if req.request in voltron.debugger.live_requests:
+            return super(ReplayServer, self).dispatch_request(req, client, seq)
+
+        recorded = voltron.debugger.response(req)
+        if recorded:
+            latency, res = recorded
+            if not self.zero_latency:
+                time.sleep(latency)
+        else:
+            res = str(APIGenericErrorResponse("Request not found in recording: {}".format(str(req))))
+
+        if client:
+            try:
+                client.send_response(res)
+            except socket.error:
+                log.error("Client closed before we could respond")
+        else:
+            return res
+
+
+class Replay(object):
+    """
+    Replays a session recorded with the `server.capture` config option, so
+    that views (or `voltron bench`) can be run against it without a debugger.
+    """
+    @classmethod
+    def configure_subparser(cls, subparsers):
+        sp = subparsers.add_parser('replay', help='replay a captured debugger session')
+        sp.set_defaults(func=Replay)
+        sp.add_argument('file', help='capture file to replay')
+        sp.add_argument('--zero-latency', '-z', action='store_true', default=False,
+                        help='respond immediately rather than with the recorded latency')
+        sp.add_argument('--interval', '-i', type=float, default=None,
+                        help='seconds between stops. if not given, press enter to stop')
+        sp.add_argument('--realtime', '-r', action='store_true', default=False,
+                        help='stop at the same times the debugger stopped in the recording')
+        sp.add_argument('--loop', '-l', action='store_true', default=False,
+                        help='start again from the beginning at the end of the recording')
+
+    def __init__(self, args={}, loaded_config={}):
+        self.args = args
+        self.adaptor = debugger_adaptor('replay', args.file)
+        voltron.debugger = self.adaptor
+        self.server = ReplayServer(zero_latency=args.zero_latency)
+
+    def run(self):
+        self.server.start()
+        print("Replaying {} stops from {}".format(self.adaptor.num_stops, self.args.file))
+
+        while True:
+            last = 0
+            for i, t in enumerate(self.adaptor.stop_times):
+                if self.args.realtime:
+                    time.sleep(max(0, t - last))
+                    last = t
+                elif self.args.interval is not None:
+                    time.sleep(self.args.interval)
+                else:
+                    input("Press enter for stop {}/{}".format(i + 1, self.adaptor.num_stops))
+                self.adaptor.next_stop()
+                log.debug("Replayed stop {}".format(i + 1))
+            if not self.args.loop or not self.adaptor.num_stops:
+                break
+            self.adaptor.rewind()
+
+        print("Finished replaying")
+
+    def cleanup(self):
+        self.server.stop()
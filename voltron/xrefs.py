@@ -0,0 +1,265 @@
+"""
+An index of the code cross-references (xrefs) in a target's modules, so
+questions like "what calls this function?" or "what uses this global?" can
+be answered without scanning the code each time.
+
+Modules are indexed by a worker thread that reads their executable sections
+from their files and decodes them linearly, so it never needs the debugger
+(or the host lock). Decoding is done by a decoder function for the module's
+architecture, which is built on capstone if it's installed, or provided by
+the debugger adaptor (see `DebuggerAdaptor._xref_decoder()`).
+"""
+import sys
+import mmap
+import array
+import bisect
+import struct
+import logging
+import threading
+
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+try:
+    import capstone
+    HAVE_CAPSTONE = True
+except ImportError:
+    HAVE_CAPSTONE = False
+
+from voltron.elf import ELFFile
+
+log = logging.getLogger('debugger')
+
+# types of xref, in the order their codes are stored in
+xref_types = ['call', 'jump', 'data']
+
+
+class XrefIndex(object):
+    """
+    An index of the xrefs in a module, stored as arrays of the addresses
+    referenced, the addresses of the instructions that reference them and the
+    type of each xref, sorted by the address referenced.
+
+    `xrefs` is a list of (target, source, type) tuples, with the addresses as
+    they are in the module's file and the type as an index into `xref_types`.
+    """
+    def __init__(self, xrefs):
+        xrefs = sorted(xrefs)
+        self.targets = array.array('Q', [x[0] for x in xrefs])
+        self.sources = array.array('Q', [x[1] for x in xrefs])
+        self.types = array.array('B', [x[2] for x in xrefs])
+
+    def __len__(self):
+        return len(self.targets)
+
+    def lookup(self, address):
+        """
+        Get the xrefs to `address` as a list of (source, type) tuples, with
+        the type as a name from `xref_types`.
+        """
+        i = bisect.bisect_left(self.targets, address)
+        j = bisect.bisect_right(self.targets, address)
+        return [(self.sources[k], xref_types[self.types[k]]) for k in range(i, j)]
+
+    # the file format is a header followed by the arrays in native byte order
+    file_magic = b'VXRF'
+    file_version = 1
+    file_header = struct.Struct('=4sIIIQ')
+
+    def save(self, link_base=0):
+        """
+        Serialise the index and the link base of its module in a format that
+        can be memory-mapped by `load()`. Returns a list of bytes-like objects.
+        """
+        header = self.file_header.pack(self.file_magic, self.file_version, len(self),
+                                       1 if sys.byteorder == 'little' else 2, link_base)
+        return [header, self.targets, self.sources, self.types]
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index saved by `save()`. Returns the index and the link base
+        of its module. Raises ValueError if the file isn't an index in the
+        current format.
+        """
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, order, link_base = cls.file_header.unpack_from(data, 0)
+        if (magic, version, order) != (cls.file_magic, cls.file_version, 1 if sys.byteorder == 'little' else 2):
+            raise ValueError("Not an xref index in the current format")
+        if len(data) != cls.file_header.size + 17 * count:
+            raise ValueError("Truncated xref index")
+
+        def words(offset, count, fmt):
+            size = array.array(fmt).itemsize
+            if hasattr(memoryview, 'cast'):
+                return memoryview(data)[offset:offset + size * count].cast(fmt)
+            return array.array(fmt, data[offset:offset + size * count])
+
+        index = cls([])
+        offset = cls.file_header.size
+        index.targets = words(offset, count, 'Q')
+        index.sources = words(offset + 8 * count, count, 'Q')
+        index.types = words(offset + 16 * count, count, 'B')
+        index.data = data
+        return index, link_base
+
+
+def build_xref_index(path, decoder_for):
+    """
+    Build an `XrefIndex` of the module in the ELF file at `path`.
+
+    `decoder_for` is a function taking an architecture name (e.g. "x86_64")
+    and returning a decoder, or None if it can't decode the architecture. A
+    decoder is a function taking the bytes of a section and the address
+    they're at, and yielding an (address, size, kind, refs) tuple for each
+    instruction, where `kind` is as returned by `voltron.dbg.branch_kind()`
+    and `refs` is a list of the addresses the instruction references.
+
+    Only references to addresses in the module's allocated sections are
+    kept, so constants that happen to be addresses in the module's headers
+    (which start at 0 in shared libraries and PIE executables) aren't taken
+    for data references. Returns the index and the link base of the module,
+    or None if the module's architecture can't be decoded.
+    """
+    elf = ELFFile(path)
+    try:
+        decode = decoder_for(elf.machine_name)
+        if decode is None:
+            return None
+        ranges = elf.allocated_ranges()
+        starts = [r[0] for r in ranges]
+        xrefs = []
+        for address, data in elf.executable_sections():
+            for addr, size, kind, refs in decode(data, address):
+                if kind == 'call':
+                    code = 0
+                elif kind in ('jump', 'conditional'):
+                    code = 1
+                else:
+                    code = 2
+                for ref in refs:
+                    i = bisect.bisect_right(starts, ref) - 1
+                    if i >= 0 and ref < ranges[i][1]:
+                        xrefs.append((ref, addr, code))
+        return XrefIndex(xrefs), elf.load_base
+    finally:
+        elf.close()
+
+
+def capstone_decoder(arch):
+    """
+    Get a decoder (see `build_xref_index()`) built on capstone for an
+    architecture, or None if capstone isn't installed or doesn't support it.
+    """
+    if not HAVE_CAPSTONE:
+        return None
+    from voltron.dbg import branch_kind
+
+    modes = {
+        'x86':      (capstone.CS_ARCH_X86, capstone.CS_MODE_32),
+        'x86_64':   (capstone.CS_ARCH_X86, capstone.CS_MODE_64),
+        'arm':      (capstone.CS_ARCH_ARM, capstone.CS_MODE_ARM),
+        'arm64':    (capstone.CS_ARCH_ARM64, capstone.CS_MODE_ARM),
+    }
+    if arch not in modes:
+        return None
+    md = capstone.Cs(*modes[arch])
+    md.detail = True
+    md.skipdata = True
+    rip = capstone.x86.X86_REG_RIP if arch == 'x86_64' else None
+
+    def decode(data, address):
+        for insn in md.disasm(bytes(data), address):
+            refs = []
+            try:
+                operands = insn.operands
+            except capstone.CsError:
+                operands = []
+            for op in operands:
+                if op.type == capstone.CS_OP_IMM:
+                    refs.append(op.imm & 0xffffffffffffffff)
+                elif op.type == capstone.CS_OP_MEM and rip is not None and op.mem.base == rip:
+                    refs.append(insn.address + insn.size + op.mem.disp)
+            yield insn.address, insn.size, branch_kind(insn.mnemonic, insn.op_str), refs
+
+    return decode
+
+
+class XrefIndexer(threading.Thread):
+    """
+    A worker thread that builds the xref indexes of modules.
+
+    `decoder_for` is passed to `build_xref_index()`. `disk_cache` is a
+    `DiskCache` to keep the indexes in between sessions, or None, and
+    `build_id` is a function that gets the ID to key a module's entry with.
+
+    Modules are queued with `add()`, and once indexed their indexes can be
+    found with `index()`. Modules are dicts as returned by
+    `DebuggerAdaptor._modules()`.
+    """
+    def __init__(self, decoder_for, disk_cache=None, build_id=None):
+        super(XrefIndexer, self).__init__()
+        self.daemon = True
+        self.decoder_for = decoder_for
+        self.disk_cache = disk_cache
+        self.build_id = build_id
+        self.queue = Queue()
+        self.lock = threading.Lock()
+        self.indexes = {}
+        self.queued = set()
+
+    def add(self, module):
+        """
+        Queue a module to be indexed, unless it's already been queued.
+        """
+        with self.lock:
+            if module['key'] in self.queued:
+                return
+            self.queued.add(module['key'])
+        self.queue.put(module)
+
+    def index(self, key):
+        """
+        Get the index and link base of the module with key `key` as a tuple,
+        None if it hasn't been indexed yet, or False if it can't be (e.g. it
+        isn't an ELF file or there's no decoder for its architecture).
+        """
+        with self.lock:
+            return self.indexes.get(key)
+
+    def run(self):
+        while True:
+            module = self.queue.get()
+            if module is None:
+                break
+            try:
+                result = self._index(module)
+            except Exception as e:
+                log.debug("Couldn't index xrefs in {}: {}".format(module['path'], e))
+                result = None
+            with self.lock:
+                self.indexes[module['key']] = result or False
+
+    def stop(self):
+        self.queue.put(None)
+
+    def _index(self, module):
+        path = None
+        if self.disk_cache and self.build_id:
+            build_id = self.build_id(module)
+            path = self.disk_cache.path_for(build_id, 'xrefs')
+            try:
+                return XrefIndex.load(path)
+            except (IOError, OSError, ValueError, struct.error):
+                pass
+
+        result = build_xref_index(module['path'], self.decoder_for)
+        if result and path:
+            try:
+                self.disk_cache.write(build_id, 'xrefs', result[0].save(result[1]))
+            except (IOError, OSError) as e:
+                log.debug("Couldn't cache xrefs for {}: {}".format(module['path'], e))
+        return result